@@ -0,0 +1,350 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import io
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PurePosixPath
+from zipfile import ZipFile, ZipInfo
+
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
+LOGGER = logging.getLogger(__name__)
+
+SIZE_BUDGET_VERSION = 1
+SIZE_BUDGET_NAME = "qpdt-size-budget.json"
+DEFAULT_LARGEST_FILE_COUNT = 10
+
+PLUGIN_DISTRIBUTION_NAME = "(plugin)"
+UNKNOWN_DISTRIBUTION_NAME = "(unknown)"
+NO_FILE_TYPE_NAME = "(none)"
+
+
+@dataclass
+class SizeEntry:
+    name: str
+    file_count: int = 0
+    # uncompressed bytes
+    file_size: int = 0
+    # bytes stored in the zip
+    compress_size: int = 0
+
+    def add(self, member_info: ZipInfo) -> None:
+        self.file_count += 1
+        self.file_size += member_info.file_size
+        self.compress_size += member_info.compress_size
+
+
+@dataclass
+class ZipSizeReport:
+    """
+    Uncompressed and compressed sizes of the plugin zip members grouped
+    by the bundled distribution, the top level package and the file type.
+    """
+
+    zip_file_size: int
+    total: SizeEntry
+    distributions: list[SizeEntry] = field(default_factory=list)
+    top_level_packages: list[SizeEntry] = field(default_factory=list)
+    file_types: list[SizeEntry] = field(default_factory=list)
+    largest_files: list[SizeEntry] = field(default_factory=list)
+
+    @staticmethod
+    def from_zip_file(
+        zip_file_path: Path, largest_file_count: int = DEFAULT_LARGEST_FILE_COUNT
+    ) -> "ZipSizeReport":
+        """
+        Reads the sizes from the central directory of the zip file without
+        extracting the members. Only the small record files of the bundled
+        distributions are read to find the distribution of each member.
+        """
+        with (
+            trace_span("analyze zip", file=zip_file_path),
+            ZipFile(zip_file_path) as zip_file,
+        ):
+            member_infos = [
+                member_info
+                for member_info in zip_file.infolist()
+                if not member_info.is_dir()
+            ]
+            distribution_names = _DistributionNames.from_records(zip_file, member_infos)
+
+        total = SizeEntry(zip_file_path.name)
+        distributions: dict[str, SizeEntry] = {}
+        top_level_packages: dict[str, SizeEntry] = {}
+        file_types: dict[str, SizeEntry] = {}
+        for member_info in member_infos:
+            member_name = PurePosixPath(member_info.filename)
+            top_level_name = _get_top_level_name(member_name)
+            file_type = member_name.suffix or NO_FILE_TYPE_NAME
+
+            total.add(member_info)
+            for entries, name in [
+                (
+                    distributions,
+                    distribution_names.get_name(member_name, top_level_name),
+                ),
+                (top_level_packages, top_level_name),
+                (file_types, file_type),
+            ]:
+                entries.setdefault(name, SizeEntry(name)).add(member_info)
+
+        largest_files = [
+            SizeEntry(
+                member_info.filename,
+                1,
+                member_info.file_size,
+                member_info.compress_size,
+            )
+            for member_info in sorted(
+                member_infos,
+                key=lambda member_info: (
+                    -member_info.compress_size,
+                    member_info.filename,
+                ),
+            )[:largest_file_count]
+        ]
+
+        return ZipSizeReport(
+            zip_file_size=zip_file_path.stat().st_size,
+            total=total,
+            distributions=_sort_by_size(distributions),
+            top_level_packages=_sort_by_size(top_level_packages),
+            file_types=_sort_by_size(file_types),
+            largest_files=largest_files,
+        )
+
+    def format_table(self) -> str:
+        kib = 1024
+        lines = [
+            f"{self.total.name}: {self.zip_file_size / kib:.1f} KiB,"
+            f" {self.total.file_count} files,"
+            f" {self.total.file_size / kib:.1f} KiB uncompressed"
+        ]
+        for title, entries in [
+            ("distribution", self.distributions),
+            ("top level package", self.top_level_packages),
+            ("file type", self.file_types),
+            ("largest file", self.largest_files),
+        ]:
+            name_width = max([len(title), *(len(entry.name) for entry in entries)]) + 2
+            lines.append("")
+            lines.append(
+                f"{title:<{name_width}}{'files':>8}{'size KiB':>12}"
+                f"{'zip KiB':>12}{'zip %':>8}"
+            )
+            for entry in entries:
+                share = (
+                    100 * entry.compress_size / self.total.compress_size
+                    if self.total.compress_size
+                    else 0.0
+                )
+                lines.append(
+                    f"{entry.name:<{name_width}}{entry.file_count:>8}"
+                    f"{entry.file_size / kib:>12.1f}{entry.compress_size / kib:>12.1f}"
+                    f"{share:>8.1f}"
+                )
+        return "\n".join(lines)
+
+    def write_json(self, file_path: Path) -> None:
+        file_path.write_text(
+            json.dumps(asdict(self), indent=2) + "\n",
+            encoding="utf-8",
+        )
+
+
+@dataclass
+class SizeBudget:
+    """
+    Stored zip size, which later builds are compared against.
+    """
+
+    zip_file_size: int
+    # compressed bytes of each distribution
+    distributions: dict[str, int] = field(default_factory=dict)
+    size_budget_version: int = SIZE_BUDGET_VERSION
+
+    @staticmethod
+    def from_report(report: ZipSizeReport) -> "SizeBudget":
+        return SizeBudget(
+            zip_file_size=report.zip_file_size,
+            distributions={
+                entry.name: entry.compress_size for entry in report.distributions
+            },
+        )
+
+    def check(self, report: ZipSizeReport, max_growth_percent: float) -> list[str]:
+        """
+        Returns the reasons why the zip exceeds the budget, if it does.
+        """
+        max_zip_file_size = int(self.zip_file_size * (1 + max_growth_percent / 100))
+        if report.zip_file_size <= max_zip_file_size:
+            return []
+
+        reasons = [
+            f"zip size {report.zip_file_size} bytes exceeds the budget of"
+            f" {self.zip_file_size} bytes by more than {max_growth_percent:g} %"
+        ]
+        grown_distributions = sorted(
+            (
+                (
+                    entry.compress_size - self.distributions.get(entry.name, 0),
+                    entry.name,
+                )
+                for entry in report.distributions
+            ),
+            reverse=True,
+        )
+        reasons.extend(
+            f"{name} grew by {growth} bytes"
+            + ("" if name in self.distributions else " (not in the budget)")
+            for growth, name in grown_distributions
+            if growth > 0
+        )
+        return reasons
+
+    @staticmethod
+    def read(size_budget_path: Path) -> "SizeBudget":
+        contents = json.loads(size_budget_path.read_text(encoding="utf-8"))
+        if contents.get("size_budget_version") != SIZE_BUDGET_VERSION:
+            raise ValueError(
+                f"size budget {size_budget_path} has an unsupported version,"
+                " run qpdt analyze --update-budget"
+            )
+        return SizeBudget(
+            zip_file_size=contents["zip_file_size"],
+            distributions=contents["distributions"],
+        )
+
+    def write(self, size_budget_path: Path) -> None:
+        size_budget_path.write_text(
+            json.dumps(asdict(self), indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+
+
+@dataclass
+class _DistributionNames:
+    # distribution names of the recorded vendored files
+    recorded_names: dict[PurePosixPath, str] = field(default_factory=dict)
+    # distribution names of the vendored top level names, for unrecorded files
+    top_level_names: dict[str, str] = field(default_factory=dict)
+
+    @staticmethod
+    def from_records(
+        zip_file: ZipFile, member_infos: list[ZipInfo]
+    ) -> "_DistributionNames":
+        distribution_names = _DistributionNames()
+        for member_info in member_infos:
+            member_name = PurePosixPath(member_info.filename)
+            if not (
+                _is_vendored(member_name)
+                and len(member_name.parts) == 4  # noqa: PLR2004
+                and member_name.parts[2].endswith(".dist-info")
+                and member_name.name == "RECORD"
+            ):
+                continue
+
+            vendor_path = PurePosixPath(*member_name.parts[:2])
+            name = _get_metadata_directory_distribution_name(member_name.parts[2])
+            record = zip_file.read(member_info).decode("utf-8", errors="replace")
+            for row in csv.reader(io.StringIO(record)):
+                if not row or row[0].startswith(("/", "..")):
+                    continue
+                recorded_path = PurePosixPath(row[0])
+                distribution_names.recorded_names[vendor_path / recorded_path] = name
+                distribution_names.top_level_names.setdefault(
+                    _get_module_name(recorded_path.parts[0]), name
+                )
+
+        return distribution_names
+
+    def get_name(self, member_name: PurePosixPath, top_level_name: str) -> str:
+        if not _is_vendored(member_name):
+            return PLUGIN_DISTRIBUTION_NAME
+        if (name := self.recorded_names.get(member_name)) is not None:
+            return name
+        if member_name.parts[2].endswith((".dist-info", ".egg-info")):
+            return _get_metadata_directory_distribution_name(member_name.parts[2])
+        return self.top_level_names.get(top_level_name, UNKNOWN_DISTRIBUTION_NAME)
+
+
+def _is_vendored(member_name: PurePosixPath) -> bool:
+    # the vendor package itself is created for the plugin
+    return (
+        len(member_name.parts) > 2  # noqa: PLR2004
+        and member_name.parts[1] == "_vendor"
+        and member_name.parts[2] != "__init__.py"
+    )
+
+
+def _get_top_level_name(member_name: PurePosixPath) -> str:
+    # vendored packages are top level packages when the plugin is run
+    if _is_vendored(member_name):
+        return _get_module_name(member_name.parts[2])
+    return member_name.parts[0]
+
+
+def _get_module_name(file_name: str) -> str:
+    return file_name.removesuffix(".py")
+
+
+def _get_metadata_directory_distribution_name(directory_name: str) -> str:
+    return directory_name.rsplit(".", 1)[0].split("-", 1)[0]
+
+
+def _sort_by_size(entries: dict[str, SizeEntry]) -> list[SizeEntry]:
+    return sorted(
+        entries.values(), key=lambda entry: (-entry.compress_size, entry.name)
+    )
+
+
+def report_zip_size(
+    zip_file_path: Path,
+    size_budget_path: Path,
+    max_growth_percent: float,
+    update_budget: bool = False,
+    largest_file_count: int = DEFAULT_LARGEST_FILE_COUNT,
+) -> ZipSizeReport:
+    """
+    Logs the size report of the zip file and compares it to the size budget
+    if one is stored, raising ValueError if the zip exceeds the budget.
+    """
+    report = ZipSizeReport.from_zip_file(zip_file_path, largest_file_count)
+    LOGGER.info("zip size report:\n%s", report.format_table())
+
+    if update_budget:
+        SizeBudget.from_report(report).write(size_budget_path)
+        LOGGER.info("wrote size budget to %s", size_budget_path)
+        return report
+
+    if not size_budget_path.exists():
+        LOGGER.debug("no size budget in %s", size_budget_path)
+        return report
+
+    reasons = SizeBudget.read(size_budget_path).check(report, max_growth_percent)
+    if reasons:
+        raise ValueError(
+            f"{zip_file_path.name} exceeds the size budget in {size_budget_path}:\n"
+            + "\n".join(reasons)
+        )
+    LOGGER.info("%s is within the size budget", zip_file_path.name)
+    return report
@@ -18,25 +18,42 @@
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
 import logging
-import os
-import shutil
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
+from importlib_metadata import Distribution
+
+from qgis_plugin_dev_tools.build.archive import (
+    PluginArchive,
+    ZipCompression,
+    get_source_date_epoch,
+)
+from qgis_plugin_dev_tools.build.cache import VendoredDistributionCache
 from qgis_plugin_dev_tools.build.changelog_parser import (
     get_latest_changelog_sections,
     get_latest_changelog_version_identifier,
 )
+from qgis_plugin_dev_tools.build.config import BuildConfig
 from qgis_plugin_dev_tools.build.distribution import (
     get_package_version_from_distribution,
 )
+from qgis_plugin_dev_tools.build.incremental import (
+    build_plugin_directory_incrementally,
+)
+from qgis_plugin_dev_tools.build.lockfile import Lockfile
 from qgis_plugin_dev_tools.build.metadata import update_metadata_file
 from qgis_plugin_dev_tools.build.packaging import (
     copy_license,
     copy_plugin_code,
     copy_runtime_requirements,
+    get_bundled_wheel_distributions,
+    iter_files_to_bundle,
 )
+from qgis_plugin_dev_tools.build.streaming import write_plugin_zip_from_sources
+from qgis_plugin_dev_tools.build.timings import BuildTimings
+from qgis_plugin_dev_tools.build.tree_shaking import tree_shake_plugin_archive
 from qgis_plugin_dev_tools.config import DevToolsConfig, VersionNumberSource
+from qgis_plugin_dev_tools.utils.wheels import Wheelhouse
 
 LOGGER = logging.getLogger(__name__)
 
@@ -57,42 +74,183 @@ def make_plugin_zip(
     dev_tools_config: DevToolsConfig,
     target_directory_path: Path,
     override_plugin_version: str | None = None,
-) -> None:
+    build_config: BuildConfig | None = None,
+    timings: BuildTimings | None = None,
+) -> Path:
+    """
+    Builds the plugin zip file to the target directory and returns its path.
+    By default the plugin is built in a temporary directory, if the build config
+    has a build directory, the build tree is kept there and only the changed
+    sources are processed on the next build. With stream the zip file is written
+    directly from the sources instead. The time of each build stage is recorded
+    in the timings, if those are enabled.
+    """
+    build_config = build_config or BuildConfig()
+    timings = timings or BuildTimings(enabled=False)
+
     # TODO: make setuptools wrapper and use this code when creating the sdist/wheel?
 
-    changelog_contents = get_latest_changelog_sections(
-        dev_tools_config.changelog_file_path
+    with timings.stage("read changelog"):
+        changelog_contents = get_latest_changelog_sections(
+            dev_tools_config.changelog_file_path
+        )
+    with timings.stage("infer version"):
+        version = override_plugin_version or _infer_version_from_source_files(
+            dev_tools_config
+        )
+    zip_name = f"{dev_tools_config.plugin_package_name}-{version}"
+    timestamp = get_source_date_epoch(dev_tools_config.changelog_file_path)
+
+    bundled_distributions = _get_configured_bundled_distributions(
+        dev_tools_config, build_config, timings
     )
-    version = override_plugin_version or _infer_version_from_source_files(
-        dev_tools_config
+
+    if build_config.stream:
+        LOGGER.debug("writing plugin zip file directly from sources")
+        target_directory_path.mkdir(parents=True, exist_ok=True)
+        zip_file_path = target_directory_path / f"{zip_name}.zip"
+        with timings.stage("write zip") as stage:
+            written = write_plugin_zip_from_sources(
+                dev_tools_config,
+                zip_file_path,
+                version,
+                changelog_contents,
+                timestamp,
+                compression=build_config.compression,
+                bundled_distributions=bundled_distributions,
+            )
+            stage.add_files([zip_file_path])
+        if written:
+            LOGGER.info("created %s", zip_file_path.resolve())
+        return zip_file_path
+
+    vendored_cache = (
+        VendoredDistributionCache(
+            build_config.vendored_cache_directory_path, jobs=build_config.jobs
+        )
+        if build_config.vendored_cache_directory_path is not None
+        else None
     )
-    zip_name = f"{dev_tools_config.plugin_package_name}-{version}"
+
+    if build_config.build_directory_path is not None:
+        build_directory_path = build_config.build_directory_path.resolve()
+        LOGGER.debug("building plugin incrementally in %s", build_directory_path)
+        tree_path = build_plugin_directory_incrementally(
+            dev_tools_config,
+            build_directory_path,
+            jobs=build_config.jobs,
+            vendored_cache=vendored_cache,
+            timings=timings,
+            bundled_distributions=bundled_distributions,
+        )
+        with timings.stage("update metadata"):
+            _update_plugin_metadata(
+                dev_tools_config, tree_path, version, changelog_contents
+            )
+        with timings.stage("copy license"):
+            copy_license(dev_tools_config, tree_path)
+        with timings.stage("create zip") as stage:
+            zip_file_path = _create_plugin_zip(
+                dev_tools_config,
+                tree_path,
+                target_directory_path,
+                zip_name,
+                timestamp,
+                build_config.compression,
+            )
+            stage.add_files([zip_file_path])
+        return zip_file_path
 
     with TemporaryDirectory() as build_directory:
         build_directory_path = Path(build_directory)
 
         LOGGER.debug("building plugin in %s", build_directory_path.resolve())
 
-        copy_plugin_code(dev_tools_config, build_directory_path)
-        update_metadata_file(
-            (
-                Path(build_directory)
-                / dev_tools_config.plugin_package_name
-                / "metadata.txt"
-            ),
-            version,
-            changelog_contents,
+        with timings.stage("copy plugin code") as stage:
+            copy_plugin_code(dev_tools_config, build_directory_path)
+            stage.add_files(
+                iter_files_to_bundle(
+                    build_directory_path / dev_tools_config.plugin_package_name
+                )
+            )
+        copy_runtime_requirements(
+            dev_tools_config,
+            build_directory_path,
+            jobs=build_config.jobs,
+            vendored_cache=vendored_cache,
+            timings=timings,
+            bundled_distributions=bundled_distributions,
         )
-        copy_runtime_requirements(dev_tools_config, build_directory_path)
-        copy_license(dev_tools_config, build_directory_path)
+        with timings.stage("update metadata"):
+            _update_plugin_metadata(
+                dev_tools_config, build_directory_path, version, changelog_contents
+            )
+        with timings.stage("copy license"):
+            copy_license(dev_tools_config, build_directory_path)
+        with timings.stage("create zip") as stage:
+            zip_file_path = _create_plugin_zip(
+                dev_tools_config,
+                build_directory_path,
+                target_directory_path,
+                zip_name,
+                timestamp,
+                build_config.compression,
+            )
+            stage.add_files([zip_file_path])
+    return zip_file_path
 
-        LOGGER.debug("creating built plugin zip file from build directory")
 
-        target_directory_path.mkdir(parents=True, exist_ok=True)
-        os.chdir(target_directory_path)
-        shutil.make_archive(base_name=zip_name, format="zip", root_dir=build_directory)
+def _get_configured_bundled_distributions(
+    dev_tools_config: DevToolsConfig, build_config: BuildConfig, timings: BuildTimings
+) -> list[tuple[Distribution, set[str]]] | None:
+    # None resolves the installed distributions during the build
+    if build_config.lockfile_path is not None:
+        with timings.stage("read lockfile"):
+            return Lockfile.read(build_config.lockfile_path).get_bundled_distributions(
+                dev_tools_config
+            )
+    if build_config.wheelhouse_path is not None:
+        with timings.stage("resolve wheels"):
+            return (
+                get_bundled_wheel_distributions(
+                    dev_tools_config, Wheelhouse(build_config.wheelhouse_path)
+                )
+                if len(dev_tools_config.runtime_requires) > 0
+                else []
+            )
+    return None
 
-        LOGGER.info(
-            "created %s",
-            (Path(zip_name + ".zip")).resolve(),
-        )
+
+def _update_plugin_metadata(
+    dev_tools_config: DevToolsConfig,
+    build_directory_path: Path,
+    version: str,
+    changelog_contents: str,
+) -> None:
+    update_metadata_file(
+        (build_directory_path / dev_tools_config.plugin_package_name / "metadata.txt"),
+        version,
+        changelog_contents,
+    )
+
+
+def _create_plugin_zip(  # noqa: PLR0913
+    dev_tools_config: DevToolsConfig,
+    build_directory_path: Path,
+    target_directory_path: Path,
+    zip_name: str,
+    timestamp: int,
+    compression: ZipCompression,
+) -> Path:
+    LOGGER.debug("creating built plugin zip file from build directory")
+
+    target_directory_path.mkdir(parents=True, exist_ok=True)
+    zip_file_path = (target_directory_path / f"{zip_name}.zip").resolve()
+
+    archive = PluginArchive(timestamp, compression)
+    archive.add_tree(build_directory_path)
+    tree_shake_plugin_archive(dev_tools_config, archive)
+    if archive.write(zip_file_path):
+        LOGGER.info("created %s", zip_file_path)
+
+    return zip_file_path
@@ -0,0 +1,266 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import logging
+import os
+import stat
+import time
+import zlib
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from enum import Enum, auto
+from pathlib import Path, PurePosixPath
+from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile, ZipInfo
+
+from qgis_plugin_dev_tools.build.changelog_parser import (
+    get_latest_changelog_release_date,
+)
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
+LOGGER = logging.getLogger(__name__)
+
+# increase when the written archive changes, so older zips are not reused
+ARCHIVE_FORMAT_VERSION = 1
+ARCHIVE_DIGEST_COMMENT_PREFIX = b"qpdt-sha256:"
+
+# earliest time which can be stored in a zip file, 1980-01-01
+MINIMUM_ZIP_TIMESTAMP = 315532800
+ZIP_FILE_MODE = stat.S_IFREG | 0o644
+ZIP_DIRECTORY_MODE = stat.S_IFDIR | 0o755
+ZIP_UNIX_SYSTEM = 3
+ZIP_MSDOS_DIRECTORY_ATTRIBUTE = 0x10
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class ZipCompression(Enum):
+    STORE = auto()
+    FAST = auto()
+    DEFAULT = auto()
+    MAX = auto()
+
+    @staticmethod
+    def from_config_value(config_value: str) -> "ZipCompression":
+        try:
+            return ZipCompression[config_value.upper()]
+        except KeyError:
+            raise ValueError(f"{config_value=} is not a valid value") from None
+
+    @property
+    def deflate_level(self) -> int | None:
+        return {
+            ZipCompression.STORE: None,
+            ZipCompression.FAST: 1,
+            ZipCompression.DEFAULT: zlib.Z_DEFAULT_COMPRESSION,
+            ZipCompression.MAX: 9,
+        }[self]
+
+
+def get_source_date_epoch(changelog_file_path: Path) -> int:
+    """
+    Returns the timestamp of the zip members, from SOURCE_DATE_EPOCH if it is
+    set, otherwise from the date of the latest release in the changelog.
+    """
+    if source_date_epoch := os.environ.get("SOURCE_DATE_EPOCH"):
+        try:
+            return max(int(source_date_epoch), MINIMUM_ZIP_TIMESTAMP)
+        except ValueError:
+            raise ValueError(
+                f"invalid SOURCE_DATE_EPOCH={source_date_epoch!r}"
+            ) from None
+
+    release_date = get_latest_changelog_release_date(changelog_file_path)
+    if release_date is None:
+        return MINIMUM_ZIP_TIMESTAMP
+    return max(
+        int(
+            datetime(
+                release_date.year,
+                release_date.month,
+                release_date.day,
+                tzinfo=timezone.utc,
+            ).timestamp()
+        ),
+        MINIMUM_ZIP_TIMESTAMP,
+    )
+
+
+class PluginArchive:
+    """
+    Members of the plugin zip file, written in a reproducible way. Members are
+    sorted by name and written with a fixed timestamp and normalized
+    permissions, so the same contents always give the same zip file. A digest
+    of the contents is stored in the zip comment, and an existing zip with the
+    same digest is not written again. The digest is computed from the final
+    members, so an unchanged build skips only writing the zip, not the build
+    itself. The members are hashed in parallel threads, since hashlib releases
+    the GIL while hashing.
+    """
+
+    def __init__(
+        self,
+        timestamp: int,
+        compression: ZipCompression = ZipCompression.DEFAULT,
+        threads: int | None = None,
+    ) -> None:
+        self._date_time = time.gmtime(max(timestamp, MINIMUM_ZIP_TIMESTAMP))[:6]
+        self._compression = compression
+        self._threads = threads or os.cpu_count() or 1
+        # source file path or the contents of each member
+        self._members: dict[PurePosixPath, Path | bytes] = {}
+
+    def add_file(self, member_name: PurePosixPath, source_file: Path) -> None:
+        self._members[member_name] = source_file
+
+    def add_contents(self, member_name: PurePosixPath, contents: bytes) -> None:
+        self._members[member_name] = contents
+
+    def add_tree(self, root_path: Path) -> None:
+        for directory, directory_names, file_names in os.walk(root_path):
+            directory_names.sort()
+            for file_name in sorted(file_names):
+                file_path = Path(directory) / file_name
+                self.add_file(
+                    PurePosixPath(file_path.relative_to(root_path).as_posix()),
+                    file_path,
+                )
+
+    def get_member_names(self) -> list[PurePosixPath]:
+        return [member_name for member_name, _ in self._get_sorted_members()]
+
+    def read_member(self, member_name: PurePosixPath) -> bytes:
+        source = self._members[member_name]
+        return source if isinstance(source, bytes) else source.read_bytes()
+
+    def get_member_size(self, member_name: PurePosixPath) -> int:
+        source = self._members[member_name]
+        return len(source) if isinstance(source, bytes) else source.stat().st_size
+
+    def remove_member(self, member_name: PurePosixPath) -> None:
+        del self._members[member_name]
+
+    def get_digest(self) -> str:
+        digest = hashlib.sha256(
+            f"{ARCHIVE_FORMAT_VERSION} {self._date_time}"
+            f" {self._compression.name}\n".encode()
+        )
+        members = self._get_sorted_members()
+        with ThreadPoolExecutor(max_workers=self._threads) as executor:
+            for (member_name, _), contents_hash in zip(
+                members,
+                executor.map(_hash_contents, [source for _, source in members]),
+                strict=True,
+            ):
+                digest.update(f"{member_name.as_posix()}\n".encode())
+                digest.update(contents_hash.encode())
+        return digest.hexdigest()
+
+    def write(self, zip_file_path: Path) -> bool:
+        """
+        Writes the zip file, unless an identical one already exists.
+        Returns whether the zip file was written. The members are hashed
+        to compare the zip files, so this only skips writing the zip.
+        """
+        comment = ARCHIVE_DIGEST_COMMENT_PREFIX + self.get_digest().encode()
+        if _read_zip_comment(zip_file_path) == comment:
+            LOGGER.info("%s is up to date", zip_file_path.resolve())
+            return False
+
+        # the comment is at the end of the file, so an interrupted
+        # write never leaves a zip file which looks up to date
+        with (
+            trace_span("write archive", file=zip_file_path),
+            ZipFile(zip_file_path, "w") as zip_file,
+        ):
+            self._write_members(zip_file)
+            zip_file.comment = comment
+
+        return True
+
+    def _write_members(self, zip_file: ZipFile) -> None:
+        written_directories: set[PurePosixPath] = set()
+        for member_name, source in self._get_sorted_members():
+            self._write_directories(zip_file, member_name, written_directories)
+            zip_file.writestr(
+                self._get_member_info(member_name.as_posix()),
+                source if isinstance(source, bytes) else source.read_bytes(),
+                compresslevel=self._compression.deflate_level,
+            )
+
+    def _write_directories(
+        self,
+        zip_file: ZipFile,
+        member_name: PurePosixPath,
+        written_directories: set[PurePosixPath],
+    ) -> None:
+        for directory in reversed(member_name.parents[:-1]):
+            if directory not in written_directories:
+                written_directories.add(directory)
+                zip_file.writestr(
+                    self._get_member_info(f"{directory.as_posix()}/"), b""
+                )
+
+    def _get_sorted_members(self) -> list[tuple[PurePosixPath, Path | bytes]]:
+        # sorted as strings, so the directory entries are in the same order
+        return sorted(self._members.items(), key=lambda item: item[0].as_posix())
+
+    def _get_member_info(self, member_name: str) -> ZipInfo:
+        member_info = ZipInfo(member_name, date_time=self._date_time)
+        member_info.create_system = ZIP_UNIX_SYSTEM
+        if member_name.endswith("/"):
+            member_info.external_attr = (
+                ZIP_DIRECTORY_MODE << 16 | ZIP_MSDOS_DIRECTORY_ATTRIBUTE
+            )
+        else:
+            member_info.external_attr = ZIP_FILE_MODE << 16
+            member_info.compress_type = (
+                ZIP_STORED
+                if self._compression == ZipCompression.STORE
+                else ZIP_DEFLATED
+            )
+        return member_info
+
+
+def _iter_chunks(source: Path | bytes) -> Generator[bytes, None, None]:
+    if isinstance(source, bytes):
+        yield source
+        return
+
+    with open(source, "rb") as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+def _hash_contents(source: Path | bytes) -> str:
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+
+    file_hash = hashlib.sha256()
+    for chunk in _iter_chunks(source):
+        file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _read_zip_comment(zip_file_path: Path) -> bytes | None:
+    try:
+        with ZipFile(zip_file_path) as zip_file:
+            return zip_file.comment
+    except (OSError, BadZipFile):
+        return None
@@ -0,0 +1,170 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from importlib_metadata import Distribution
+
+from qgis_plugin_dev_tools.build.packaging import (
+    REWRITTEN_FILE_SUFFIXES,
+    VendoredImportRewrite,
+    copy_distribution_files,
+    rewrite_vendored_imports,
+)
+from qgis_plugin_dev_tools.build.rewrite_imports import REWRITER_VERSION
+from qgis_plugin_dev_tools.utils.distributions import get_distribution_record_hash
+from qgis_plugin_dev_tools.utils.files import (
+    get_user_cache_directory_path,
+    link_or_copy_file,
+)
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
+LOGGER = logging.getLogger(__name__)
+
+VENDORED_CACHE_FORMAT_VERSION = 1
+
+
+def get_default_vendored_cache_directory_path() -> Path:
+    return get_user_cache_directory_path() / "vendored"
+
+
+@dataclass
+class VendoredDistributionCache:
+    """
+    User level cache of the bundled distribution files with the imports already
+    rewritten, shared between the builds of all the plugins. Cached files are
+    hard linked to the build directory when possible.
+    """
+
+    cache_directory_path: Path
+    jobs: int = 1
+
+    def copy_distribution_files(
+        self,
+        distribution: Distribution,
+        top_level_names: set[str],
+        target_root_path: Path,
+        rewrite: VendoredImportRewrite | None,
+    ) -> list[Path]:
+        """
+        Copies the distribution files like copy_distribution_files, but with
+        the imports already rewritten, using the cached files if available.
+        """
+        entry_path = self.cache_directory_path / _get_entry_name(
+            distribution, top_level_names, rewrite
+        )
+
+        if not entry_path.is_dir():
+            self._create_entry(distribution, top_level_names, entry_path, rewrite)
+        else:
+            LOGGER.debug(
+                "using cached runtime requirement %s from %s",
+                distribution.name,
+                entry_path,
+            )
+
+        copied_paths = []
+        with trace_span("link cached distribution", distribution=distribution.name):
+            for cached_path in sorted(entry_path.iterdir()):
+                new_path = target_root_path / cached_path.name
+                if cached_path.is_dir():
+                    shutil.copytree(
+                        src=cached_path, dst=new_path, copy_function=link_or_copy_file
+                    )
+                else:
+                    link_or_copy_file(cached_path, new_path)
+                copied_paths.append(new_path)
+
+        return copied_paths
+
+    def _create_entry(
+        self,
+        distribution: Distribution,
+        top_level_names: set[str],
+        entry_path: Path,
+        rewrite: VendoredImportRewrite | None,
+    ) -> None:
+        LOGGER.debug(
+            "caching runtime requirement %s to %s", distribution.name, entry_path
+        )
+
+        self.cache_directory_path.mkdir(parents=True, exist_ok=True)
+        # prepare the entry next to the final path, and rename it only when complete
+        # so other builds running at the same time never see a partial entry
+        temporary_path = Path(
+            tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_directory_path)
+        )
+        try:
+            copy_distribution_files(
+                distribution,
+                top_level_names,
+                temporary_path,
+                materialized_suffixes=(
+                    REWRITTEN_FILE_SUFFIXES if rewrite is not None else ()
+                ),
+            )
+
+            if rewrite is not None:
+                rewrite_vendored_imports(
+                    [
+                        file_path
+                        for file_path in temporary_path.rglob("*")
+                        if file_path.suffix in (".py", ".ui")
+                    ],
+                    rewrite.vendored_top_level_names,
+                    container_package_name=rewrite.container_package_name,
+                    jobs=self.jobs,
+                )
+
+            try:
+                temporary_path.rename(entry_path)
+            except OSError:
+                if not entry_path.is_dir():
+                    raise
+                LOGGER.debug("runtime requirement %s was cached meanwhile", entry_path)
+        finally:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+
+def _get_entry_name(
+    distribution: Distribution,
+    top_level_names: set[str],
+    rewrite: VendoredImportRewrite | None,
+) -> str:
+    key = json.dumps(
+        [
+            VENDORED_CACHE_FORMAT_VERSION,
+            REWRITER_VERSION,
+            distribution.name,
+            distribution.version,
+            get_distribution_record_hash(distribution),
+            sorted(top_level_names),
+            rewrite.container_package_name if rewrite is not None else None,
+            sorted(rewrite.vendored_top_level_names) if rewrite is not None else [],
+        ]
+    )
+    safe_name = re.sub(r"[^\w.-]+", "_", f"{distribution.name}-{distribution.version}")
+    return f"{safe_name}-{hashlib.sha256(key.encode()).hexdigest()[:16]}"
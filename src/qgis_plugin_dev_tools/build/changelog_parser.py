@@ -18,6 +18,8 @@
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import re
+from datetime import date
 from pathlib import Path
 
 LOGGER = logging.getLogger(__name__)
@@ -56,3 +58,19 @@ def get_latest_changelog_version_identifier(changelog_file_path: Path) -> str:
         if line.startswith("## "):
             return line.split(" ", maxsplit=2)[1]
     raise ValueError("latest version could not be parsed from changelog")
+
+
+def get_latest_changelog_release_date(changelog_file_path: Path) -> date | None:
+    """
+    Returns the date of the latest section with an ISO date in the heading,
+    for example "## [1.0.0] - 2026-01-31".
+    """
+    for line in changelog_file_path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("## ") and (
+            match := re.search(r"\b(\d{4})-(\d{2})-(\d{2})\b", line)
+        ):
+            try:
+                return date(int(match[1]), int(match[2]), int(match[3]))
+            except ValueError:
+                continue
+    return None
@@ -0,0 +1,61 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from qgis_plugin_dev_tools.build.archive import ZipCompression
+
+
+@dataclass
+class BuildConfig:
+    """
+    Options for how the plugin zip is built, by default the plugin
+    is built in a temporary directory using a single process.
+    """
+
+    # keep the build tree here and only process changed sources on the next build
+    build_directory_path: Path | None = None
+    # write the zip file directly from the sources without a build directory
+    stream: bool = False
+    # number of processes used for rewriting imports in the build directory
+    jobs: int = 1
+    # share the rewritten runtime requirements between builds in this directory
+    vendored_cache_directory_path: Path | None = None
+    # bundle the runtime requirements resolved in this lockfile
+    lockfile_path: Path | None = None
+    # bundle the runtime requirements from the pure Python wheels in this directory
+    wheelhouse_path: Path | None = None
+    # trade between the zip size and the time used for compressing it
+    compression: ZipCompression = ZipCompression.DEFAULT
+
+    def __post_init__(self) -> None:
+        if self.stream and self.build_directory_path is not None:
+            raise ValueError("streamed build cannot use a build directory")
+        if self.stream and self.vendored_cache_directory_path is not None:
+            raise ValueError("streamed build cannot use a vendored cache")
+        if self.wheelhouse_path is not None:
+            if self.build_directory_path is not None:
+                raise ValueError("incremental build cannot use a wheelhouse")
+            if self.vendored_cache_directory_path is not None:
+                raise ValueError("vendored cache cannot be used with a wheelhouse")
+            if self.lockfile_path is not None:
+                raise ValueError("locked build cannot use a wheelhouse")
+        if self.jobs < 1:
+            raise ValueError(f"invalid number of jobs {self.jobs}")
@@ -19,7 +19,7 @@
 
 import logging
 
-from importlib_metadata import packages_distributions, version
+from qgis_plugin_dev_tools.utils.distribution_index import get_distribution_index
 
 LOGGER = logging.getLogger(__name__)
 
@@ -27,17 +27,19 @@ LOGGER = logging.getLogger(__name__)
 def get_package_version_from_distribution(package_name: str) -> str:
     LOGGER.debug("finding version for %s from distribution metadata", package_name)
 
-    provided_by_distributions = packages_distributions().get(package_name)
-    if provided_by_distributions is not None:
+    provided_by_distributions = get_distribution_index().get_distributions_providing(
+        package_name
+    )
+    if provided_by_distributions:
         if len(provided_by_distributions) > 1:
             LOGGER.warning(
                 "found multiple distributions %s that provide %s,"
                 " using version from %s",
-                provided_by_distributions,
+                [dist.name for dist in provided_by_distributions],
                 package_name,
-                provided_by_distributions[0],
+                provided_by_distributions[0].name,
             )
 
-        return version(provided_by_distributions[0])
+        return provided_by_distributions[0].version
 
     raise ValueError("version not found from distribution metadata")
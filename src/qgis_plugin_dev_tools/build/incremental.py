@@ -0,0 +1,364 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import shutil
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from importlib_metadata import Distribution
+
+from qgis_plugin_dev_tools.build.cache import VendoredDistributionCache
+from qgis_plugin_dev_tools.build.packaging import (
+    REWRITTEN_FILE_SUFFIXES,
+    VendoredImportRewrite,
+    copy_distribution_files,
+    create_vendor_package,
+    get_bundled_distributions,
+    insert_vendor_package_import,
+    iter_files_to_bundle,
+    rewrite_vendored_imports,
+)
+from qgis_plugin_dev_tools.build.timings import BuildTimings
+from qgis_plugin_dev_tools.config import DevToolsConfig
+from qgis_plugin_dev_tools.utils.distributions import get_distribution_metadata_path
+
+LOGGER = logging.getLogger(__name__)
+
+BUILD_MANIFEST_VERSION = 1
+BUILD_MANIFEST_FILE_NAME = "manifest.json"
+BUILD_TREE_DIRECTORY_NAME = "tree"
+
+# files modified in the build tree after copying are always copied again
+ALWAYS_COPIED_PLUGIN_FILES = {"metadata.txt"}
+
+
+@dataclass
+class FileState:
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+@dataclass
+class DistributionState:
+    identity: dict[str, str | int | list[str]]
+    copied_paths: list[str]
+
+
+@dataclass
+class BuildManifest:
+    """
+    State of the persistent build tree, used to decide which files
+    need to be copied and rewritten again on the next build.
+    """
+
+    build_key: str
+    plugin_files: dict[str, FileState] = field(default_factory=dict)
+    distributions: dict[str, DistributionState] = field(default_factory=dict)
+    manifest_version: int = BUILD_MANIFEST_VERSION
+
+    @staticmethod
+    def read(manifest_file_path: Path) -> "BuildManifest | None":
+        try:
+            contents = json.loads(manifest_file_path.read_text(encoding="utf-8"))
+            if contents.get("manifest_version") != BUILD_MANIFEST_VERSION:
+                return None
+            return BuildManifest(
+                build_key=contents["build_key"],
+                plugin_files={
+                    name: FileState(**state)
+                    for name, state in contents["plugin_files"].items()
+                },
+                distributions={
+                    name: DistributionState(**state)
+                    for name, state in contents["distributions"].items()
+                },
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def write(self, manifest_file_path: Path) -> None:
+        manifest_file_path.write_text(
+            json.dumps(asdict(self), indent=2, sort_keys=True), encoding="utf-8"
+        )
+
+
+def build_plugin_directory_incrementally(  # noqa: PLR0913
+    dev_tools_config: DevToolsConfig,
+    build_directory_path: Path,
+    jobs: int = 1,
+    vendored_cache: VendoredDistributionCache | None = None,
+    timings: BuildTimings | None = None,
+    bundled_distributions: list[tuple[Distribution, set[str]]] | None = None,
+) -> Path:
+    """
+    Updates the persistent build tree in the build directory so that it matches
+    the current sources, copying and rewriting only the files that changed since
+    the previous build. Returns the path to the build tree root.
+    """
+    plugin_package_name = dev_tools_config.plugin_package_name
+    timings = timings or BuildTimings(enabled=False)
+    tree_path = build_directory_path / BUILD_TREE_DIRECTORY_NAME
+    manifest_file_path = build_directory_path / BUILD_MANIFEST_FILE_NAME
+
+    if bundled_distributions is None:
+        bundled_distributions = (
+            get_bundled_distributions(dev_tools_config)
+            if len(dev_tools_config.runtime_requires) > 0
+            else []
+        )
+    vendored_top_level_names = sorted(
+        name for _, top_level_names in bundled_distributions for name in top_level_names
+    )
+    rewrite = (
+        VendoredImportRewrite(
+            vendored_top_level_names=vendored_top_level_names,
+            container_package_name=f"{plugin_package_name}._vendor",
+        )
+        if not dev_tools_config.append_distributions_to_path
+        else None
+    )
+    build_key = json.dumps(
+        [
+            plugin_package_name,
+            dev_tools_config.append_distributions_to_path,
+            vendored_top_level_names,
+        ]
+    )
+
+    manifest = BuildManifest.read(manifest_file_path)
+    if manifest is None or manifest.build_key != build_key:
+        LOGGER.debug("build configuration changed, rebuilding %s", tree_path)
+        shutil.rmtree(tree_path, ignore_errors=True)
+        manifest = BuildManifest(build_key=build_key)
+
+    # an interrupted build leaves the tree in an unknown state,
+    # so drop the manifest until this build is finished
+    manifest_file_path.unlink(missing_ok=True)
+    tree_path.mkdir(parents=True, exist_ok=True)
+
+    plugin_build_path = tree_path / plugin_package_name
+    with timings.stage("sync plugin code") as stage:
+        changed_files = _sync_plugin_code(
+            dev_tools_config.plugin_package_path, plugin_build_path, manifest
+        )
+        stage.add_files(changed_files)
+    LOGGER.debug("copied %i changed plugin files", len(changed_files))
+
+    # a previously copied license is recreated on each build
+    if "LICENSE" not in manifest.plugin_files:
+        (plugin_build_path / "LICENSE").unlink(missing_ok=True)
+
+    if len(bundled_distributions) > 0:
+        vendor_path = create_vendor_package(dev_tools_config, tree_path)
+        if (
+            dev_tools_config.append_distributions_to_path
+            and plugin_build_path / "__init__.py" in changed_files
+        ):
+            insert_vendor_package_import(dev_tools_config, tree_path)
+
+        with timings.stage("sync runtime requirements") as stage:
+            changed_distribution_files = _sync_distributions(
+                bundled_distributions, vendor_path, manifest, vendored_cache, rewrite
+            )
+            stage.add_files(
+                file_path
+                for file_path in changed_distribution_files
+                if file_path.is_file()
+            )
+        # cached distribution files are already rewritten
+        if vendored_cache is None:
+            changed_files.extend(changed_distribution_files)
+
+        if rewrite is not None:
+            with timings.stage("rewrite imports") as stage:
+                source_files = [
+                    file_path
+                    for file_path in changed_files
+                    if file_path.suffix in REWRITTEN_FILE_SUFFIXES
+                ]
+                stage.add_files(source_files)
+                rewrite_vendored_imports(
+                    source_files,
+                    rewrite.vendored_top_level_names,
+                    container_package_name=rewrite.container_package_name,
+                    jobs=jobs,
+                )
+    else:
+        shutil.rmtree(plugin_build_path / "_vendor", ignore_errors=True)
+        manifest.distributions.clear()
+
+    manifest.write(manifest_file_path)
+
+    return tree_path
+
+
+def _sync_plugin_code(
+    source_path: Path, target_path: Path, manifest: BuildManifest
+) -> list[Path]:
+    previous_files = manifest.plugin_files
+    current_files: dict[str, FileState] = {}
+    changed_files: list[Path] = []
+
+    for source_file in iter_files_to_bundle(source_path):
+        relative_name = source_file.relative_to(source_path).as_posix()
+        target_file = target_path / relative_name
+        stat = source_file.stat()
+        reusable_state = (
+            previous_files.get(relative_name)
+            if relative_name not in ALWAYS_COPIED_PLUGIN_FILES and target_file.exists()
+            else None
+        )
+
+        if reusable_state is not None and (
+            reusable_state.mtime_ns,
+            reusable_state.size,
+        ) == (stat.st_mtime_ns, stat.st_size):
+            current_files[relative_name] = reusable_state
+            continue
+
+        file_state = FileState(
+            mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha256=_hash_file(source_file)
+        )
+        current_files[relative_name] = file_state
+        if reusable_state is not None and reusable_state.sha256 == file_state.sha256:
+            continue
+
+        LOGGER.debug("copying changed file %s to build directory", relative_name)
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source_file, target_file)
+        changed_files.append(target_file)
+
+    for removed_name in previous_files.keys() - current_files.keys():
+        LOGGER.debug("removing deleted file %s from build directory", removed_name)
+        _remove_path(target_path / removed_name, target_path)
+
+    manifest.plugin_files = current_files
+
+    return changed_files
+
+
+def _sync_distributions(
+    bundled_distributions: list[tuple[Distribution, set[str]]],
+    vendor_path: Path,
+    manifest: BuildManifest,
+    vendored_cache: VendoredDistributionCache | None,
+    rewrite: VendoredImportRewrite | None,
+) -> list[Path]:
+    changed_files: list[Path] = []
+    current_names = set()
+
+    for distribution, top_level_names in bundled_distributions:
+        current_names.add(distribution.name)
+        identity = _get_distribution_identity(distribution, top_level_names)
+        previous_state = manifest.distributions.get(distribution.name)
+
+        if (
+            previous_state is not None
+            and previous_state.identity == identity
+            and all(
+                (vendor_path / copied_path).exists()
+                for copied_path in previous_state.copied_paths
+            )
+        ):
+            LOGGER.debug("reusing bundled runtime requirement %s", distribution.name)
+            continue
+
+        if previous_state is not None:
+            for copied_path in previous_state.copied_paths:
+                _remove_path(vendor_path / copied_path, vendor_path)
+
+        LOGGER.debug(
+            "bundling runtime requirement %s with top level names %s",
+            distribution.name,
+            top_level_names,
+        )
+        copied_paths = (
+            vendored_cache.copy_distribution_files(
+                distribution, top_level_names, vendor_path, rewrite
+            )
+            if vendored_cache is not None
+            else copy_distribution_files(
+                distribution,
+                top_level_names,
+                vendor_path,
+                materialized_suffixes=(
+                    REWRITTEN_FILE_SUFFIXES if rewrite is not None else ()
+                ),
+            )
+        )
+        for copied_file_path in copied_paths:
+            changed_files.extend(
+                copied_file_path.rglob("*")
+                if copied_file_path.is_dir()
+                else [copied_file_path]
+            )
+
+        manifest.distributions[distribution.name] = DistributionState(
+            identity=identity,
+            copied_paths=[
+                copied_file_path.relative_to(vendor_path).as_posix()
+                for copied_file_path in copied_paths
+            ],
+        )
+
+    for removed_name in manifest.distributions.keys() - current_names:
+        LOGGER.debug("removing unused runtime requirement %s", removed_name)
+        for copied_path in manifest.distributions.pop(removed_name).copied_paths:
+            _remove_path(vendor_path / copied_path, vendor_path)
+
+    return changed_files
+
+
+def _get_distribution_identity(
+    distribution: Distribution, top_level_names: set[str]
+) -> dict[str, str | int | list[str]]:
+    metadata_path = get_distribution_metadata_path(distribution)
+    return {
+        "version": distribution.version,
+        "path": str(metadata_path.resolve()),
+        "mtime_ns": metadata_path.stat().st_mtime_ns,
+        "top_level_names": sorted(top_level_names),
+    }
+
+
+def _hash_file(file_path: Path) -> str:
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _remove_path(path: Path, root_path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
+
+    # clean up directories left empty, so those won't end up in the zip
+    parent_path = path.parent
+    while parent_path != root_path and parent_path.is_dir():
+        if any(parent_path.iterdir()):
+            break
+        parent_path.rmdir()
+        parent_path = parent_path.parent
@@ -0,0 +1,173 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import importlib_metadata
+from importlib_metadata import Distribution, distribution
+from packaging.utils import canonicalize_name
+
+from qgis_plugin_dev_tools.build.packaging import get_bundled_distributions
+from qgis_plugin_dev_tools.config import DevToolsConfig
+from qgis_plugin_dev_tools.utils.distributions import get_distribution_record_hash
+
+LOGGER = logging.getLogger(__name__)
+
+LOCKFILE_VERSION = 2
+LOCKFILE_NAME = "qpdt.lock"
+
+
+@dataclass
+class LockedDistribution:
+    name: str
+    version: str
+    top_level_names: list[str]
+    record_sha256: str
+    # locked distributions required by this one
+    requires: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Lockfile:
+    """
+    Resolved set of bundled runtime distributions, so that repeated builds
+    can skip resolving the recursive requirements and the top level names.
+    """
+
+    runtime_requires: list[str]
+    auto_add_recursive_runtime_dependencies: bool
+    distributions: list[LockedDistribution] = field(default_factory=list)
+    lockfile_version: int = LOCKFILE_VERSION
+
+    @staticmethod
+    def from_config(dev_tools_config: DevToolsConfig) -> "Lockfile":
+        bundled_distributions = (
+            get_bundled_distributions(dev_tools_config)
+            if len(dev_tools_config.runtime_requires) > 0
+            else []
+        )
+        locked_names = {
+            canonicalize_name(dist.name) for dist, _ in bundled_distributions
+        }
+        dependency_graph_requirements = (
+            dev_tools_config.runtime_dependency_graph.requirements
+            if dev_tools_config.auto_add_recursive_runtime_dependencies
+            else {}
+        )
+
+        return Lockfile(
+            runtime_requires=dev_tools_config.runtime_requires,
+            auto_add_recursive_runtime_dependencies=(
+                dev_tools_config.auto_add_recursive_runtime_dependencies
+            ),
+            distributions=[
+                LockedDistribution(
+                    name=dist.name,
+                    version=dist.version,
+                    top_level_names=sorted(top_level_names),
+                    record_sha256=get_distribution_record_hash(dist),
+                    requires=[
+                        name
+                        for name in dependency_graph_requirements.get(
+                            canonicalize_name(dist.name), []
+                        )
+                        if name in locked_names
+                    ],
+                )
+                for dist, top_level_names in bundled_distributions
+            ],
+        )
+
+    def get_bundled_distributions(
+        self, dev_tools_config: DevToolsConfig
+    ) -> list[tuple[Distribution, set[str]]]:
+        """
+        Returns the locked distributions like get_bundled_distributions, failing
+        if the config or the installed distributions differ from the lockfile.
+        """
+        if (
+            self.runtime_requires != dev_tools_config.runtime_requires
+            or self.auto_add_recursive_runtime_dependencies
+            != dev_tools_config.auto_add_recursive_runtime_dependencies
+        ):
+            raise ValueError(
+                "runtime requirements in pyproject.toml have changed"
+                " since the lockfile was written, run qpdt lock"
+            )
+
+        bundled_distributions = []
+        for locked_distribution in self.distributions:
+            try:
+                dist = distribution(locked_distribution.name)
+            except importlib_metadata.PackageNotFoundError:
+                raise ValueError(
+                    f"locked runtime requirement {locked_distribution.name}"
+                    " is not installed"
+                ) from None
+
+            if dist.version != locked_distribution.version:
+                raise ValueError(
+                    f"locked runtime requirement {locked_distribution.name}"
+                    f" version {locked_distribution.version} differs from"
+                    f" the installed version {dist.version}, run qpdt lock"
+                )
+            if get_distribution_record_hash(dist) != locked_distribution.record_sha256:
+                raise ValueError(
+                    f"installed files of locked runtime requirement"
+                    f" {locked_distribution.name} have changed, run qpdt lock"
+                )
+
+            bundled_distributions.append(
+                (dist, set(locked_distribution.top_level_names))
+            )
+
+        return bundled_distributions
+
+    @staticmethod
+    def read(lockfile_path: Path) -> "Lockfile":
+        try:
+            contents = json.loads(lockfile_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise ValueError(
+                f"lockfile {lockfile_path} does not exist, run qpdt lock"
+            ) from None
+
+        if contents.get("lockfile_version") != LOCKFILE_VERSION:
+            raise ValueError(
+                f"lockfile {lockfile_path} has an unsupported version, run qpdt lock"
+            )
+        return Lockfile(
+            runtime_requires=contents["runtime_requires"],
+            auto_add_recursive_runtime_dependencies=contents[
+                "auto_add_recursive_runtime_dependencies"
+            ],
+            distributions=[
+                LockedDistribution(**locked_distribution)
+                for locked_distribution in contents["distributions"]
+            ],
+        )
+
+    def write(self, lockfile_path: Path) -> None:
+        lockfile_path.write_text(
+            json.dumps(asdict(self), indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
@@ -18,6 +18,7 @@
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
 from configparser import ConfigParser
+from io import StringIO
 from pathlib import Path
 
 
@@ -29,9 +30,19 @@ class PreserveKeyCaseConfigParser(ConfigParser):
 def update_metadata_file(
     metadata_file_path: Path, version: str, changelog_contents: str
 ) -> None:
+    contents = update_metadata_contents(
+        metadata_file_path.read_text(encoding="utf-8"), version, changelog_contents
+    )
+    metadata_file_path.write_text(contents, encoding="utf-8")
+
+
+def update_metadata_contents(
+    metadata_contents: str, version: str, changelog_contents: str
+) -> str:
     parser = PreserveKeyCaseConfigParser()
-    parser.read(metadata_file_path, encoding="utf-8")
+    parser.read_string(metadata_contents)
     parser.set("general", "version", version)
     parser.set("general", "changelog", changelog_contents)
-    with open(metadata_file_path, "w", encoding="utf-8") as metadata_file:
+    with StringIO() as metadata_file:
         parser.write(metadata_file)
+        return metadata_file.getvalue()
@@ -18,21 +18,48 @@
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import os
 import shutil
 import sys
-from collections.abc import Generator
+from collections.abc import Collection, Generator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING
+from zipfile import ZipFile
 
 from importlib_metadata import Distribution
+from packaging.requirements import Requirement
 
 from qgis_plugin_dev_tools.build.rewrite_imports import (
+    VendoredImportRewriter,
     insert_as_first_import,
-    rewrite_imports_in_source_file,
 )
+from qgis_plugin_dev_tools.build.timings import BuildTimings
 from qgis_plugin_dev_tools.config import DevToolsConfig
-from qgis_plugin_dev_tools.utils.distributions import get_distribution_top_level_names
+from qgis_plugin_dev_tools.utils.distribution_index import get_distribution_index
+from qgis_plugin_dev_tools.utils.distributions import (
+    get_distribution_metadata_path,
+    get_distribution_top_level_names,
+    resolve_distribution_dependency_graph,
+)
+from qgis_plugin_dev_tools.utils.files import link_or_copy_file
+from qgis_plugin_dev_tools.utils.tracing import (
+    TraceEvent,
+    add_trace_events,
+    collect_worker_trace_events,
+    is_tracing,
+    trace_span,
+)
+from qgis_plugin_dev_tools.utils.wheels import WheelDistribution, Wheelhouse
+
+if TYPE_CHECKING:
+    from qgis_plugin_dev_tools.build.cache import VendoredDistributionCache
 
 IGNORED_FILES = shutil.ignore_patterns("__pycache__", "*.pyc", "*.pyi")
+# files in which the imports of the bundled packages are rewritten
+REWRITTEN_FILE_SUFFIXES = (".py", ".ui")
 LOGGER = logging.getLogger(__name__)
 
 VENDOR_PATH_APPEND_SCRIPT = """
@@ -43,6 +70,14 @@ sys.path.append(Path(__file__).parent.resolve().as_posix())
 """
 
 
+@dataclass
+class VendoredImportRewrite:
+    # names of all the bundled packages, the imports of each file are
+    # rewritten for all of these regardless of the distribution
+    vendored_top_level_names: list[str]
+    container_package_name: str
+
+
 def copy_plugin_code(
     dev_tools_config: DevToolsConfig, build_directory_path: Path
 ) -> None:
@@ -57,28 +92,19 @@ def copy_plugin_code(
     )
 
 
-def copy_runtime_requirements(
+def get_bundled_distributions(
     dev_tools_config: DevToolsConfig,
-    build_directory_path: Path,
-) -> None:
-    if len(dev_tools_config.runtime_distributions) == 0:
-        return
-
-    plugin_package_name = dev_tools_config.plugin_package_name
-    vendor_path = build_directory_path / plugin_package_name / "_vendor"
+) -> list[tuple[Distribution, set[str]]]:
+    with trace_span("resolve bundled top level names"):
+        return _get_bundled_distributions(dev_tools_config)
 
-    vendor_path.mkdir(parents=True)
-    vendor_init_file = vendor_path / "__init__.py"
-    vendor_init_file.touch()
-
-    if dev_tools_config.append_distributions_to_path:
-        vendor_init_file.write_text(VENDOR_PATH_APPEND_SCRIPT)
-        insert_as_first_import(
-            build_directory_path / plugin_package_name / "__init__.py",
-            f"{plugin_package_name}._vendor",
-        )
 
-    vendored_runtime_top_level_names: list[str] = []
+def _get_bundled_distributions(
+    dev_tools_config: DevToolsConfig,
+) -> list[tuple[Distribution, set[str]]]:
+    plugin_package_name = dev_tools_config.plugin_package_name
+    distribution_index = get_distribution_index()
+    bundled_distributions: list[tuple[Distribution, set[str]]] = []
 
     for vendored_distribution in (
         dev_tools_config.runtime_distributions
@@ -89,9 +115,9 @@ def copy_runtime_requirements(
         # if build is made on a different system package set than runtime)
         if (
             vendored_distribution in dev_tools_config.extra_runtime_distributions
-            and Path(
-                vendored_distribution._path,
-            ).is_relative_to(Path(sys.base_prefix))
+            and get_distribution_metadata_path(vendored_distribution).is_relative_to(
+                Path(sys.base_prefix)
+            )
         ):
             LOGGER.warning(
                 "skipping recursively found runtime requirement %s "
@@ -104,40 +130,220 @@ def copy_runtime_requirements(
         # from plugin distribution. if "-e ." installs "my-plugin-name" distribution
         # containing my_plugin & my_util_package top level packages, bundling is only
         # needed for my_util_package
-        dist_top_level_names = get_distribution_top_level_names(vendored_distribution)
+        dist_top_level_names = distribution_index.get_top_level_names(
+            vendored_distribution
+        )
         dist_top_level_names.discard(plugin_package_name)
 
-        LOGGER.debug(
-            "bundling runtime requirement %s with top level names %s",
-            vendored_distribution.name,
-            dist_top_level_names,
-        )
-        _copy_distribution_files(
-            vendored_distribution,
-            dist_top_level_names,
-            vendor_path,
+        bundled_distributions.append((vendored_distribution, dist_top_level_names))
+
+    return bundled_distributions
+
+
+def get_bundled_wheel_distributions(
+    dev_tools_config: DevToolsConfig, wheelhouse: Wheelhouse
+) -> list[tuple[Distribution, set[str]]]:
+    """
+    Returns the runtime requirements to bundle like get_bundled_distributions,
+    but resolved from the wheels in the wheelhouse instead of the environment.
+    """
+    with trace_span("resolve bundled wheels"):
+        root_distributions: list[Distribution] = [
+            wheelhouse.get_distribution(Requirement(spec).name)
+            for spec in dev_tools_config.runtime_requires
+        ]
+        wheel_distributions = (
+            root_distributions
+            + resolve_distribution_dependency_graph(
+                root_distributions, find_distribution=wheelhouse.find_distribution
+            ).get_dependencies()
+            if dev_tools_config.auto_add_recursive_runtime_dependencies
+            else root_distributions
         )
 
-        vendored_runtime_top_level_names.extend(dist_top_level_names)
+        bundled_distributions: list[tuple[Distribution, set[str]]] = []
+        for wheel_distribution in wheel_distributions:
+            # don't vendor plugin package like with the installed distributions
+            dist_top_level_names = get_distribution_top_level_names(wheel_distribution)
+            dist_top_level_names.discard(dev_tools_config.plugin_package_name)
+            bundled_distributions.append((wheel_distribution, dist_top_level_names))
+
+        return bundled_distributions
 
-    if not dev_tools_config.append_distributions_to_path:
-        for package_name in vendored_runtime_top_level_names:
-            LOGGER.debug("rewriting imports for %s", package_name)
 
-            py_files = list((build_directory_path / plugin_package_name).rglob("*.py"))
-            ui_files = list((build_directory_path / plugin_package_name).rglob("*.ui"))
+def create_vendor_package(
+    dev_tools_config: DevToolsConfig, build_directory_path: Path
+) -> Path:
+    vendor_path = (
+        build_directory_path / dev_tools_config.plugin_package_name / "_vendor"
+    )
+
+    vendor_path.mkdir(parents=True, exist_ok=True)
+    vendor_init_file = vendor_path / "__init__.py"
+    vendor_init_file.touch()
 
-            for source_file in py_files + ui_files:
-                rewrite_imports_in_source_file(
-                    source_file,
-                    rewritten_package_name=package_name,
-                    container_package_name=f"{plugin_package_name}._vendor",
+    if dev_tools_config.append_distributions_to_path:
+        vendor_init_file.write_text(VENDOR_PATH_APPEND_SCRIPT)
+
+    return vendor_path
+
+
+def insert_vendor_package_import(
+    dev_tools_config: DevToolsConfig, build_directory_path: Path
+) -> None:
+    plugin_package_name = dev_tools_config.plugin_package_name
+    insert_as_first_import(
+        build_directory_path / plugin_package_name / "__init__.py",
+        f"{plugin_package_name}._vendor",
+    )
+
+
+def copy_runtime_requirements(  # noqa: PLR0913
+    dev_tools_config: DevToolsConfig,
+    build_directory_path: Path,
+    jobs: int = 1,
+    vendored_cache: "VendoredDistributionCache | None" = None,
+    timings: BuildTimings | None = None,
+    bundled_distributions: list[tuple[Distribution, set[str]]] | None = None,
+) -> None:
+    if len(dev_tools_config.runtime_requires) == 0:
+        return
+
+    timings = timings or BuildTimings(enabled=False)
+
+    plugin_package_name = dev_tools_config.plugin_package_name
+    vendor_path = create_vendor_package(dev_tools_config, build_directory_path)
+
+    if dev_tools_config.append_distributions_to_path:
+        insert_vendor_package_import(dev_tools_config, build_directory_path)
+
+    if bundled_distributions is None:
+        bundled_distributions = get_bundled_distributions(dev_tools_config)
+    vendored_runtime_top_level_names = [
+        name for _, top_level_names in bundled_distributions for name in top_level_names
+    ]
+    rewrite = (
+        VendoredImportRewrite(
+            vendored_top_level_names=vendored_runtime_top_level_names,
+            container_package_name=f"{plugin_package_name}._vendor",
+        )
+        if not dev_tools_config.append_distributions_to_path
+        else None
+    )
+
+    with timings.stage("copy runtime requirements") as stage:
+        for vendored_distribution, dist_top_level_names in bundled_distributions:
+            LOGGER.debug(
+                "bundling runtime requirement %s with top level names %s",
+                vendored_distribution.name,
+                dist_top_level_names,
+            )
+            if vendored_cache is not None:
+                copied_paths = vendored_cache.copy_distribution_files(
+                    vendored_distribution, dist_top_level_names, vendor_path, rewrite
+                )
+            else:
+                copied_paths = copy_distribution_files(
+                    vendored_distribution,
+                    dist_top_level_names,
+                    vendor_path,
+                    materialized_suffixes=(
+                        REWRITTEN_FILE_SUFFIXES if rewrite is not None else ()
+                    ),
+                )
+            for copied_path in copied_paths:
+                stage.add_files(iter_files_to_bundle(copied_path))
+
+    if rewrite is not None:
+        with timings.stage("rewrite imports") as stage:
+            source_files = [
+                file_path
+                for file_path in (build_directory_path / plugin_package_name).rglob("*")
+                if file_path.suffix in REWRITTEN_FILE_SUFFIXES
+                # cached distribution files are already rewritten
+                and (
+                    vendored_cache is None or not file_path.is_relative_to(vendor_path)
                 )
+            ]
+            stage.add_files(source_files)
+            rewrite_vendored_imports(
+                source_files,
+                rewrite.vendored_top_level_names,
+                container_package_name=rewrite.container_package_name,
+                jobs=jobs,
+            )
+
+
+def rewrite_vendored_imports(
+    source_files: list[Path],
+    vendored_top_level_names: list[str],
+    container_package_name: str,
+    jobs: int = 1,
+) -> None:
+    if not vendored_top_level_names:
+        return
+    LOGGER.debug("rewriting imports for %s", vendored_top_level_names)
+
+    rewriter = VendoredImportRewriter(
+        rewritten_package_names=vendored_top_level_names,
+        container_package_name=container_package_name,
+    )
+
+    if jobs <= 1 or len(source_files) <= 1:
+        rewritten_count = sum(
+            _rewrite_source_file(rewriter, source_file) for source_file in source_files
+        )
+    else:
+        LOGGER.debug(
+            "rewriting imports in %i files with %i processes", len(source_files), jobs
+        )
+        # files are independent of each other, so those can be rewritten in any
+        # order, use large enough chunks to keep the pickling overhead small
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            rewritten_count = 0
+            for rewritten, trace_events in executor.map(
+                partial(_rewrite_source_file_in_worker, rewriter, is_tracing()),
+                source_files,
+                chunksize=max(1, len(source_files) // (jobs * 4)),
+            ):
+                rewritten_count += rewritten
+                add_trace_events(trace_events)
+
+    LOGGER.debug(
+        "rewrote %i files, skipped %i files not mentioning vendored packages",
+        rewritten_count,
+        len(source_files) - rewritten_count,
+    )
+
+
+def _rewrite_source_file(rewriter: VendoredImportRewriter, source_file: Path) -> bool:
+    with trace_span("rewrite file", file=source_file):
+        return rewriter.rewrite_source_file(source_file)
+
+
+def _rewrite_source_file_in_worker(
+    rewriter: VendoredImportRewriter, tracing: bool, source_file: Path
+) -> tuple[bool, list[TraceEvent]]:
+    with collect_worker_trace_events(tracing) as trace_events:
+        rewritten = _rewrite_source_file(rewriter, source_file)
+    return rewritten, trace_events
 
 
 def copy_license(dev_tools_config: DevToolsConfig, build_directory_path: Path) -> None:
     plugin_build_path = build_directory_path / dev_tools_config.plugin_package_name
     target_license_file = plugin_build_path / "LICENSE"
+
+    license_file = get_license_file_to_bundle(
+        dev_tools_config, target_license_file.exists()
+    )
+    if license_file is not None:
+        LOGGER.debug(f"Copying license file {license_file} to {build_directory_path}")
+        shutil.copy(license_file, target_license_file)
+
+
+def get_license_file_to_bundle(
+    dev_tools_config: DevToolsConfig, plugin_license_exists: bool
+) -> Path | None:
     license_file = dev_tools_config.license_file_path
     if license_file is not None:
         if not license_file.exists():
@@ -146,20 +352,18 @@ def copy_license(dev_tools_config: DevToolsConfig, build_directory_path: Path) -
                 f"{license_file} "
                 f"does not exist. Check the configuration."
             )
-            return
+            return None
 
-        if target_license_file.exists():
+        if plugin_license_exists:
             LOGGER.warning(
-                f"Overwriting existing license {target_license_file} "
+                f"Overwriting existing license in plugin package "
                 f"with configured license {license_file}"
             )
-        LOGGER.debug(f"Copying license file {license_file} to {build_directory_path}")
-        shutil.copy(license_file, target_license_file)
-        return
+        return license_file
 
-    if target_license_file.exists():
-        LOGGER.debug(f"Existing license file {target_license_file} found.")
-        return
+    if plugin_license_exists:
+        LOGGER.debug("Existing license file found in plugin package.")
+        return None
 
     # Try finding the license
     license_file = _find_existing_license_file(dev_tools_config.pyproject_path)
@@ -168,69 +372,132 @@ def copy_license(dev_tools_config: DevToolsConfig, build_directory_path: Path) -
             "Cannot copy LICENSE file since it does not exist. "
             "Configure valid LICENSE file with license_file_path in pyproject.toml"
         )
-        return
+        return None
 
-    LOGGER.debug(f"Copying license file {license_file} to {build_directory_path}")
-    shutil.copy(license_file, target_license_file)
+    return license_file
 
 
-def _copy_distribution_files(
+def copy_distribution_files(
     distribution: Distribution,
     top_level_names: set[str],
     target_root_path: Path,
-) -> None:
+    materialized_suffixes: Collection[str] = (),
+) -> list[Path]:
+    """
+    Copies the files listed in the distribution record for the top level names,
+    linking the files when possible. Files with the materialized suffixes are
+    always independent copies, so that those can be modified in place. Files
+    of wheel distributions are extracted from the wheel file.
+    Returns the copied top level paths.
+    """
+    copied_paths: dict[Path, None] = {}
+
+    LOGGER.debug("copying %s files to build directory", distribution.name)
+
+    if isinstance(distribution, WheelDistribution):
+        with (
+            trace_span("extract wheel", distribution=distribution.name),
+            ZipFile(distribution.wheel_path) as wheel_file,
+        ):
+            for relative_path in get_distribution_files_to_bundle(
+                distribution, top_level_names
+            ):
+                new_path = target_root_path / relative_path
+                new_path.parent.mkdir(parents=True, exist_ok=True)
+                with (
+                    wheel_file.open(relative_path.as_posix()) as member_file,
+                    open(new_path, "wb") as new_file,
+                ):
+                    shutil.copyfileobj(member_file, new_file)
+                copied_paths[target_root_path / relative_path.parts[0]] = None
+        return list(copied_paths)
+
+    record_root_path = get_distribution_metadata_path(distribution).parent
+
+    with trace_span("copy distribution", distribution=distribution.name):
+        for relative_path in get_distribution_files_to_bundle(
+            distribution, top_level_names
+        ):
+            new_path = target_root_path / relative_path
+            new_path.parent.mkdir(parents=True, exist_ok=True)
+            link_or_copy_file(
+                record_root_path / relative_path,
+                new_path,
+                allow_hard_link=new_path.suffix not in materialized_suffixes,
+            )
+            copied_paths[target_root_path / relative_path.parts[0]] = None
+
+    return list(copied_paths)
+
+
+def get_distribution_files_to_bundle(
+    distribution: Distribution,
+    top_level_names: set[str],
+) -> list[Path]:
+    """
+    Returns the files listed in the distribution record, which need to be bundled
+    for the top level names, relative to the record root. Metadata directory files
+    are always the first ones, and the rest of the files are in a stable order.
+    """
     if (file_paths := distribution.files) is None:
         LOGGER.warning("could not resolve %s contents to bundle", distribution.name)
-        return
+        return []
+
+    if isinstance(distribution, WheelDistribution):
+        metadata_directory_name = distribution.metadata_directory_name
+        record_root_path = distribution.wheel_path
+    else:
+        metadata_path = get_distribution_metadata_path(distribution)
+        metadata_directory_name = metadata_path.name
+        record_root_path = metadata_path.parent
+
+    metadata_files: list[Path] = []
+    package_files: list[Path] = []
+    for file_path in file_paths:
+        relative_path = Path(file_path)
+        top_name = relative_path.parts[0]
+        if top_name == metadata_directory_name:
+            bundled_files = metadata_files
+        elif (len(relative_path.parts) > 1 and top_name in top_level_names) or (
+            len(relative_path.parts) == 1 and relative_path.stem in top_level_names
+        ):
+            bundled_files = package_files
+        else:
+            continue
 
-    # bundle metadata directory first
-    distribution_metadata_path = Path(distribution._path)
-    LOGGER.debug(
-        "copying %s to build directory",
-        distribution_metadata_path.resolve(),
-    )
-    shutil.copytree(
-        src=distribution_metadata_path,
-        dst=target_root_path / distribution_metadata_path.name,
-        ignore=IGNORED_FILES,
-    )
+        # leave out the same files as when copying the trees
+        if IGNORED_FILES(record_root_path.as_posix(), list(relative_path.parts)):
+            continue
+        if (
+            relative_path.as_posix() not in distribution.member_names
+            if isinstance(distribution, WheelDistribution)
+            else not (record_root_path / relative_path).is_file()
+        ):
+            LOGGER.debug("skipping missing file %s", relative_path)
+            continue
 
-    directories_to_bundle = {
-        top_directory_name
-        for file_path in file_paths
-        if len(file_path.parts) > 1
-        and (top_directory_name := file_path.parts[0]) in top_level_names
-    }
-    files_to_bundle = {
-        file_path
-        for file_path in file_paths
-        if len(file_path.parts) == 1 and file_path.stem in top_level_names
-    }
-
-    record_root_path = distribution_metadata_path.parent
-
-    for directory_path in directories_to_bundle:
-        original_path = record_root_path / directory_path
-        new_path = target_root_path / directory_path
-
-        LOGGER.debug("copying %s to build directory", original_path.resolve())
-
-        shutil.copytree(
-            src=original_path,
-            dst=new_path,
-            ignore=IGNORED_FILES,
-        )
+        bundled_files.append(relative_path)
+
+    return sorted(metadata_files) + sorted(package_files)
 
-    for file_path in files_to_bundle:
-        original_path = record_root_path / file_path
-        new_path = target_root_path / file_path
 
-        LOGGER.debug("copying %s to build directory", original_path.resolve())
+def iter_files_to_bundle(path: Path) -> Generator[Path, None, None]:
+    """
+    Yields the files in the path recursively in a stable order,
+    leaving out the same files as when copying the trees.
+    """
+    if not path.is_dir():
+        yield path
+        return
 
-        shutil.copy(
-            src=original_path,
-            dst=new_path,
+    for directory, directory_names, file_names in os.walk(path):
+        ignored_names = IGNORED_FILES(directory, [*directory_names, *file_names])
+        directory_names[:] = sorted(
+            name for name in directory_names if name not in ignored_names
         )
+        for file_name in sorted(file_names):
+            if file_name not in ignored_names:
+                yield Path(directory) / file_name
 
 
 def _find_existing_license_file(search_path: Path) -> Path | None:
@@ -17,125 +17,381 @@
 #  You should have received a copy of the GNU General Public License
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
-import ast
+import io
+import logging
+import mmap
+import os
 import re
+import tokenize
+from collections.abc import Collection, Generator
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
 from xml.etree import ElementTree as ET
 
+from qgis_plugin_dev_tools.utils.files import write_text_replacing_links
+
+LOGGER = logging.getLogger(__name__)
+
+# increase when the rewritten output changes, to invalidate cached rewrites
+REWRITER_VERSION = 2
+
+
+# tokens after which a new statement starts
+STATEMENT_SEPARATOR_TOKEN_TYPES = {
+    tokenize.NEWLINE,
+    tokenize.INDENT,
+    tokenize.DEDENT,
+    tokenize.ENDMARKER,
+}
+# tokens not affecting the statement structure
+NON_CODE_TOKEN_TYPES = {tokenize.NL, tokenize.COMMENT}
+
 
 @dataclass
-class SpecialImportRewriter(ast.NodeTransformer):
+class _TokenEdit:
+    start: tuple[int, int]
+    end: tuple[int, int]
+    replacement: str
+
+
+@dataclass
+class SpecialImportRewriter:
     """
-    Transformer class to rewrite simple "import module.x.y" style imports
-    to vendored format, for example "import something._vendor.module.x.y".
+    Rewrites simple "import module.x.y" style imports to vendored format, for
+    example "import something._vendor.module.x.y", and the references to the
+    imported module. Only the matching tokens are edited, so comments and
+    formatting of the source are kept as is.
     """
 
-    from_module: str
-    to_module: str
+    rewritten_package_names: Collection[str]
+    container_package_name: str
+
+    _replaced_imported_names: dict[tuple[str, ...], str] = field(
+        default_factory=dict, init=False
+    )
+
+    def rewrite(self, contents: str) -> str:
+        tokens = [
+            token
+            for token in tokenize.generate_tokens(io.StringIO(contents).readline)
+            if token.type not in NON_CODE_TOKEN_TYPES
+        ]
 
-    _replaced_imported_names: dict[str, str] = field(default_factory=dict, init=False)
+        edits: list[_TokenEdit] = []
+        import_statement_token_indices: set[int] = set()
+
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            # "from" is also used in "yield from" and "raise ... from"
+            if token.type == tokenize.NAME and (
+                token.string == "import"
+                or (token.string == "from" and _is_statement_start(tokens, index))
+            ):
+                end_index = _find_statement_end(tokens, index)
+                import_statement_token_indices.update(range(index, end_index))
+                if token.string == "import":
+                    edits.extend(self._rewrite_import(tokens[index + 1 : end_index]))
+                index = end_index
+                continue
+
+            if (edit := self._rewrite_sys_modules_key(tokens, index)) is not None:
+                edits.append(edit)
+            index += 1
+
+        if self._replaced_imported_names:
+            edits.extend(
+                self._rewrite_references(tokens, import_statement_token_indices)
+            )
+
+        return _apply_edits(contents, edits)
+
+    def _get_rewritten_name(self, module_name: str) -> str | None:
+        for package_name in self.rewritten_package_names:
+            if module_name.startswith(f"{package_name}."):
+                return f"{self.container_package_name}.{module_name}"
+        return None
 
     # collect the found imported names to replace the references also
-    def visit_Import(self, node: ast.Import) -> Any:
-        for alias in node.names:
-            if alias.name.startswith(f"{self.from_module}.") and alias.asname is None:
-                old_module_name = alias.name
-                new_identifier_name = "vendored_" + alias.name.replace(".", "_")
-                self._replaced_imported_names[old_module_name] = new_identifier_name
-                child_module_names = old_module_name.replace(
-                    f"{self.from_module}.", "", 1
-                )
-                alias.name = f"{self.to_module}.{child_module_names}"
-                alias.asname = new_identifier_name
-        return node
+    def _rewrite_import(
+        self, alias_tokens: list[tokenize.TokenInfo]
+    ) -> list[_TokenEdit]:
+        edits: list[_TokenEdit] = []
 
-    # check the attributes for an imported module name reference
-    def visit_Attribute(self, node: ast.Attribute) -> Any:
-        attribute_name = ast.unparse(node)
-        if attribute_name in self._replaced_imported_names:
-            replaced_name = self._replaced_imported_names[attribute_name]
-            return ast.Name(id=replaced_name, ctx=ast.Load())
+        index = 0
+        while index < len(alias_tokens):
+            start_token = alias_tokens[index]
+            name_parts = [start_token.string]
+            while (
+                index + 2 < len(alias_tokens)
+                and alias_tokens[index + 1].string == "."
+                and alias_tokens[index + 2].type == tokenize.NAME
+            ):
+                name_parts.append(alias_tokens[index + 2].string)
+                index += 2
+            end_token = alias_tokens[index]
+            index += 1
+
+            has_alias = index < len(alias_tokens) and alias_tokens[index].string == "as"
+            if has_alias:
+                index += 2
+
+            # skip the comma between aliases
+            index += 1
+
+            module_name = ".".join(name_parts)
+            if (rewritten_name := self._get_rewritten_name(module_name)) is None:
+                continue
 
-        return self.generic_visit(node)
+            if not has_alias:
+                new_identifier_name = "vendored_" + "_".join(name_parts)
+                self._replaced_imported_names[tuple(name_parts)] = new_identifier_name
+                rewritten_name = f"{rewritten_name} as {new_identifier_name}"
+
+            edits.append(_TokenEdit(start_token.start, end_token.end, rewritten_name))
+
+        return edits
 
     # this will only handle sys.modules['something'] replace
-    def visit_Subscript(self, node: ast.Subscript) -> Any:
-        if (
-            ast.unparse(node.value) == "sys.modules"
-            and isinstance(node.slice, ast.Constant)
-            and isinstance(node.slice.value, str)
-            and node.slice.value.startswith(f"{self.from_module}.")
+    def _rewrite_sys_modules_key(
+        self, tokens: list[tokenize.TokenInfo], index: int
+    ) -> _TokenEdit | None:
+        if not (
+            tokens[index].type == tokenize.STRING
+            and index >= 4  # noqa: PLR2004
+            and [token.string for token in tokens[index - 4 : index]]
+            == ["sys", ".", "modules", "["]
+            and (index == 4 or tokens[index - 5].string != ".")  # noqa: PLR2004
+            and tokens[index + 1].string == "]"
         ):
-            child_module_names = node.slice.value.replace(f"{self.from_module}.", "", 1)
-            node.slice.value = f"{self.to_module}.{child_module_names}"
-            return node
+            return None
 
-        return self.generic_visit(node)
+        match = re.fullmatch(
+            r"(?P<prefix>[rRuU]?)(?P<quote>[\'\"])(?P<value>[^\'\"\\]*)(?P=quote)",
+            tokens[index].string,
+        )
+        if match is None:
+            return None
 
+        if (rewritten_name := self._get_rewritten_name(match["value"])) is None:
+            return None
 
-def rewrite_imports_in_source_file(
-    source_file: Path, rewritten_package_name: str, container_package_name: str
-) -> None:
-    contents = source_file.read_text(encoding="utf-8")
-
-    # special case where a submodule of the vendored package is imported
-    # or the name is defined in a sys.modules key as a constant
-    specials = [
-        f"import {rewritten_package_name}.",
-        f"sys.modules['{rewritten_package_name}.",
-        f'sys.modules["{rewritten_package_name}.',
-    ]
-    if any(special in contents for special in specials):
-        # hold on to the original for license comments
-        # since comments are lost with ast parse+unparse
-        orig_file = source_file.with_name(source_file.name + "_original")
-        orig_file.write_text(contents, encoding="utf-8")
-        original_note = f"# parsed with ast, see original {orig_file.name}\n\n"
-
-        tree = ast.parse(contents)
-        new_tree = ast.fix_missing_locations(
-            SpecialImportRewriter(
-                from_module=rewritten_package_name,
-                to_module=f"{container_package_name}.{rewritten_package_name}",
-            ).visit(tree)
+        return _TokenEdit(
+            tokens[index].start,
+            tokens[index].end,
+            f"{match['prefix']}{match['quote']}{rewritten_name}{match['quote']}",
         )
-        contents = original_note + ast.unparse(new_tree)
 
-    # trivial cases with valid identifiers
-    contents = contents.replace(
-        f"from {rewritten_package_name} import",
-        f"from {container_package_name}.{rewritten_package_name} import",
-    )
-    contents = contents.replace(
-        f"from {rewritten_package_name}.",
-        f"from {container_package_name}.{rewritten_package_name}.",
-    )
+    # check the attributes for an imported module name reference
+    def _rewrite_references(
+        self,
+        tokens: list[tokenize.TokenInfo],
+        ignored_token_indices: set[int],
+    ) -> list[_TokenEdit]:
+        edits: list[_TokenEdit] = []
+        # longest names first, to replace "a.b.c" instead of "a.b" in it
+        replaced_names = sorted(
+            self._replaced_imported_names.items(),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+
+        index = 0
+        while index < len(tokens):
+            if (
+                tokens[index].type != tokenize.NAME
+                or index in ignored_token_indices
+                or (index > 0 and tokens[index - 1].string == ".")
+            ):
+                index += 1
+                continue
 
-    # package name with a trailing dot is handled in special case above,
-    # this case only needs to handle imports, not from-imports, since
-    # otherwise plain replace will match "import package" also in a format
-    # "from x import package"
+            for name_parts, replaced_name in replaced_names:
+                end_index = index + 2 * len(name_parts) - 1
+                if end_index <= len(tokens) and [
+                    token.string for token in tokens[index:end_index]
+                ] == list(_join_with_dots(name_parts)):
+                    edits.append(
+                        _TokenEdit(
+                            tokens[index].start,
+                            tokens[end_index - 1].end,
+                            replaced_name,
+                        )
+                    )
+                    index = end_index
+                    break
+            else:
+                index += 1
 
-    contents = re.sub(
-        r"(^|;)([\s\t]*)" + f"import {rewritten_package_name} as",
-        f"\\1\\2import {container_package_name}.{rewritten_package_name} as",
-        contents,
-    )
+        return edits
 
-    contents = re.sub(
-        r"(^|;)([\s\t]*)" + f"import {rewritten_package_name}" + r"([\s;])",
-        (
-            f"\\1\\2import {container_package_name}.{rewritten_package_name} "
-            f"as {rewritten_package_name}\\3"
-        ),
-        contents,
-        flags=re.M,
+
+def _is_statement_start(tokens: list[tokenize.TokenInfo], index: int) -> bool:
+    return (
+        index == 0
+        or tokens[index - 1].type in STATEMENT_SEPARATOR_TOKEN_TYPES
+        or tokens[index - 1].string in (";", ":")
     )
 
+
+def _find_statement_end(tokens: list[tokenize.TokenInfo], start_index: int) -> int:
+    for index in range(start_index, len(tokens)):
+        if tokens[index].type in STATEMENT_SEPARATOR_TOKEN_TYPES or (
+            tokens[index].string == ";"
+        ):
+            return index
+    return len(tokens)
+
+
+def _join_with_dots(name_parts: tuple[str, ...]) -> Generator[str, None, None]:
+    for part_index, part in enumerate(name_parts):
+        if part_index > 0:
+            yield "."
+        yield part
+
+
+def _apply_edits(contents: str, edits: list[_TokenEdit]) -> str:
+    # token positions are given as rows & columns of the lines read by tokenize
+    line_offsets = [0]
+    for line in io.StringIO(contents):
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    def to_offset(position: tuple[int, int]) -> int:
+        row, column = position
+        return line_offsets[row - 1] + column
+
+    for edit in sorted(edits, key=lambda edit: edit.start, reverse=True):
+        contents = (
+            contents[: to_offset(edit.start)]
+            + edit.replacement
+            + contents[to_offset(edit.end) :]
+        )
+    return contents
+
+
+@dataclass
+class VendoredImportRewriter:
+    """
+    Rewrites the imports of all the vendored packages at once, so that each
+    source file needs to be read, rewritten and written only once.
+    """
+
+    rewritten_package_names: Collection[str]
+    container_package_name: str
+
+    _candidate_pattern: re.Pattern[bytes] = field(init=False)
+    _special_pattern: re.Pattern[str] = field(init=False)
+    _from_import_pattern: re.Pattern[str] = field(init=False)
+    _from_submodule_import_pattern: re.Pattern[str] = field(init=False)
+    _import_as_pattern: re.Pattern[str] = field(init=False)
+    _import_pattern: re.Pattern[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        # longest names first, so that a name sharing a prefix with another
+        # name is not matched partially by the alternation
+        names = "|".join(
+            re.escape(name)
+            for name in sorted(self.rewritten_package_names, key=len, reverse=True)
+        )
+        if not names:
+            # an empty alternation would match everywhere, nothing is vendored
+            # without names, so use a pattern that never matches instead
+            names = "(?!)"
+
+        # any file that could need rewriting mentions at least one of the names,
+        # most vendored files only import the own package with relative imports
+        self._candidate_pattern = re.compile(rf"\b(?:{names})\b".encode())
+
+        # special case where a submodule of the vendored package is imported
+        # or the name is defined in a sys.modules key as a constant
+        self._special_pattern = re.compile(
+            rf"import (?:{names})\.|sys\.modules\[['\"](?:{names})\."
+        )
+
+        # trivial cases with valid identifiers
+        self._from_import_pattern = re.compile(rf"from ({names}) import")
+        self._from_submodule_import_pattern = re.compile(rf"from ({names})\.")
+
+        # package name with a trailing dot is handled in special case above,
+        # this case only needs to handle imports, not from-imports, since
+        # otherwise plain replace will match "import package" also in a format
+        # "from x import package"
+        self._import_as_pattern = re.compile(
+            rf"(^|;)([\s\t]*)import ({names}) as", flags=re.M
+        )
+        self._import_pattern = re.compile(
+            rf"(^|;)([\s\t]*)import ({names})([\s;])", flags=re.M
+        )
+
+    def rewrite_source_file(self, source_file: Path) -> bool:
+        """
+        Rewrites the file in place, if it mentions any of the vendored
+        package names. Returns whether the file was rewritten.
+        """
+        if not self.may_contain_vendored_imports(source_file):
+            return False
+
+        contents = self.rewrite_source(
+            source_file.name, source_file.read_text(encoding="utf-8")
+        )
+        # the file may be linked from the shared vendored distribution cache
+        write_text_replacing_links(source_file, contents)
+        return True
+
+    def may_contain_vendored_imports(self, source_file: Path) -> bool:
+        # scan the raw bytes without reading & decoding the whole file
+        with open(source_file, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+                return self._candidate_pattern.search(contents) is not None
+
+    def rewrite_source(self, file_name: str, contents: str) -> str:
+        if self._candidate_pattern.search(contents.encode("utf-8")) is None:
+            return contents
+
+        is_ui_file = file_name.endswith(".ui")
+
+        if not is_ui_file and self._special_pattern.search(contents):
+            try:
+                contents = SpecialImportRewriter(
+                    rewritten_package_names=self.rewritten_package_names,
+                    container_package_name=self.container_package_name,
+                ).rewrite(contents)
+            except (tokenize.TokenError, SyntaxError) as e:
+                LOGGER.warning(
+                    "could not rewrite submodule imports in %s: %s", file_name, e
+                )
+
+        return self.rewrite_contents(contents, is_ui_file=is_ui_file)
+
+    def rewrite_contents(self, contents: str, is_ui_file: bool) -> str:
+        container = self.container_package_name
+
+        contents = self._from_import_pattern.sub(
+            rf"from {container}.\1 import", contents
+        )
+        contents = self._from_submodule_import_pattern.sub(
+            rf"from {container}.\1.", contents
+        )
+        contents = self._import_as_pattern.sub(
+            rf"\1\2import {container}.\3 as", contents
+        )
+        contents = self._import_pattern.sub(
+            rf"\1\2import {container}.\3 as \3\4", contents
+        )
+
+        if is_ui_file:
+            return self._rewrite_ui_custom_widget_headers(contents)
+
+        # add a note to .py files describing changes made to files
+        change_note = "# original source code changed by rewriting import statements\n"
+        if change_note not in contents:
+            contents = change_note + contents
+        return contents
+
     # special case for custom widgets in .ui files
-    if source_file.suffix == ".ui":
+    def _rewrite_ui_custom_widget_headers(self, contents: str) -> str:
         ui_tree = ET.fromstring(contents)  # noqa: SC200
         for widget_section in ui_tree.iter("customwidget"):
             header_section = widget_section.find("header")
@@ -143,22 +399,27 @@ def rewrite_imports_in_source_file(
             if header_section is None or header_section.text is None:
                 continue
 
-            if (
-                header_section.text == rewritten_package_name
-                or header_section.text.startswith(rewritten_package_name + ".")
+            if any(
+                header_section.text == package_name
+                or header_section.text.startswith(package_name + ".")
+                for package_name in self.rewritten_package_names
             ):
-                header_section.text = f"{container_package_name}.{header_section.text}"
+                header_section.text = (
+                    f"{self.container_package_name}.{header_section.text}"
+                )
 
-        contents = ET.tostring(  # noqa: SC200
+        return ET.tostring(  # noqa: SC200
             ui_tree, encoding="UTF-8", method="xml", xml_declaration=True
         ).decode("utf-8")
-    else:
-        # add a note to .py files describing changes made to files
-        change_note = "# original source code changed by rewriting import statements\n"
-        if change_note not in contents:
-            contents = change_note + contents
 
-    source_file.write_text(contents, encoding="utf-8")
+
+def rewrite_imports_in_source_file(
+    source_file: Path, rewritten_package_name: str, container_package_name: str
+) -> None:
+    VendoredImportRewriter(
+        rewritten_package_names=[rewritten_package_name],
+        container_package_name=container_package_name,
+    ).rewrite_source_file(source_file)
 
 
 def insert_as_first_import(plugin_init_file: Path, import_string: str) -> None:
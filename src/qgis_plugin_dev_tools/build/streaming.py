@@ -0,0 +1,234 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+from pathlib import Path, PurePosixPath
+from zipfile import ZipFile
+
+from importlib_metadata import Distribution
+
+from qgis_plugin_dev_tools.build.archive import PluginArchive, ZipCompression
+from qgis_plugin_dev_tools.build.metadata import update_metadata_contents
+from qgis_plugin_dev_tools.build.packaging import (
+    VENDOR_PATH_APPEND_SCRIPT,
+    get_bundled_distributions,
+    get_distribution_files_to_bundle,
+    get_license_file_to_bundle,
+    iter_files_to_bundle,
+)
+from qgis_plugin_dev_tools.build.rewrite_imports import VendoredImportRewriter
+from qgis_plugin_dev_tools.build.tree_shaking import tree_shake_plugin_archive
+from qgis_plugin_dev_tools.config import DevToolsConfig
+from qgis_plugin_dev_tools.utils.distributions import get_distribution_metadata_path
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+from qgis_plugin_dev_tools.utils.wheels import WheelDistribution
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _PluginZipWriter:
+    """
+    Adds the members to the plugin archive, rewriting the imports
+    of the source files in memory.
+    """
+
+    def __init__(
+        self, archive: PluginArchive, rewriter: VendoredImportRewriter | None
+    ) -> None:
+        self._archive = archive
+        self._rewriter = rewriter
+
+    def write_file(self, source_file: Path, member_name: PurePosixPath) -> None:
+        if (
+            self._rewriter is not None
+            and source_file.suffix in (".py", ".ui")
+            and self._rewriter.may_contain_vendored_imports(source_file)
+        ):
+            self.write_source(member_name, source_file.read_text(encoding="utf-8"))
+            return
+
+        self._archive.add_file(member_name, source_file)
+
+    def write_bytes(self, member_name: PurePosixPath, contents: bytes) -> None:
+        if self._rewriter is not None and member_name.suffix in (".py", ".ui"):
+            self.write_source(member_name, contents.decode("utf-8"))
+            return
+
+        self._archive.add_contents(member_name, contents)
+
+    def write_source(self, member_name: PurePosixPath, contents: str) -> None:
+        if self._rewriter is None:
+            self.write_contents(member_name, contents)
+            return
+
+        with trace_span("rewrite file", file=member_name):
+            contents = self._rewriter.rewrite_source(member_name.name, contents)
+        self.write_contents(member_name, contents)
+
+    def write_contents(self, member_name: PurePosixPath, contents: str) -> None:
+        self._archive.add_contents(member_name, contents.encode("utf-8"))
+
+
+def write_plugin_zip_from_sources(  # noqa: PLR0913
+    dev_tools_config: DevToolsConfig,
+    zip_file_path: Path,
+    version: str,
+    changelog_contents: str,
+    timestamp: int,
+    compression: ZipCompression = ZipCompression.DEFAULT,
+    bundled_distributions: list[tuple[Distribution, set[str]]] | None = None,
+) -> bool:
+    """
+    Writes the plugin zip file straight from the source files, rewriting the
+    imports and updating the metadata in memory without a build directory.
+    Returns False if an identical zip file already existed and was kept.
+    """
+    plugin_package_name = dev_tools_config.plugin_package_name
+    plugin_member_path = PurePosixPath(plugin_package_name)
+    vendor_member_path = plugin_member_path / "_vendor"
+
+    has_runtime_requirements = len(dev_tools_config.runtime_requires) > 0
+    if bundled_distributions is None:
+        bundled_distributions = (
+            get_bundled_distributions(dev_tools_config)
+            if has_runtime_requirements
+            else []
+        )
+
+    rewriter = None
+    rewritten_package_names = [
+        name for _, top_level_names in bundled_distributions for name in top_level_names
+    ]
+    if rewritten_package_names and not dev_tools_config.append_distributions_to_path:
+        rewriter = VendoredImportRewriter(
+            rewritten_package_names=rewritten_package_names,
+            container_package_name=f"{plugin_package_name}._vendor",
+        )
+
+    archive = PluginArchive(timestamp, compression)
+    writer = _PluginZipWriter(archive, rewriter)
+    plugin_license_exists = _write_plugin_code(
+        writer,
+        dev_tools_config,
+        version,
+        changelog_contents,
+        insert_vendor_import=(
+            has_runtime_requirements and dev_tools_config.append_distributions_to_path
+        ),
+    )
+
+    if has_runtime_requirements:
+        writer.write_source(
+            vendor_member_path / "__init__.py",
+            VENDOR_PATH_APPEND_SCRIPT
+            if dev_tools_config.append_distributions_to_path
+            else "",
+        )
+
+    for distribution, top_level_names in bundled_distributions:
+        LOGGER.debug(
+            "bundling runtime requirement %s with top level names %s",
+            distribution.name,
+            top_level_names,
+        )
+        if isinstance(distribution, WheelDistribution):
+            _write_wheel_distribution(
+                writer, distribution, top_level_names, vendor_member_path
+            )
+            continue
+
+        record_root_path = get_distribution_metadata_path(distribution).parent
+        with trace_span("write distribution", distribution=distribution.name):
+            for bundled_file in get_distribution_files_to_bundle(
+                distribution, top_level_names
+            ):
+                writer.write_file(
+                    record_root_path / bundled_file,
+                    vendor_member_path / bundled_file.as_posix(),
+                )
+
+    license_file = get_license_file_to_bundle(dev_tools_config, plugin_license_exists)
+    if license_file is not None:
+        writer.write_file(license_file, plugin_member_path / "LICENSE")
+
+    tree_shake_plugin_archive(dev_tools_config, archive)
+
+    return archive.write(zip_file_path)
+
+
+def _write_wheel_distribution(
+    writer: _PluginZipWriter,
+    distribution: WheelDistribution,
+    top_level_names: set[str],
+    vendor_member_path: PurePosixPath,
+) -> None:
+    # members are copied from the wheel to the plugin zip without extracting
+    with (
+        trace_span("write wheel", distribution=distribution.name),
+        ZipFile(distribution.wheel_path) as wheel_file,
+    ):
+        for bundled_file in get_distribution_files_to_bundle(
+            distribution, top_level_names
+        ):
+            writer.write_bytes(
+                vendor_member_path / bundled_file.as_posix(),
+                wheel_file.read(bundled_file.as_posix()),
+            )
+
+
+def _write_plugin_code(
+    writer: _PluginZipWriter,
+    dev_tools_config: DevToolsConfig,
+    version: str,
+    changelog_contents: str,
+    insert_vendor_import: bool,
+) -> bool:
+    plugin_package_name = dev_tools_config.plugin_package_name
+    plugin_package_path = dev_tools_config.plugin_package_path
+    plugin_license_exists = False
+
+    LOGGER.debug("writing %s to zip file", plugin_package_path.resolve())
+
+    for source_file in iter_files_to_bundle(plugin_package_path):
+        relative_name = source_file.relative_to(plugin_package_path).as_posix()
+        member_name = PurePosixPath(plugin_package_name, relative_name)
+
+        if relative_name == "metadata.txt":
+            writer.write_contents(
+                member_name,
+                update_metadata_contents(
+                    source_file.read_text(encoding="utf-8"),
+                    version,
+                    changelog_contents,
+                ),
+            )
+        elif relative_name == "__init__.py" and insert_vendor_import:
+            writer.write_contents(
+                member_name,
+                f"import {plugin_package_name}._vendor\n"
+                + source_file.read_text(encoding="utf-8"),
+            )
+        elif relative_name == "LICENSE":
+            plugin_license_exists = True
+            if dev_tools_config.license_file_path is None:
+                writer.write_file(source_file, member_name)
+        else:
+            writer.write_file(source_file, member_name)
+
+    return plugin_license_exists
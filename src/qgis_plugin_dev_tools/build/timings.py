@@ -0,0 +1,150 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import logging
+import os
+import sys
+import time
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
+if sys.platform != "win32":
+    import resource
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class StageTiming:
+    name: str
+    wall_seconds: float = 0.0
+    # includes the time spent in the finished child processes
+    cpu_seconds: float = 0.0
+    file_count: int = 0
+    byte_count: int = 0
+    # peak resident set size of the build process or its children so far
+    peak_rss_bytes: int | None = None
+
+    _count_files: bool = field(default=True, repr=False, compare=False)
+
+    def add_files(self, file_paths: Iterable[Path]) -> None:
+        # counting is skipped if timings are not collected to avoid extra stats
+        if not self._count_files:
+            return
+        for file_path in file_paths:
+            self.file_count += 1
+            self.byte_count += file_path.stat().st_size
+
+
+@dataclass
+class BuildTimings:
+    """
+    Collects the wall & cpu time, processed files and peak memory use
+    for each stage of the build. Disabled timings measure nothing.
+    """
+
+    enabled: bool = True
+    stages: list[StageTiming] = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[StageTiming, None, None]:
+        stage = StageTiming(name=name, _count_files=self.enabled)
+        if not self.enabled:
+            with trace_span(name):
+                yield stage
+            return
+
+        wall_start = time.perf_counter()
+        cpu_start = _get_cpu_seconds()
+        try:
+            with trace_span(name):
+                yield stage
+        finally:
+            stage.wall_seconds = time.perf_counter() - wall_start
+            stage.cpu_seconds = _get_cpu_seconds() - cpu_start
+            stage.peak_rss_bytes = _get_peak_rss_bytes()
+            self.stages.append(stage)
+            LOGGER.debug("build stage %s took %.3f s", name, stage.wall_seconds)
+
+    def format_table(self) -> str:
+        mib = 1024 * 1024
+        lines = [
+            f"{'stage':<28}{'wall s':>9}{'cpu s':>9}{'files':>8}"
+            f"{'MiB':>10}{'peak RSS MiB':>14}"
+        ]
+        for stage in self.stages:
+            peak_rss = (
+                f"{stage.peak_rss_bytes / mib:.1f}"
+                if stage.peak_rss_bytes is not None
+                else "-"
+            )
+            lines.append(
+                f"{stage.name:<28}{stage.wall_seconds:>9.3f}{stage.cpu_seconds:>9.3f}"
+                f"{stage.file_count:>8}{stage.byte_count / mib:>10.1f}{peak_rss:>14}"
+            )
+        lines.append(
+            f"{'total':<28}{sum(stage.wall_seconds for stage in self.stages):>9.3f}"
+            f"{sum(stage.cpu_seconds for stage in self.stages):>9.3f}"
+        )
+        return "\n".join(lines)
+
+    def write_json(self, file_path: Path) -> None:
+        file_path.write_text(
+            json.dumps(
+                {
+                    "stages": [
+                        {
+                            "name": stage.name,
+                            "wall_seconds": stage.wall_seconds,
+                            "cpu_seconds": stage.cpu_seconds,
+                            "file_count": stage.file_count,
+                            "byte_count": stage.byte_count,
+                            "peak_rss_bytes": stage.peak_rss_bytes,
+                        }
+                        for stage in self.stages
+                    ],
+                    "wall_seconds": sum(stage.wall_seconds for stage in self.stages),
+                    "cpu_seconds": sum(stage.cpu_seconds for stage in self.stages),
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+
+def _get_cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _get_peak_rss_bytes() -> int | None:
+    if sys.platform == "win32":
+        return None
+
+    peak_rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # reported in bytes on macOS and in kibibytes elsewhere
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
@@ -0,0 +1,285 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import ast
+import logging
+import re
+from collections import defaultdict
+from collections.abc import Collection, Generator
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from pathlib import PurePosixPath
+
+from qgis_plugin_dev_tools.build.archive import PluginArchive
+from qgis_plugin_dev_tools.config import DevToolsConfig
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
+LOGGER = logging.getLogger(__name__)
+
+# functions importing the module named in the first argument
+IMPORT_FUNCTION_NAMES = {"import_module", "__import__"}
+UI_CUSTOM_WIDGET_HEADER_PATTERN = re.compile(rb"<header>\s*([\w.]+)\s*</header>")
+
+
+@dataclass
+class TreeShakingResult:
+    removed_member_names: list[PurePosixPath] = field(default_factory=list)
+    removed_size: int = 0
+
+    def format_summary(self) -> str:
+        removed_counts: dict[str, int] = defaultdict(int)
+        for member_name in self.removed_member_names:
+            removed_counts[member_name.parts[2]] += 1
+        return ", ".join(
+            f"{name} ({count})" for name, count in sorted(removed_counts.items())
+        )
+
+
+@dataclass
+class _VendoredModule:
+    member_name: PurePosixPath
+    is_package: bool
+
+
+def tree_shake_plugin_archive(
+    dev_tools_config: DevToolsConfig, archive: PluginArchive
+) -> None:
+    if not dev_tools_config.tree_shake_runtime_dependencies:
+        return
+
+    result = shake_vendored_modules(
+        archive,
+        dev_tools_config.plugin_package_name,
+        dev_tools_config.tree_shake_kept_modules,
+    )
+    if result.removed_member_names:
+        LOGGER.info(
+            "removed %i unreachable vendored files (%i bytes): %s",
+            len(result.removed_member_names),
+            result.removed_size,
+            result.format_summary(),
+        )
+
+
+def shake_vendored_modules(
+    archive: PluginArchive,
+    plugin_package_name: str,
+    kept_module_patterns: Collection[str] = (),
+) -> TreeShakingResult:
+    """
+    Removes the vendored modules which the plugin cannot import, following the
+    imports statically from the plugin modules through the vendored modules.
+    Files in the unreachable vendored packages are removed as well. Modules
+    imported dynamically can be kept with the module name patterns.
+    """
+    vendor_member_path = PurePosixPath(plugin_package_name, "_vendor")
+
+    with trace_span("tree shake vendored modules"):
+        modules = _find_vendored_modules(archive, vendor_member_path)
+        walker = _ModuleGraphWalker(archive, modules, vendor_member_path)
+        walker.reach_kept_modules(kept_module_patterns)
+        walker.reach_plugin_imports()
+        walker.follow_vendored_imports()
+
+        result = TreeShakingResult()
+        for member_name in archive.get_member_names():
+            if _is_unreachable(
+                member_name, modules, walker.reached_names, vendor_member_path
+            ):
+                LOGGER.debug("removing unreachable %s", member_name)
+                result.removed_member_names.append(member_name)
+                result.removed_size += archive.get_member_size(member_name)
+                archive.remove_member(member_name)
+
+    return result
+
+
+def _find_vendored_modules(
+    archive: PluginArchive, vendor_member_path: PurePosixPath
+) -> dict[str, _VendoredModule]:
+    modules: dict[str, _VendoredModule] = {}
+    for member_name in archive.get_member_names():
+        if (
+            member_name.suffix != ".py"
+            or not member_name.is_relative_to(vendor_member_path)
+            or member_name == vendor_member_path / "__init__.py"
+        ):
+            continue
+
+        relative_parts = member_name.relative_to(vendor_member_path).with_suffix("")
+        parts = relative_parts.parts
+        is_package = parts[-1] == "__init__"
+        if is_package:
+            parts = parts[:-1]
+        # names which cannot be imported are never removed
+        if all(part.isidentifier() for part in parts):
+            modules[".".join(parts)] = _VendoredModule(member_name, is_package)
+
+    return modules
+
+
+@dataclass
+class _ModuleGraphWalker:
+    """
+    Collects the names of the modules imported from the plugin, directly or
+    through other vendored modules.
+    """
+
+    archive: PluginArchive
+    modules: dict[str, _VendoredModule]
+    vendor_member_path: PurePosixPath
+
+    reached_names: set[str] = field(default_factory=set)
+    _pending_names: list[str] = field(default_factory=list)
+
+    def reach_kept_modules(self, kept_module_patterns: Collection[str]) -> None:
+        for pattern in kept_module_patterns:
+            if not any(character in pattern for character in "*?["):
+                self.reach(pattern)
+            for name in self.modules:
+                if fnmatchcase(name, pattern):
+                    self.reach(name)
+
+    def reach_plugin_imports(self) -> None:
+        for member_name in self.archive.get_member_names():
+            if member_name.is_relative_to(self.vendor_member_path):
+                continue
+            if member_name.suffix == ".py":
+                module_parts = member_name.with_suffix("").parts
+                is_package = module_parts[-1] == "__init__"
+                self._reach_imports(
+                    member_name,
+                    ".".join(module_parts[:-1] if is_package else module_parts),
+                    is_package,
+                )
+            elif member_name.suffix == ".ui":
+                for match in UI_CUSTOM_WIDGET_HEADER_PATTERN.finditer(
+                    self.archive.read_member(member_name)
+                ):
+                    self.reach(match[1].decode())
+
+    def follow_vendored_imports(self) -> None:
+        while self._pending_names:
+            name = self._pending_names.pop()
+            module = self.modules[name]
+            self._reach_imports(module.member_name, name, module.is_package)
+
+    def reach(self, imported_name: str) -> None:
+        imported_name = imported_name.removeprefix(
+            ".".join(self.vendor_member_path.parts) + "."
+        )
+        if imported_name.endswith(".*"):
+            package_name = imported_name[:-2]
+            self.reach(package_name)
+            for name in self.modules:
+                if name.rpartition(".")[0] == package_name:
+                    self.reach(name)
+            return
+
+        # importing a module imports its parent packages first
+        parts = imported_name.split(".")
+        for index in range(1, len(parts) + 1):
+            name = ".".join(parts[:index])
+            if name not in self.reached_names:
+                self.reached_names.add(name)
+                if name in self.modules:
+                    self._pending_names.append(name)
+
+    def _reach_imports(
+        self, member_name: PurePosixPath, module_name: str, is_package: bool
+    ) -> None:
+        for imported_name in _iter_imported_names(
+            self.archive.read_member(member_name), module_name, is_package
+        ):
+            self.reach(imported_name)
+
+
+def _iter_imported_names(
+    source: bytes, module_name: str, is_package: bool
+) -> Generator[str, None, None]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        LOGGER.debug("could not find imports of %s: %s", module_name, e)
+        return
+
+    package_name = module_name if is_package else module_name.rpartition(".")[0]
+
+    # imports in functions and in try blocks are found too,
+    # since those may be run when the plugin is used
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name
+        elif isinstance(node, ast.ImportFrom):
+            if node.level > 0:
+                base_parts = package_name.split(".")
+                base_parts = base_parts[: len(base_parts) - node.level + 1]
+                if node.module:
+                    base_parts.append(node.module)
+                base_name = ".".join(base_parts)
+            else:
+                base_name = node.module or ""
+            yield base_name
+            for alias in node.names:
+                yield f"{base_name}.{alias.name}"
+        elif (
+            isinstance(node, ast.Call)
+            and (
+                (
+                    isinstance(node.func, ast.Name)
+                    and node.func.id in IMPORT_FUNCTION_NAMES
+                )
+                or (
+                    isinstance(node.func, ast.Attribute)
+                    and node.func.attr in IMPORT_FUNCTION_NAMES
+                )
+            )
+            and node.args
+            and isinstance(node.args[0], ast.Constant)
+            and isinstance(node.args[0].value, str)
+            and not node.args[0].value.startswith(".")
+        ):
+            yield node.args[0].value
+
+
+def _is_unreachable(
+    member_name: PurePosixPath,
+    modules: dict[str, _VendoredModule],
+    reached_names: set[str],
+    vendor_member_path: PurePosixPath,
+) -> bool:
+    if not member_name.is_relative_to(vendor_member_path):
+        return False
+
+    relative_path = member_name.relative_to(vendor_member_path)
+    if member_name.suffix == ".py":
+        module_parts = relative_path.with_suffix("").parts
+        if module_parts[-1] == "__init__":
+            module_parts = module_parts[:-1]
+        module_name = ".".join(module_parts)
+        if module_name in modules:
+            return module_name not in reached_names
+
+    # other files belong to the closest package, like package data or tests
+    for parent in relative_path.parents[:-1]:
+        package_name = ".".join(parent.parts)
+        if package_name in modules and modules[package_name].is_package:
+            return package_name not in reached_names
+    return False
@@ -22,23 +22,40 @@ import logging
 import os
 import sys
 from pathlib import Path
-
-from importlib_metadata import entry_points
+from typing import TYPE_CHECKING, Any
 
 from qgis_plugin_dev_tools import LOGGER as ROOT_LOGGER
-from qgis_plugin_dev_tools import translations
-from qgis_plugin_dev_tools.build import make_plugin_zip
-from qgis_plugin_dev_tools.config import DevToolsConfig, pyproject
-from qgis_plugin_dev_tools.config.dotenv import read_dotenv_configs
-from qgis_plugin_dev_tools.publish import publish_plugin_zip_file
-from qgis_plugin_dev_tools.start import launch_development_qgis
-from qgis_plugin_dev_tools.start.config import DevelopmentModeConfig
-from qgis_plugin_dev_tools.utils.distributions import get_distribution_top_level_names
+from qgis_plugin_dev_tools.utils.tracing import start_tracing, stop_tracing, trace_span
+
+if TYPE_CHECKING:
+    from qgis_plugin_dev_tools.build.config import BuildConfig
 
 LOGGER = logging.getLogger(__name__)
 
+INCREMENTAL_BUILD_DIRECTORY = Path(".qpdt") / "build"
+# resolved only when building to avoid importing the build modules
+DEFAULT_VENDORED_CACHE_DIRECTORY = object()
+DEFAULT_PROFILE_FILE_NAME = "qpdt-plugin-load.pstats"
+
+# subcommand implementations are imported only when the subcommand is run,
+# so that for example the translation hooks do not import the build modules
+
+
+def start(  # noqa: PLR0913
+    pyproject_config_path: Path,
+    dotenv_file_paths: list[Path],
+    hot_reload: bool,
+    runtime_overlay: bool = True,
+    startup_timeline_json_path: Path | None = None,
+    profile_output_path: Path | None = None,
+) -> None:
+    from qgis_plugin_dev_tools.config import DevToolsConfig
+    from qgis_plugin_dev_tools.config.dotenv import read_dotenv_configs
+    from qgis_plugin_dev_tools.start import launch_development_qgis
+    from qgis_plugin_dev_tools.start.config import DevelopmentModeConfig
+    from qgis_plugin_dev_tools.start.runtime_overlay import create_runtime_overlay
+    from qgis_plugin_dev_tools.utils.distribution_index import get_distribution_index
 
-def start(pyproject_config_path: Path, dotenv_file_paths: list[Path]) -> None:
     dev_tools_config = DevToolsConfig.from_pyproject_config(pyproject_config_path)
     # TODO: allow setting debugger flag from cli?
     # TODO: find default executable paths to allow zero-config .env?
@@ -53,7 +70,34 @@ def start(pyproject_config_path: Path, dotenv_file_paths: list[Path]) -> None:
         "launching development qgis for plugin %s", dev_tools_config.plugin_package_name
     )
 
-    entry_points_found_from_python_env = entry_points(group="qgis_plugin_dev_tools")
+    distribution_index = get_distribution_index()
+    entry_points_found_from_python_env = distribution_index.get_entry_points(
+        "qgis_plugin_dev_tools"
+    )
+    extra_plugin_package_names = [
+        entry_point.name
+        for entry_point in entry_points_found_from_python_env
+        if (
+            entry_point.name != dev_tools_config.plugin_package_name
+            and entry_point.name not in dev_tools_config.disabled_extra_plugins
+        )
+    ]
+
+    runtime_overlay_path = None
+    if runtime_overlay:
+        runtime_overlay_path = create_runtime_overlay(
+            dev_tools_config,
+            distribution_index,
+            extra_package_names=[
+                *extra_plugin_package_names,
+                *(
+                    [dotenv_config.DEBUGGER_LIBRARY]
+                    if dotenv_config.DEBUGGER_LIBRARY
+                    else []
+                ),
+            ],
+        )
+        LOGGER.info("using runtime overlay %s", runtime_overlay_path)
 
     launch_development_qgis(
         DevelopmentModeConfig(
@@ -62,48 +106,121 @@ def start(pyproject_config_path: Path, dotenv_file_paths: list[Path]) -> None:
             locale=dotenv_config.QGIS_LOCALE,
             ui_ini=dotenv_config.QGIS_GUI_INI,
             runtime_environment=dotenv_config.runtime_environment,
-            runtime_library_paths=[Path(p) for p in sys.path],
+            runtime_library_paths=(
+                [] if runtime_overlay else [Path(p) for p in sys.path]
+            ),
             plugin_package_path=dev_tools_config.plugin_package_path,
             plugin_package_name=dev_tools_config.plugin_package_name,
             plugin_dependency_package_names=[
                 name
                 for dist in dev_tools_config.runtime_distributions
-                for name in get_distribution_top_level_names(dist)
+                for name in distribution_index.get_top_level_names(dist)
             ],
             debugger_library=dotenv_config.DEBUGGER_LIBRARY,
-            extra_plugin_package_names=[
-                entry_point.name
-                for entry_point in entry_points_found_from_python_env
-                if (
-                    entry_point.name != dev_tools_config.plugin_package_name
-                    and entry_point.name not in dev_tools_config.disabled_extra_plugins
-                )
-            ],
+            extra_plugin_package_names=extra_plugin_package_names,
+            hot_reload=hot_reload,
+            runtime_overlay_path=runtime_overlay_path,
+            startup_timeline_json_path=startup_timeline_json_path,
+            profile_output_path=(
+                profile_output_path.resolve() if profile_output_path else None
+            ),
         )
     )
 
 
-def build(pyproject_config_path: Path, override_plugin_version: str | None) -> None:
+def build(  # noqa: PLR0913
+    pyproject_config_path: Path,
+    override_plugin_version: str | None,
+    build_config: "BuildConfig",
+    show_timings: bool,
+    timings_json_file_path: Path | None,
+    size_report: bool = False,
+) -> None:
+    from qgis_plugin_dev_tools.build import make_plugin_zip
+    from qgis_plugin_dev_tools.build.timings import BuildTimings
+    from qgis_plugin_dev_tools.config import DevToolsConfig
+
     dev_tools_config = DevToolsConfig.from_pyproject_config(pyproject_config_path)
     LOGGER.info("building plugin package %s", dev_tools_config.plugin_package_name)
     LOGGER.debug(
         "building plugin package from %s",
         dev_tools_config.plugin_package_path.resolve(),
     )
+    timings = BuildTimings(enabled=show_timings or timings_json_file_path is not None)
     # TODO: allow choosing output path from cli?
-    make_plugin_zip(
+    zip_file_path = make_plugin_zip(
         dev_tools_config,
         target_directory_path=Path("dist"),
         override_plugin_version=override_plugin_version,
+        build_config=build_config,
+        timings=timings,
     )
 
+    if show_timings:
+        LOGGER.info("build timings:\n%s", timings.format_table())
+    if timings_json_file_path is not None:
+        timings.write_json(timings_json_file_path)
+        LOGGER.info("wrote build timings to %s", timings_json_file_path.resolve())
+    if size_report:
+        analyze(pyproject_config_path, zip_file_path)
+
+
+def lock(pyproject_config_path: Path) -> None:
+    from qgis_plugin_dev_tools.build.lockfile import LOCKFILE_NAME, Lockfile
+    from qgis_plugin_dev_tools.config import DevToolsConfig
+
+    dev_tools_config = DevToolsConfig.from_pyproject_config(pyproject_config_path)
+    lockfile = Lockfile.from_config(dev_tools_config)
+    lockfile_path = pyproject_config_path.parent / LOCKFILE_NAME
+    lockfile.write(lockfile_path)
+    LOGGER.info(
+        "locked %i runtime requirements to %s",
+        len(lockfile.distributions),
+        lockfile_path,
+    )
+
+
+def analyze(
+    pyproject_config_path: Path,
+    plugin_zip_file_path: Path,
+    largest_file_count: int = 10,
+    json_file_path: Path | None = None,
+    update_budget: bool = False,
+) -> None:
+    from qgis_plugin_dev_tools.analyze import SIZE_BUDGET_NAME, report_zip_size
+    from qgis_plugin_dev_tools.config import pyproject
+
+    # the zip can be analyzed outside of the plugin project too
+    max_growth_percent = (
+        pyproject.read_pyproject_config(
+            pyproject_config_path
+        ).size_budget_max_growth_percent
+        if pyproject_config_path.exists()
+        else pyproject.PyprojectConfig.size_budget_max_growth_percent
+    )
+    report = report_zip_size(
+        plugin_zip_file_path,
+        pyproject_config_path.parent / SIZE_BUDGET_NAME,
+        max_growth_percent,
+        update_budget=update_budget,
+        largest_file_count=largest_file_count,
+    )
+    if json_file_path is not None:
+        report.write_json(json_file_path)
+        LOGGER.info("wrote size report to %s", json_file_path.resolve())
+
 
 def publish(plugin_zip_file_path: Path) -> None:
+    from qgis_plugin_dev_tools.publish import publish_plugin_zip_file
+
     LOGGER.info("publishing plugin zip file %s", plugin_zip_file_path)
     publish_plugin_zip_file(plugin_zip_file_path)
 
 
 def transup(pyproject_config_path: Path, check_changes: bool) -> None:
+    from qgis_plugin_dev_tools import translations
+    from qgis_plugin_dev_tools.config import pyproject
+
     # Do not create DevToolsConfig since this command does not need plugin_package
     pyproject_config = pyproject.read_pyproject_config(pyproject_config_path)
     if not (language_codes := pyproject_config.translation_language_codes):
@@ -135,6 +252,9 @@ def transup(pyproject_config_path: Path, check_changes: bool) -> None:
 
 
 def transcompile(pyproject_config_path: Path) -> None:
+    from qgis_plugin_dev_tools import translations
+    from qgis_plugin_dev_tools.config import pyproject
+
     # Do not create DevToolsConfig since this command does not need plugin_package
     pyproject_config = pyproject.read_pyproject_config(pyproject_config_path)
     if not (language_codes := pyproject_config.translation_language_codes):
@@ -149,7 +269,23 @@ def transcompile(pyproject_config_path: Path) -> None:
     translations.compile_translations(language_codes, Path(destination_path))
 
 
+def _positive_int(value: str) -> int:
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return int(value)
+
+
 parser = argparse.ArgumentParser(description="QGIS plugin dev tools cli")
+TRACE_HELP = "write a chrome trace event file of the command, viewable in Perfetto"
+# accepted both before and after the subcommand name
+parser.add_argument(
+    "--trace",
+    metavar="<file>",
+    dest="trace_file",
+    type=Path,
+    default=None,
+    help=TRACE_HELP,
+)
 
 common_parser = argparse.ArgumentParser(add_help=False)
 common_parser.add_argument(
@@ -167,6 +303,15 @@ common_parser.add_argument(
     default=Path("pyproject.toml"),
     help="path to pyproject.toml file if not in current directory",
 )
+common_parser.add_argument(
+    "--trace",
+    metavar="<file>",
+    dest="trace_file",
+    type=Path,
+    # a default here would replace the value given before the subcommand
+    default=argparse.SUPPRESS,
+    help=TRACE_HELP,
+)
 
 commands = parser.add_subparsers(required=True, dest="subcommand")
 
@@ -185,6 +330,35 @@ start_parser.add_argument(
     default=[],
     help="read config from a .env file (can be specified multiple times)",
 )
+start_parser.add_argument(
+    "--hot-reload",
+    action="store_true",
+    dest="hot_reload",
+    help="keep running and reload the plugin in QGIS when its files change",
+)
+start_parser.add_argument(
+    "--no-runtime-overlay",
+    action="store_false",
+    dest="runtime_overlay",
+    help="add the whole sys.path of the current environment to QGIS instead of"
+    " only the runtime requirements",
+)
+start_parser.add_argument(
+    "--timeline-json",
+    metavar="<file>",
+    dest="startup_timeline_json_file",
+    help="write the startup timeline of QGIS and the plugin to a json file",
+)
+start_parser.add_argument(
+    "--profile-load",
+    nargs="?",
+    const=DEFAULT_PROFILE_FILE_NAME,
+    metavar="<file>",
+    dest="profile_file",
+    help="profile loading the plugin and each hot reload in QGIS with cProfile,"
+    f" write the stats to a file ({DEFAULT_PROFILE_FILE_NAME} by default)"
+    " and show the slowest functions",
+)
 
 build_parser = commands.add_parser(
     "build",
@@ -201,6 +375,128 @@ build_parser.add_argument(
     help="override version number for the build,"
     " (by default infer build version from source files)",
 )
+build_parser.add_argument(
+    "-j",
+    "--jobs",
+    metavar="<count>",
+    dest="jobs",
+    type=_positive_int,
+    default=1,
+    help="number of processes used for rewriting imports (default 1)",
+)
+build_mode_group = build_parser.add_mutually_exclusive_group()
+build_mode_group.add_argument(
+    "--incremental",
+    action="store_true",
+    dest="incremental",
+    help="keep the build tree in .qpdt/build next to pyproject.toml"
+    " and only process changed files on subsequent builds",
+)
+build_mode_group.add_argument(
+    "--stream",
+    action="store_true",
+    dest="stream",
+    help="write the zip file directly from the sources without a build directory",
+)
+build_parser.add_argument(
+    "--vendored-cache",
+    metavar="<directory>",
+    dest="vendored_cache_directory",
+    type=Path,
+    nargs="?",
+    const=DEFAULT_VENDORED_CACHE_DIRECTORY,
+    default=None,
+    help="reuse runtime requirements already bundled by earlier builds,"
+    " cached in the directory (default ~/.cache/qgis-plugin-dev-tools/vendored)",
+)
+build_parser.add_argument(
+    "--timings",
+    action="store_true",
+    dest="timings",
+    help="show wall & cpu time, processed files and peak memory use of build stages",
+)
+build_parser.add_argument(
+    "--timings-json",
+    metavar="<file>",
+    dest="timings_json_file",
+    type=Path,
+    default=None,
+    help="write the build stage timings to a json file",
+)
+
+build_parser.add_argument(
+    "--locked",
+    action="store_true",
+    dest="locked",
+    help="bundle the runtime requirements resolved in qpdt.lock next to"
+    " pyproject.toml, failing if the installed requirements have changed",
+)
+
+build_parser.add_argument(
+    "--compression",
+    dest="compression",
+    choices=["store", "fast", "default", "max"],
+    default="default",
+    help="zip compression level, fast for development builds and max for releases",
+)
+build_parser.add_argument(
+    "--wheelhouse",
+    metavar="<directory>",
+    dest="wheelhouse_directory",
+    type=Path,
+    default=None,
+    help="bundle the runtime requirements from the pure Python wheels in the"
+    " directory instead of the installed distributions",
+)
+build_parser.add_argument(
+    "--size-report",
+    action="store_true",
+    dest="size_report",
+    help="show the zip size by distribution, package and file type after the"
+    " build, failing if the zip exceeds the size budget",
+)
+
+lock_parser = commands.add_parser(
+    "lock",
+    help="resolve the bundled runtime requirements into qpdt.lock",
+    parents=[common_parser],
+)
+
+analyze_parser = commands.add_parser(
+    "analyze",
+    help="show the size of a plugin zip file by distribution, package and file"
+    " type, failing if the zip exceeds the size budget",
+    parents=[common_parser],
+)
+analyze_parser.add_argument(
+    metavar="<file>",
+    dest="file",
+    type=Path,
+    help="zip file to analyze",
+)
+analyze_parser.add_argument(
+    "--largest",
+    metavar="<count>",
+    dest="largest_file_count",
+    type=_positive_int,
+    default=10,
+    help="number of largest files to show (default 10)",
+)
+analyze_parser.add_argument(
+    "--json",
+    metavar="<file>",
+    dest="json_file",
+    type=Path,
+    default=None,
+    help="write the size report to a json file",
+)
+analyze_parser.add_argument(
+    "--update-budget",
+    action="store_true",
+    dest="update_budget",
+    help="store the zip size as the size budget in qpdt-size-budget.json"
+    " next to pyproject.toml",
+)
 
 publish_parser = commands.add_parser(
     "publish",
@@ -246,16 +542,105 @@ def run() -> None:
     pyproject_config_path = result["pyproject_config_path"].resolve()
     LOGGER.debug("pyproject.toml path: %s", pyproject_config_path)
 
+    trace_file_path = result.get("trace_file")
+    if trace_file_path is not None:
+        start_tracing()
+    try:
+        with trace_span(result["subcommand"]):
+            _run_subcommand(result, pyproject_config_path)
+    finally:
+        if trace_file_path is not None:
+            stop_tracing(trace_file_path)
+
+
+def _get_build_config(
+    result: dict[str, Any], pyproject_config_path: Path
+) -> "BuildConfig":
+    from qgis_plugin_dev_tools.build.archive import ZipCompression
+    from qgis_plugin_dev_tools.build.cache import (
+        get_default_vendored_cache_directory_path,
+    )
+    from qgis_plugin_dev_tools.build.config import BuildConfig
+    from qgis_plugin_dev_tools.build.lockfile import LOCKFILE_NAME
+
+    vendored_cache_directory_path = result.get("vendored_cache_directory")
+    if vendored_cache_directory_path is DEFAULT_VENDORED_CACHE_DIRECTORY:
+        vendored_cache_directory_path = get_default_vendored_cache_directory_path()
+    if result.get("stream") and vendored_cache_directory_path is not None:
+        build_parser.error("--vendored-cache cannot be used with --stream")
+    wheelhouse_path = result.get("wheelhouse_directory")
+    if wheelhouse_path is not None and (
+        result.get("incremental")
+        or result.get("locked")
+        or vendored_cache_directory_path is not None
+    ):
+        build_parser.error(
+            "--wheelhouse cannot be used with"
+            " --incremental, --locked or --vendored-cache"
+        )
+    return BuildConfig(
+        build_directory_path=(
+            pyproject_config_path.parent / INCREMENTAL_BUILD_DIRECTORY
+            if result.get("incremental")
+            else None
+        ),
+        stream=result.get("stream", False),
+        jobs=result.get("jobs", 1),
+        vendored_cache_directory_path=vendored_cache_directory_path,
+        lockfile_path=(
+            pyproject_config_path.parent / LOCKFILE_NAME
+            if result.get("locked")
+            else None
+        ),
+        wheelhouse_path=wheelhouse_path,
+        compression=ZipCompression.from_config_value(
+            result.get("compression", "default")
+        ),
+    )
+
+
+def _run_subcommand(result: dict[str, Any], pyproject_config_path: Path) -> None:
     if result.get("subcommand") in ["start", "s"]:
         dotenv_file_paths = [Path(".env")] + [
             Path(f) for f in result.get("extra_dotenv_files", [])
         ]
-        start(pyproject_config_path, dotenv_file_paths)
+        start(
+            pyproject_config_path,
+            dotenv_file_paths,
+            hot_reload=result.get("hot_reload", False),
+            runtime_overlay=result.get("runtime_overlay", True),
+            startup_timeline_json_path=(
+                Path(result["startup_timeline_json_file"])
+                if result.get("startup_timeline_json_file")
+                else None
+            ),
+            profile_output_path=(
+                Path(result["profile_file"]) if result.get("profile_file") else None
+            ),
+        )
 
     elif result.get("subcommand") in ["build", "b"]:
-        override_plugin_version = result.get("plugin_version", None)
-        build(pyproject_config_path, override_plugin_version)
+        override_plugin_version = result.get("plugin_version")
+        build_config = _get_build_config(result, pyproject_config_path)
+        build(
+            pyproject_config_path,
+            override_plugin_version,
+            build_config,
+            show_timings=result.get("timings", False),
+            timings_json_file_path=result.get("timings_json_file"),
+            size_report=result.get("size_report", False),
+        )
 
+    elif result.get("subcommand") in ["lock"]:
+        lock(pyproject_config_path)
+    elif result.get("subcommand") in ["analyze"]:
+        analyze(
+            pyproject_config_path,
+            result["file"],
+            largest_file_count=result.get("largest_file_count", 10),
+            json_file_path=result.get("json_file"),
+            update_budget=result.get("update_budget", False),
+        )
     elif result.get("subcommand") in ["publish"]:
         plugin_zip_file_path = result["file"]
         publish(plugin_zip_file_path)
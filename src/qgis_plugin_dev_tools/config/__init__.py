@@ -17,16 +17,19 @@
 #  You should have received a copy of the GNU General Public License
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
-from collections import ChainMap
 from enum import Enum, auto
+from functools import cached_property
 from importlib.util import find_spec
 from pathlib import Path
-
-from importlib_metadata import Distribution, distribution
-from packaging.requirements import Requirement
+from typing import TYPE_CHECKING
 
 from qgis_plugin_dev_tools.config.pyproject import read_pyproject_config
-from qgis_plugin_dev_tools.utils.distributions import get_distribution_requirements
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
+if TYPE_CHECKING:
+    from importlib_metadata import Distribution
+
+    from qgis_plugin_dev_tools.utils.distributions import DistributionDependencyGraph
 
 
 class VersionNumberSource(Enum):
@@ -42,12 +45,18 @@ class VersionNumberSource(Enum):
 
 
 class DevToolsConfig:
+    """
+    Plugin build & development configuration. The plugin package path and the
+    runtime distributions are resolved from the environment only when first
+    used, so each command pays only for the data it needs.
+    """
+
     pyproject_path: Path
     plugin_package_name: str
-    plugin_package_path: Path
-    runtime_distributions: list[Distribution]
+    runtime_requires: list[str]
     changelog_file_path: Path
     append_distributions_to_path: bool
+    auto_add_recursive_runtime_dependencies: bool
     version_number_source: VersionNumberSource
     disabled_extra_plugins: list[str]
     license_file_path: Path | None
@@ -56,6 +65,8 @@ class DevToolsConfig:
     translation_search_paths: list[Path]
     translation_destination_path: Path | None
     translation_pylupdate_command: str | None
+    tree_shake_runtime_dependencies: bool
+    tree_shake_kept_modules: list[str]
 
     def __init__(  # noqa: PLR0913
         self,
@@ -73,24 +84,18 @@ class DevToolsConfig:
         translation_search_paths: list[Path],
         translation_destination_path: Path | None,
         translation_pylupdate_command: str | None,
+        tree_shake_runtime_dependencies: bool = False,
+        tree_shake_kept_modules: list[str] | None = None,
     ) -> None:
-        plugin_package_spec = find_spec(plugin_package_name)
-        if plugin_package_spec is None or plugin_package_spec.origin is None:
-            raise ValueError(
-                f"could not find {plugin_package_name=} in the current environment"
-            )
-
         self.pyproject_path = pyproject_path
-        self.plugin_package_path = Path(plugin_package_spec.origin).parent
         self.plugin_package_name = plugin_package_name
-        # TODO: check versions are satisfied?
-        self.runtime_distributions = [
-            distribution(Requirement(spec).name) for spec in runtime_requires
-        ]
+        self.runtime_requires = runtime_requires
         self.changelog_file_path = changelog_file_path
         self.append_distributions_to_path = append_distributions_to_path
+        self.auto_add_recursive_runtime_dependencies = (
+            auto_add_recursive_runtime_dependencies
+        )
         self.version_number_source = version_number_source
-        self.extra_runtime_distributions = []
         self.disabled_extra_plugins = disabled_extra_plugins
         self.license_file_path = license_file_path
         self.env_file_path = env_file_path
@@ -98,23 +103,48 @@ class DevToolsConfig:
         self.translation_search_paths = translation_search_paths
         self.translation_destination_path = translation_destination_path
         self.translation_pylupdate_command = translation_pylupdate_command
+        self.tree_shake_runtime_dependencies = tree_shake_runtime_dependencies
+        self.tree_shake_kept_modules = tree_shake_kept_modules or []
+
+    @cached_property
+    def plugin_package_path(self) -> Path:
+        plugin_package_spec = find_spec(self.plugin_package_name)
+        if plugin_package_spec is None or plugin_package_spec.origin is None:
+            raise ValueError(
+                f"could not find plugin_package_name={self.plugin_package_name!r}"
+                " in the current environment"
+            )
+        return Path(plugin_package_spec.origin).parent
 
-        if auto_add_recursive_runtime_dependencies:
-            # Add the requirements of the distributions as well
-            distributions_versions = {
-                dist.name: dist.version for dist in self.runtime_distributions
-            }
-            self.extra_runtime_distributions = [
-                dist
-                for dist in ChainMap(
-                    *(
-                        get_distribution_requirements(dist)
-                        for dist in self.runtime_distributions
-                    )
-                ).values()
-                if distributions_versions.get(dist.name) != dist.version
+    @cached_property
+    def runtime_distributions(self) -> list["Distribution"]:
+        # imported only when needed, since translation commands do not use these
+        from importlib_metadata import distribution
+        from packaging.requirements import Requirement
+
+        # TODO: check versions are satisfied?
+        with trace_span("resolve runtime distributions"):
+            return [
+                distribution(Requirement(spec).name) for spec in self.runtime_requires
             ]
 
+    @cached_property
+    def runtime_dependency_graph(self) -> "DistributionDependencyGraph":
+        from qgis_plugin_dev_tools.utils.distributions import (
+            resolve_distribution_dependency_graph,
+        )
+
+        with trace_span("resolve recursive runtime dependencies"):
+            return resolve_distribution_dependency_graph(self.runtime_distributions)
+
+    @cached_property
+    def extra_runtime_distributions(self) -> list["Distribution"]:
+        if not self.auto_add_recursive_runtime_dependencies:
+            return []
+
+        # Add the requirements of the distributions as well
+        return self.runtime_dependency_graph.get_dependencies()
+
     @staticmethod
     def from_pyproject_config(pyproject_file_path: Path) -> "DevToolsConfig":
         pyproject_config = read_pyproject_config(pyproject_file_path)
@@ -153,4 +183,8 @@ class DevToolsConfig:
             if pyproject_config.translation_destination_path
             else None,
             translation_pylupdate_command=pyproject_config.translation_pylupdate_command,
+            tree_shake_runtime_dependencies=(
+                pyproject_config.tree_shake_runtime_dependencies
+            ),
+            tree_shake_kept_modules=pyproject_config.tree_shake_kept_modules,
         )
@@ -24,6 +24,8 @@ from typing import Literal
 
 import tomli
 
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -48,6 +50,9 @@ class PyprojectConfig:
     translation_search_paths: list[Path] = field(default_factory=list)
     translation_destination_path: str | None = None
     translation_pylupdate_command: str | None = None
+    tree_shake_runtime_dependencies: bool = False
+    tree_shake_kept_modules: list[str] = field(default_factory=list)
+    size_budget_max_growth_percent: float = 5.0
 
     def __post_init__(self) -> None:
         if self.version_number_source not in ["changelog", "distribution"]:
@@ -58,7 +63,10 @@ class PyprojectConfig:
 
 def read_pyproject_config(pyproject_file_path: Path) -> PyprojectConfig:
     LOGGER.debug("reading config from %s", pyproject_file_path.resolve())
-    with open(pyproject_file_path, "rb") as pyproject_file:
+    with (
+        trace_span("read pyproject config", file=pyproject_file_path),
+        open(pyproject_file_path, "rb") as pyproject_file,
+    ):
         config = tomli.load(pyproject_file)
         try:
             dev_tools_configuration = config.get("tool", {})[
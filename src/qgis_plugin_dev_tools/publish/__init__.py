@@ -28,6 +28,8 @@ from uuid import uuid4
 
 import requests
 
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
 LOGGER = logging.getLogger(__name__)
 
 HTTP_STATUS_CODE_OK = 200
@@ -61,11 +63,12 @@ def publish_plugin_zip_file(plugin_zip_file_path: Path) -> None:
         (body | {"params": ["<base64 zip contents>"]}),
     )
 
-    response = requests.post(
-        url="https://plugins.qgis.org/plugins/RPC2/",
-        json=body,
-        auth=(username, password),
-    )
+    with trace_span("upload plugin", size=len(zip_binary_contents)):
+        response = requests.post(
+            url="https://plugins.qgis.org/plugins/RPC2/",
+            json=body,
+            auth=(username, password),
+        )
 
     LOGGER.debug(
         "got response from plugin RPC api with body %s",
@@ -18,11 +18,19 @@
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import time
 
 from qgis_plugin_dev_tools.start.bootstrap import create_bootstrap_file
 from qgis_plugin_dev_tools.start.config import DevelopmentModeConfig
 from qgis_plugin_dev_tools.start.daemon_server import start_daemon_server
+from qgis_plugin_dev_tools.start.hot_reload import run_hot_reload
 from qgis_plugin_dev_tools.start.launch import launch_qgis_with_bootstrap_script
+from qgis_plugin_dev_tools.start.profile import log_profile_summary
+from qgis_plugin_dev_tools.start.timeline import (
+    DEFAULT_STARTUP_TIMELINE_TIMEOUT,
+    REQUESTED_STARTUP_TIMELINE_TIMEOUT,
+    wait_for_startup_timeline,
+)
 
 LOGGER = logging.getLogger(__name__)
 
@@ -30,14 +38,19 @@ LOGGER = logging.getLogger(__name__)
 def launch_development_qgis(
     development_mode_config: DevelopmentModeConfig,
 ) -> None:
+    if development_mode_config.profile_output_path is not None:
+        # do not show a stale profile if qgis fails to write the new one
+        development_mode_config.profile_output_path.unlink(missing_ok=True)
+
     LOGGER.info("starting daemon server")
-    with start_daemon_server() as (port, handle_single_request):
+    with start_daemon_server() as daemon_server:
         LOGGER.info("creating a bootstrap file")
         with create_bootstrap_file(
             development_mode_config,
-            port,
+            daemon_server.port,
         ) as bootstrap_file_path:
             LOGGER.info("launching qgis")
+            launch_time = time.time()
             launch_qgis_with_bootstrap_script(
                 development_mode_config.qgis_executable_path,
                 bootstrap_file_path,
@@ -47,10 +60,47 @@ def launch_development_qgis(
             )
 
             LOGGER.info("waiting for qgis to connect")
-            is_timeout = handle_single_request()
+            connection = daemon_server.accept_connection()
 
-    if is_timeout:
+    if connection is None:
         LOGGER.error("qgis did not connect within timeout period")
-    else:
-        LOGGER.info("qgis connected")
-        LOGGER.info("closed daemon server")
+        return
+
+    LOGGER.info("qgis connected")
+    with connection:
+        LOGGER.info("waiting for qgis to start the plugin")
+        startup_timeline = wait_for_startup_timeline(
+            connection,
+            launch_time,
+            timeout=(
+                REQUESTED_STARTUP_TIMELINE_TIMEOUT
+                if (
+                    development_mode_config.hot_reload
+                    or development_mode_config.startup_timeline_json_path
+                    or development_mode_config.profile_output_path
+                )
+                else DEFAULT_STARTUP_TIMELINE_TIMEOUT
+            ),
+        )
+        if startup_timeline is None:
+            LOGGER.warning("qgis did not report the startup timeline")
+        else:
+            LOGGER.info("startup timeline:\n%s", startup_timeline.format_waterfall())
+            if development_mode_config.startup_timeline_json_path is not None:
+                startup_timeline.write_json(
+                    development_mode_config.startup_timeline_json_path
+                )
+                LOGGER.info(
+                    "wrote startup timeline to %s",
+                    development_mode_config.startup_timeline_json_path,
+                )
+            if development_mode_config.profile_output_path is not None:
+                log_profile_summary(development_mode_config.profile_output_path)
+
+        if development_mode_config.hot_reload:
+            run_hot_reload(
+                connection,
+                development_mode_config.plugin_package_path,
+                development_mode_config.profile_output_path,
+            )
+    LOGGER.info("closed daemon server")
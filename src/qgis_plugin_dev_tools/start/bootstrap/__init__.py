@@ -41,6 +41,7 @@ def create_bootstrap_file(
         bootstrap_config = BootstrapConfig(
             daemon_socket_port=daemon_socket_port,
             runtime_library_paths=development_mode_configuration.runtime_library_paths,
+            runtime_overlay_path=development_mode_configuration.runtime_overlay_path,
             runtime_environment=development_mode_configuration.runtime_environment,
             plugin_package_path=development_mode_configuration.plugin_package_path,
             plugin_package_name=development_mode_configuration.plugin_package_name,
@@ -48,6 +49,7 @@ def create_bootstrap_file(
             debugger_library=development_mode_configuration.debugger_library,
             bootstrap_python_executable_path=Path(sys.executable),
             extra_plugin_package_names=development_mode_configuration.extra_plugin_package_names,
+            profile_output_path=development_mode_configuration.profile_output_path,
         )
 
         LOGGER.debug("using bootstrap config:\n%s", bootstrap_config)
@@ -17,20 +17,45 @@
 #  You should have received a copy of the GNU General Public License
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
+import ast
 import atexit
 import contextlib
+import cProfile
 import functools
+import importlib
+import json
 import os
 import pickle
+import site
 import sys
+import time
+from collections.abc import Iterator
 from dataclasses import asdict, dataclass
 from importlib.util import find_spec
 from pathlib import Path
+from typing import Any
 
 # defer qgis.* imports until necessary to avoid loading those
 # for the interpreter that launches the bootstrapping, since it
 # will import the config class from this module
 
+# plugin modules to reload during the ongoing plugin reload,
+# or None if the whole plugin and its dependencies are unloaded
+_selectively_reloaded_module_names: list[str] | None = None
+
+# bootstrap phases as (name, start, end) in wall clock time, which the daemon
+# compares with the time it launched qgis at
+_startup_phases: list[tuple[str, float, float]] = []
+
+
+@contextlib.contextmanager
+def _startup_phase(name: str) -> Iterator[None]:
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        _startup_phases.append((name, start_time, time.time()))
+
 
 def _unload_package_modules(package_names: list[str]) -> None:
     to_clean_names = [
@@ -83,6 +108,158 @@ def _monkeypatch_plugin_module_unload_to_unload_dependencies(
         qgis_utils_module._unloadPluginModules = _custom_unload
 
 
+def _find_imported_module_names(module_name: str, module_file_path: Path) -> set[str]:
+    try:
+        tree = ast.parse(module_file_path.read_bytes())
+    except (OSError, SyntaxError, ValueError):
+        return set()
+
+    is_package = module_file_path.stem == "__init__"
+    package_parts = module_name.split(".")[: None if is_package else -1]
+    imported_names: set[str] = set()
+    # imports inside functions are included, since those are run later
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported_names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base_parts = (
+                package_parts[: len(package_parts) - node.level + 1]
+                if node.level > 0
+                else []
+            )
+            base_name = ".".join([*base_parts, *([node.module] if node.module else [])])
+            imported_names.add(base_name)
+            imported_names.update(f"{base_name}.{alias.name}" for alias in node.names)
+    return imported_names
+
+
+def _sort_imported_first(
+    module_names: set[str], imported_module_names: dict[str, set[str]]
+) -> list[str]:
+    sorted_names: list[str] = []
+    visited_names: set[str] = set()
+
+    def _visit(module_name: str) -> None:
+        # import cycles are broken at the first revisited module
+        if module_name in visited_names:
+            return
+        visited_names.add(module_name)
+        for imported_name in sorted(imported_module_names[module_name]):
+            if imported_name in module_names:
+                _visit(imported_name)
+        sorted_names.append(module_name)
+
+    for module_name in sorted(module_names):
+        _visit(module_name)
+    return sorted_names
+
+
+def _get_plugin_module_names_to_reload(
+    plugin_package_name: str, changed_file_paths: list[Path]
+) -> list[str] | None:
+    """
+    Returns the changed plugin modules and the plugin modules importing those
+    directly or indirectly, imported modules first. Returns None if some of
+    the changed files are not loaded modules, like new or non-python files.
+    """
+    # namespace packages and modules loaded from other than source files
+    # have no python file to compare the changed files with
+    module_file_paths = {
+        module_name: Path(module_file).resolve()
+        for module_name, module in list(sys.modules.items())
+        if (
+            module_name == plugin_package_name
+            or module_name.startswith(f"{plugin_package_name}.")
+        )
+        and (module_file := getattr(module, "__file__", None)) is not None
+        and module_file.endswith(".py")
+    }
+    module_names_by_path = {path: name for name, path in module_file_paths.items()}
+
+    changed_module_names: set[str] = set()
+    for changed_file_path in changed_file_paths:
+        module_name = module_names_by_path.get(changed_file_path.resolve())
+        if module_name is None:
+            return None
+        changed_module_names.add(module_name)
+
+    imported_module_names = {
+        module_name: _find_imported_module_names(module_name, module_file_path)
+        & module_file_paths.keys()
+        for module_name, module_file_path in module_file_paths.items()
+    }
+    importing_module_names: dict[str, set[str]] = {}
+    for module_name, imported_names in imported_module_names.items():
+        for imported_name in imported_names:
+            importing_module_names.setdefault(imported_name, set()).add(module_name)
+
+    reloaded_module_names = set(changed_module_names)
+    pending_module_names = list(changed_module_names)
+    while pending_module_names:
+        for importing_name in importing_module_names.get(
+            pending_module_names.pop(), set()
+        ):
+            if importing_name not in reloaded_module_names:
+                reloaded_module_names.add(importing_name)
+                pending_module_names.append(importing_name)
+
+    return _sort_imported_first(reloaded_module_names, imported_module_names)
+
+
+def _reload_modules(module_names: list[str]) -> None:
+    """
+    Removes the modules and imports those again in the given order, keeping
+    the other modules, so their state and Qt resources stay loaded.
+    """
+    for module_name in reversed(module_names):
+        module = sys.modules.pop(module_name, None)
+        if module is None:
+            continue
+        with contextlib.suppress(Exception):
+            if hasattr(module, "qCleanupResources"):
+                module.qCleanupResources()
+        parent_name, _, child_name = module_name.rpartition(".")
+        # from package import module would find the old module from the package
+        parent = sys.modules.get(parent_name)
+        if parent is not None and getattr(parent, child_name, None) is module:
+            delattr(parent, child_name)
+
+    for module_name in module_names:
+        # errors are shown by qgis when it imports the plugin again
+        try:
+            module = importlib.import_module(module_name)
+        except Exception:
+            return
+        # reloaded packages need the kept submodules as attributes
+        for kept_name, kept_module in list(sys.modules.items()):
+            parent_name, _, child_name = kept_name.rpartition(".")
+            if parent_name == module_name and not hasattr(module, child_name):
+                setattr(module, child_name, kept_module)
+
+
+def _monkeypatch_plugin_module_unload_to_reload_modules_selectively(
+    plugin_package_name: str,
+) -> None:
+    from qgis.utils import (  # (qgis naming)
+        _unloadPluginModules as _original_unload,
+    )
+
+    def _custom_unload(packageName: str) -> bool:  # noqa: N803 (qgis naming)
+        if (
+            packageName == plugin_package_name
+            and _selectively_reloaded_module_names is not None
+        ):
+            # the plugin modules stay registered in qgis, so the next full
+            # unload removes the reloaded and the kept modules
+            _reload_modules(_selectively_reloaded_module_names)
+            return True
+        return _original_unload(packageName)
+
+    import qgis.utils as qgis_utils_module
+
+    qgis_utils_module._unloadPluginModules = _custom_unload
+
+
 def _monkeypatch_plugin_reload_to_reload_extra_plugins(
     main_plugin_package_name: str, extra_plugin_package_names: list[str]
 ) -> None:
@@ -121,13 +298,19 @@ def _monkeypatch_plugin_reload_to_reload_extra_plugins(
     qgis_utils_module.loadPlugin = _custom_load
 
 
-def _setup_runtime_library_paths(runtime_library_paths: list[Path]) -> None:
+def _setup_runtime_library_paths(
+    runtime_library_paths: list[Path], runtime_overlay_path: Path | None
+) -> None:
     from qgis.core import Qgis, QgsMessageLog
 
     QgsMessageLog.logMessage(
         "setting dev env package paths", "Bootstrap", level=Qgis.Info
     )
     sys.path.extend(str(p) for p in runtime_library_paths)
+    if runtime_overlay_path is not None:
+        # processes the path configuration files of the overlay, like the ones
+        # of editable installs, which plain sys.path entries would skip
+        site.addsitedir(str(runtime_overlay_path))
 
 
 def _setup_runtime_environment(runtime_environment: dict[str, str]) -> None:
@@ -156,10 +339,74 @@ def _enable_extra_plugins(
     )
 
 
+@contextlib.contextmanager
+def _profiled(profile_output_path: Path | None) -> Iterator[None]:
+    from qgis.core import Qgis, QgsMessageLog
+
+    if profile_output_path is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # only one profiler can be active at a time
+        QgsMessageLog.logMessage(
+            f"could not start profiler: {e}", "Bootstrap", level=Qgis.Warning
+        )
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(profile_output_path))
+        QgsMessageLog.logMessage(
+            f"wrote profile to {profile_output_path}", "Bootstrap", level=Qgis.Info
+        )
+
+
+def _start_plugin_with_timed_initialization(plugin_package_name: str) -> None:
+    from qgis.utils import startPlugin
+
+    # startPlugin creates the plugin and initializes its gui in one call,
+    # wrap the factory of the loaded module to time those separately
+    # the plugin module api is only known by convention, like in qgis.utils
+    package: Any = sys.modules.get(plugin_package_name)
+    original_class_factory = getattr(package, "classFactory", None)
+    if package is None or original_class_factory is None:
+        with _startup_phase("start plugin"):
+            startPlugin(plugin_package_name)
+        return
+
+    def _timed_class_factory(qgis_interface: Any) -> Any:
+        with _startup_phase("plugin classFactory"):
+            plugin = original_class_factory(qgis_interface)
+        original_init_gui = plugin.initGui
+
+        def _timed_init_gui() -> Any:
+            with _startup_phase("plugin initGui"):
+                return original_init_gui()
+
+        with contextlib.suppress(AttributeError):
+            plugin.initGui = _timed_init_gui
+        return plugin
+
+    package.classFactory = _timed_class_factory
+    try:
+        with _startup_phase("start plugin"):
+            startPlugin(plugin_package_name)
+    finally:
+        package.classFactory = original_class_factory
+
+
 def _enable_plugin(
     plugin_package_name: str,
     plugin_package_path: Path,
     plugin_dependency_package_names: list[str],
+    profile_output_path: Path | None,
 ) -> None:
     from pyplugin_installer.installer_data import plugins as installer_plugins
     from qgis.core import Qgis, QgsMessageLog
@@ -168,7 +415,6 @@ def _enable_plugin(
         loadPlugin,
         plugin_paths,
         reloadPlugin,
-        startPlugin,
         unloadPlugin,
         updateAvailablePlugins,
     )
@@ -211,12 +457,16 @@ def _enable_plugin(
     _monkeypatch_plugin_module_unload_to_unload_dependencies(
         plugin_package_name, plugin_dependency_package_names
     )
+    _monkeypatch_plugin_module_unload_to_reload_modules_selectively(plugin_package_name)
 
     plugin_paths.append(str(plugin_package_path.parent))
-    updateAvailablePlugins()
+    with _startup_phase("update available plugins"):
+        updateAvailablePlugins()
     unloadPlugin(plugin_package_name)
-    loadPlugin(plugin_package_name)
-    startPlugin(plugin_package_name)
+    with _profiled(profile_output_path):
+        with _startup_phase("load plugin"):
+            loadPlugin(plugin_package_name)
+        _start_plugin_with_timed_initialization(plugin_package_name)
     QSettings().setValue(f"PythonPlugins/{plugin_package_name}", "true")
     installer_plugins.getAllInstalled()
 
@@ -268,10 +518,61 @@ def _start_debugger(library_name: str | None, python_executable_path: Path) -> N
         )
 
 
+def _handle_daemon_message(
+    plugin_package_name: str,
+    message: dict[str, Any],
+    profile_output_path: Path | None = None,
+) -> dict[str, Any] | None:
+    from qgis.core import Qgis, QgsMessageLog
+    from qgis.utils import active_plugins, reloadPlugin
+
+    global _selectively_reloaded_module_names  # noqa: PLW0603
+
+    if message.get("command") != "reload":
+        return None
+
+    start_time = time.perf_counter()
+    reloaded_module_names = _get_plugin_module_names_to_reload(
+        plugin_package_name,
+        [Path(file_path) for file_path in message.get("changed_files", [])],
+    )
+    QgsMessageLog.logMessage(
+        f"reloading {plugin_package_name} plugin after changes"
+        + (
+            f" in modules {reloaded_module_names}"
+            if reloaded_module_names is not None
+            else ""
+        ),
+        "Bootstrap",
+        level=Qgis.Info,
+    )
+    _selectively_reloaded_module_names = reloaded_module_names
+    try:
+        with _profiled(profile_output_path):
+            reloadPlugin(plugin_package_name)
+    except Exception as e:
+        return {"event": "reload_failed", "error": str(e)}
+    finally:
+        _selectively_reloaded_module_names = None
+
+    # qgis shows the errors of loading the plugin instead of raising those
+    if plugin_package_name not in active_plugins:
+        return {
+            "event": "reload_failed",
+            "error": "plugin did not start, see the python error in qgis",
+        }
+    return {
+        "event": "reloaded",
+        "seconds": time.perf_counter() - start_time,
+        "reloaded_modules": reloaded_module_names,
+    }
+
+
 @dataclass
 class BootstrapConfig:
     daemon_socket_port: int
     runtime_library_paths: list[Path]
+    runtime_overlay_path: Path | None
     runtime_environment: dict[str, str]
     plugin_package_path: Path
     plugin_package_name: str
@@ -279,6 +580,7 @@ class BootstrapConfig:
     debugger_library: str | None
     bootstrap_python_executable_path: Path
     extra_plugin_package_names: list[str]
+    profile_output_path: Path | None
 
     def __str__(self) -> str:
         result = ""
@@ -290,40 +592,78 @@ class BootstrapConfig:
         return result
 
 
-def _do_bootstrap(config: BootstrapConfig) -> None:
-    from qgis.core import Qgis, QgsMessageLog
-    from qgis.PyQt.QtNetwork import QAbstractSocket, QHostAddress, QTcpSocket
-    from qgis.utils import iface
-
-    QgsMessageLog.logMessage("bootstrap called", "Bootstrap", level=Qgis.Info)
+def _send_daemon_message(socket: Any, message: dict[str, Any]) -> None:
+    socket.write(json.dumps(message).encode("utf-8") + b"\n")
+    socket.flush()
 
-    _socket = QTcpSocket()
-    atexit.register(_socket.abort)
-
-    def _on_socket_connected() -> None:
-        _socket.abort()
-        _socket.connected.disconnect()
-        _socket.errorOccurred.disconnect()
-        QgsMessageLog.logMessage("connected to daemon", "Bootstrap", level=Qgis.Info)
 
-        _setup_runtime_library_paths(config.runtime_library_paths)
+def _setup_development_mode(config: BootstrapConfig) -> None:
+    with _startup_phase("setup runtime library paths"):
+        _setup_runtime_library_paths(
+            config.runtime_library_paths, config.runtime_overlay_path
+        )
+    with _startup_phase("setup runtime environment"):
         _setup_runtime_environment(config.runtime_environment)
+    with _startup_phase("enable extra plugins"):
         _enable_extra_plugins(
             config.plugin_package_name, config.extra_plugin_package_names
         )
+    with _startup_phase("enable plugin"):
         _enable_plugin(
             config.plugin_package_name,
             config.plugin_package_path,
             config.plugin_dependency_package_names,
+            config.profile_output_path,
         )
+    with _startup_phase("start debugger"):
         _start_debugger(
             config.debugger_library, config.bootstrap_python_executable_path
         )
 
+
+def _do_bootstrap(config: BootstrapConfig) -> None:
+    from qgis.core import Qgis, QgsMessageLog
+    from qgis.PyQt.QtNetwork import QAbstractSocket, QHostAddress, QTcpSocket
+    from qgis.utils import iface
+
+    QgsMessageLog.logMessage("bootstrap called", "Bootstrap", level=Qgis.Info)
+    bootstrap_time = time.time()
+    connect_time = bootstrap_time
+
+    _socket = QTcpSocket()
+    atexit.register(_socket.abort)
+
+    # the connection is kept open for the commands from the daemon
+    def _on_socket_connected() -> None:
+        _socket.connected.disconnect()
+        QgsMessageLog.logMessage("connected to daemon", "Bootstrap", level=Qgis.Info)
+        _startup_phases.append(("connect to daemon", connect_time, time.time()))
+
+        try:
+            _setup_development_mode(config)
+        finally:
+            _send_daemon_message(
+                _socket, {"event": "startup_timeline", "phases": _startup_phases}
+            )
+
+    def _on_socket_ready_read() -> None:
+        while _socket.canReadLine():
+            try:
+                message = json.loads(bytes(_socket.readLine()).decode("utf-8"))
+            except ValueError:
+                continue
+            response = _handle_daemon_message(
+                config.plugin_package_name, message, config.profile_output_path
+            )
+            if response is not None:
+                _send_daemon_message(_socket, response)
+
     def _on_socket_error(error_type: QAbstractSocket.SocketError) -> None:
         _socket.abort()
-        _socket.connected.disconnect()
-        _socket.errorOccurred.disconnect()
+        for signal in [_socket.connected, _socket.readyRead, _socket.errorOccurred]:
+            # already disconnected signals raise an error
+            with contextlib.suppress(TypeError, RuntimeError):
+                signal.disconnect()
         if error_type == QAbstractSocket.SocketError.RemoteHostClosedError:
             QgsMessageLog.logMessage("daemon was closed", "Bootstrap", level=Qgis.Info)
         else:
@@ -332,13 +672,18 @@ def _do_bootstrap(config: BootstrapConfig) -> None:
             )
 
     def _on_qgis_initialized() -> None:
+        nonlocal connect_time
+
         QgsMessageLog.logMessage("qgis initialized", "Bootstrap", level=Qgis.Info)
+        connect_time = time.time()
+        _startup_phases.append(("qgis initialization", bootstrap_time, connect_time))
         _socket.connectToHost(
             QHostAddress.SpecialAddress.LocalHost, config.daemon_socket_port
         )
         QgsMessageLog.logMessage("connecting to daemon", "Bootstrap", level=Qgis.Info)
 
     _socket.connected.connect(_on_socket_connected)
+    _socket.readyRead.connect(_on_socket_ready_read)
     _socket.errorOccurred.connect(_on_socket_error)
     iface.initializationCompleted.connect(_on_qgis_initialized)
 
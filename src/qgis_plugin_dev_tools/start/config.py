@@ -34,3 +34,11 @@ class DevelopmentModeConfig:
     plugin_dependency_package_names: list[str]
     debugger_library: str | None
     extra_plugin_package_names: list[str]
+    # keep the daemon running and reload the plugin when its files change
+    hot_reload: bool = False
+    # site directory with only the runtime distributions, added to sys.path
+    runtime_overlay_path: Path | None = None
+    # write the startup timeline reported by the bootstrap to this file
+    startup_timeline_json_path: Path | None = None
+    # write the cProfile stats of loading and reloading the plugin to this file
+    profile_output_path: Path | None = None
@@ -17,33 +17,118 @@
 #  You should have received a copy of the GNU General Public License
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
-from collections.abc import Callable, Generator
+import json
+import logging
+import select
+import socket
+from collections.abc import Generator
 from contextlib import contextmanager
-from socketserver import BaseRequestHandler, TCPServer
+from types import TracebackType
+from typing import Any
+
+LOGGER = logging.getLogger(__name__)
 
 DAEMON_SERVER_TIMEOUT = 60
+DAEMON_SEND_TIMEOUT = 5
+RECEIVE_SIZE = 64 * 1024
 
 
-class SingleRequestHandlingTCPServer(TCPServer):
-    timeout = DAEMON_SERVER_TIMEOUT
-    is_timeout = False
+class DaemonConnection:
+    """
+    Connection from the bootstrap running in QGIS, which is kept open
+    to send commands to QGIS. Messages in both directions are json
+    objects, each on its own line.
+    """
 
-    def handle_timeout(self) -> None:
-        self.is_timeout = True
-        return super().handle_timeout()
+    def __init__(self, connection_socket: socket.socket) -> None:
+        self._socket = connection_socket
+        self._socket.settimeout(DAEMON_SEND_TIMEOUT)
+        self._buffer = b""
+        self._pending_messages: list[dict[str, Any]] = []
+        self.is_open = True
 
+    def send_message(self, message: dict[str, Any]) -> None:
+        try:
+            self._socket.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        except OSError as e:
+            LOGGER.debug("could not send message to qgis: %s", e)
+            self.close()
 
-@contextmanager
-def start_daemon_server() -> Generator[tuple[int, Callable[[], bool]], None, None]:
-    # TODO: add hot reload instead of closing the daemon?
-    # watcher = QFileSystemWatcher([str(p) for p in Path(plugin_path).rglob('*.py')])
-    # watcher.fileChanged.connect(send_something_to_socket)
+    def receive_messages(self, timeout: float = 0) -> list[dict[str, Any]]:
+        """
+        Returns the messages put back and the messages received within the
+        timeout, closing the connection if QGIS has closed it. If there are
+        messages put back, does not wait for more.
+        """
+        messages, self._pending_messages = self._pending_messages, []
+        if not self.is_open:
+            return messages
+
+        readable, _, _ = select.select(
+            [self._socket], [], [], 0 if messages else timeout
+        )
+        if readable:
+            try:
+                received = self._socket.recv(RECEIVE_SIZE)
+            except OSError as e:
+                LOGGER.debug("could not receive messages from qgis: %s", e)
+                received = b""
+            if not received:
+                self.close()
+            self._buffer += received
+
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            try:
+                messages.append(json.loads(line))
+            except ValueError:
+                LOGGER.debug("skipping invalid message %r", line)
+        return messages
+
+    def put_back_messages(self, messages: list[dict[str, Any]]) -> None:
+        """
+        Puts back received messages, which the next call of receive_messages
+        returns before any new messages.
+        """
+        self._pending_messages = messages + self._pending_messages
+
+    def close(self) -> None:
+        if self.is_open:
+            self.is_open = False
+            self._socket.close()
 
-    with SingleRequestHandlingTCPServer(("localhost", 0), BaseRequestHandler) as server:
-        _, port = server.server_address  # type: ignore[misc]
+    def __enter__(self) -> "DaemonConnection":
+        return self
 
-        def _handle_single_request_callback() -> bool:
-            server.handle_request()
-            return server.is_timeout
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
 
-        yield port, _handle_single_request_callback
+
+class DaemonServer:
+    def __init__(self, server_socket: socket.socket) -> None:
+        self._socket = server_socket
+        _, self.port = server_socket.getsockname()
+
+    def accept_connection(
+        self, timeout: float = DAEMON_SERVER_TIMEOUT
+    ) -> DaemonConnection | None:
+        """
+        Waits for the bootstrap to connect, returns None on timeout.
+        """
+        self._socket.settimeout(timeout)
+        try:
+            connection_socket, _ = self._socket.accept()
+        except TimeoutError:
+            return None
+        return DaemonConnection(connection_socket)
+
+
+@contextmanager
+def start_daemon_server() -> Generator[DaemonServer, None, None]:
+    with socket.create_server(("localhost", 0)) as server_socket:
+        yield DaemonServer(server_socket)
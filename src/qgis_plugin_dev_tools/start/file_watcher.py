@@ -0,0 +1,263 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import abc
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from types import TracebackType
+
+LOGGER = logging.getLogger(__name__)
+
+# editors save files in several steps, wait this long for more changes
+DEFAULT_DEBOUNCE_SECONDS = 0.3
+# report continuous changes at least this often
+MAX_DEBOUNCE_SECONDS = 2.0
+POLL_INTERVAL_SECONDS = 0.5
+
+IGNORED_DIRECTORY_NAMES = {"__pycache__"}
+IGNORED_FILE_SUFFIXES = {".pyc", ".pyo", ".swp", ".swx", ".tmp"}
+
+# from linux/inotify.h
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+INOTIFY_READ_SIZE = 64 * 1024
+
+
+def is_watched_path(path: Path) -> bool:
+    # byte code, hidden files and editor swap files do not change the plugin
+    return (
+        not any(
+            part.startswith(".") or part in IGNORED_DIRECTORY_NAMES
+            for part in path.parts
+        )
+        and path.suffix not in IGNORED_FILE_SUFFIXES
+        and not path.name.endswith("~")
+    )
+
+
+class FileWatcher(abc.ABC):
+    """
+    Watches the files in a directory tree for changes.
+    """
+
+    def __init__(self, root_path: Path) -> None:
+        self.root_path = root_path
+
+    def wait_for_changes(
+        self,
+        timeout: float,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+    ) -> set[Path]:
+        """
+        Returns the changed paths, or an empty set if nothing changed within
+        the timeout. After the first change the changes are collected until
+        none happen during the debounce time, so one save is reported once.
+        """
+        changed_paths = self._read_changes(timeout)
+        deadline = time.monotonic() + MAX_DEBOUNCE_SECONDS
+        while changed_paths and time.monotonic() < deadline:
+            more_changed_paths = self._read_changes(debounce_seconds)
+            if not more_changed_paths:
+                break
+            changed_paths |= more_changed_paths
+        return changed_paths
+
+    def close(self) -> None:  # noqa: B027
+        pass
+
+    def __enter__(self) -> "FileWatcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @abc.abstractmethod
+    def _read_changes(self, timeout: float) -> set[Path]:
+        pass
+
+    def _is_watched(self, path: Path) -> bool:
+        return is_watched_path(path.relative_to(self.root_path))
+
+
+class PollingFileWatcher(FileWatcher):
+    """
+    Compares the modification times and sizes of the files periodically.
+    """
+
+    def __init__(self, root_path: Path) -> None:
+        super().__init__(root_path)
+        self._snapshot = self._take_snapshot()
+
+    def _read_changes(self, timeout: float) -> set[Path]:
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self._take_snapshot()
+            changed_paths = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed_paths or (remaining := deadline - time.monotonic()) <= 0:
+                return changed_paths
+            time.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+
+    def _take_snapshot(self) -> dict[Path, tuple[int, int]]:
+        snapshot: dict[Path, tuple[int, int]] = {}
+        for directory, directory_names, file_names in os.walk(self.root_path):
+            directory_names[:] = [
+                name
+                for name in directory_names
+                if self._is_watched(Path(directory) / name)
+            ]
+            for file_name in file_names:
+                file_path = Path(directory) / file_name
+                if not self._is_watched(file_path):
+                    continue
+                try:
+                    file_stat = file_path.stat()
+                except OSError:
+                    continue
+                snapshot[file_path] = (file_stat.st_mtime_ns, file_stat.st_size)
+        return snapshot
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Receives the changes from the Linux kernel, without scanning the tree.
+    """
+
+    def __init__(self, root_path: Path) -> None:
+        super().__init__(root_path)
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "could not initialize inotify")
+        # watched directory of each watch descriptor
+        self._watched_directories: dict[int, Path] = {}
+        try:
+            self._watch_tree(root_path)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch_tree(self, directory_path: Path) -> None:
+        self._watch_directory(directory_path)
+        for directory, directory_names, _ in os.walk(directory_path):
+            directory_names[:] = [
+                name
+                for name in directory_names
+                if self._is_watched(Path(directory) / name)
+            ]
+            for name in directory_names:
+                self._watch_directory(Path(directory) / name)
+
+    def _watch_directory(self, directory_path: Path) -> None:
+        watch_descriptor = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory_path), INOTIFY_WATCH_MASK
+        )
+        if watch_descriptor < 0:
+            raise OSError(
+                ctypes.get_errno(), f"could not watch directory {directory_path}"
+            )
+        self._watched_directories[watch_descriptor] = directory_path
+
+    def _read_changes(self, timeout: float) -> set[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed_paths: set[Path] = set()
+        buffer = os.read(self._fd, INOTIFY_READ_SIZE)
+        offset = 0
+        while offset < len(buffer):
+            watch_descriptor, mask, _, name_length = INOTIFY_EVENT_HEADER.unpack_from(
+                buffer, offset
+            )
+            offset += INOTIFY_EVENT_HEADER.size
+            name = buffer[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                LOGGER.debug("missed file changes in %s", self.root_path)
+                changed_paths.add(self.root_path)
+                continue
+            directory_path = self._watched_directories.get(watch_descriptor)
+            if directory_path is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watched_directories[watch_descriptor]
+                continue
+
+            path = directory_path / os.fsdecode(name) if name else directory_path
+            if not self._is_watched(path):
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path)
+            changed_paths.add(path)
+
+        return changed_paths
+
+
+def create_file_watcher(root_path: Path) -> FileWatcher:
+    if sys.platform == "linux":
+        try:
+            return InotifyFileWatcher(root_path)
+        except (OSError, AttributeError) as e:
+            LOGGER.debug("could not use inotify, polling for changes: %s", e)
+    return PollingFileWatcher(root_path)
@@ -0,0 +1,96 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+from pathlib import Path
+from typing import Any
+
+from qgis_plugin_dev_tools.start.daemon_server import DaemonConnection
+from qgis_plugin_dev_tools.start.file_watcher import (
+    POLL_INTERVAL_SECONDS,
+    create_file_watcher,
+)
+from qgis_plugin_dev_tools.start.profile import log_profile_summary
+
+LOGGER = logging.getLogger(__name__)
+
+RELOAD_COMMAND = "reload"
+RELOADED_EVENT = "reloaded"
+RELOAD_FAILED_EVENT = "reload_failed"
+
+
+def run_hot_reload(
+    connection: DaemonConnection,
+    plugin_package_path: Path,
+    profile_output_path: Path | None = None,
+) -> None:
+    """
+    Sends a reload command to QGIS whenever the plugin files change,
+    until QGIS closes the connection or the command is interrupted.
+    If QGIS profiles the reloads, logs the profile after each reload.
+    """
+    LOGGER.info(
+        "watching %s for changes, press ctrl+c to stop", plugin_package_path.resolve()
+    )
+    try:
+        with create_file_watcher(plugin_package_path.resolve()) as watcher:
+            while connection.is_open:
+                for message in connection.receive_messages():
+                    _log_message(message, profile_output_path)
+                changed_paths = watcher.wait_for_changes(POLL_INTERVAL_SECONDS)
+                if changed_paths and connection.is_open:
+                    _send_reload_command(connection, watcher.root_path, changed_paths)
+    except KeyboardInterrupt:
+        LOGGER.info("stopped watching for changes")
+        return
+
+    LOGGER.info("qgis closed the connection")
+
+
+def _send_reload_command(
+    connection: DaemonConnection, root_path: Path, changed_paths: set[Path]
+) -> None:
+    LOGGER.info(
+        "reloading plugin after changes in %s",
+        ", ".join(str(path.relative_to(root_path)) for path in sorted(changed_paths)),
+    )
+    connection.send_message(
+        {
+            "command": RELOAD_COMMAND,
+            "changed_files": [str(path) for path in sorted(changed_paths)],
+        }
+    )
+
+
+def _log_message(message: dict[str, Any], profile_output_path: Path | None) -> None:
+    if message.get("event") == RELOADED_EVENT:
+        if (reloaded_module_names := message.get("reloaded_modules")) is not None:
+            LOGGER.info(
+                "reloaded plugin modules %s in %.3f s",
+                ", ".join(reloaded_module_names),
+                message.get("seconds", 0),
+            )
+        else:
+            LOGGER.info("reloaded plugin in %.2f s", message.get("seconds", 0))
+        if profile_output_path is not None:
+            log_profile_summary(profile_output_path)
+    elif message.get("event") == RELOAD_FAILED_EVENT:
+        LOGGER.error("reloading plugin failed: %s", message.get("error"))
+    else:
+        LOGGER.debug("received message %s", message)
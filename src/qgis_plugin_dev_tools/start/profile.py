@@ -0,0 +1,52 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import logging
+import pstats
+from pathlib import Path
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_SUMMARY_COUNT = 20
+
+
+def format_profile_summary(
+    profile_path: Path, count: int = DEFAULT_PROFILE_SUMMARY_COUNT
+) -> str:
+    """
+    Formats the functions with the largest cumulative time in the profile.
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(str(profile_path), stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(count)
+    return stream.getvalue().strip("\n")
+
+
+def log_profile_summary(
+    profile_path: Path, count: int = DEFAULT_PROFILE_SUMMARY_COUNT
+) -> None:
+    if not profile_path.exists():
+        LOGGER.warning("qgis did not write the profile to %s", profile_path)
+        return
+    LOGGER.info(
+        "profile of %s:\n%s",
+        profile_path,
+        format_profile_summary(profile_path, count),
+    )
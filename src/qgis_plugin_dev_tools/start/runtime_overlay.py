@@ -0,0 +1,241 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from importlib_metadata import Distribution
+
+from qgis_plugin_dev_tools.config import DevToolsConfig
+from qgis_plugin_dev_tools.utils.distribution_index import DistributionIndex
+from qgis_plugin_dev_tools.utils.distributions import (
+    get_distribution_metadata_path,
+    resolve_distribution_dependency_graph,
+)
+from qgis_plugin_dev_tools.utils.files import get_user_cache_directory_path
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
+LOGGER = logging.getLogger(__name__)
+
+RUNTIME_OVERLAY_FORMAT_VERSION = 1
+# processed by site.addsitedir like the path configuration files of site-packages
+OVERLAY_PATH_FILE_NAME = "qgis_plugin_dev_tools.pth"
+IGNORED_TOP_LEVEL_NAMES = {"..", "__pycache__"}
+# a running qgis may still import from an earlier overlay, so overlays are
+# removed only after they have not been used by a launch for this long
+UNUSED_OVERLAY_RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+
+@dataclass
+class RuntimeOverlay:
+    """
+    Directory added to the QGIS sys.path instead of the whole sys.path of the
+    launching environment. It links only the files of the given distributions,
+    so QGIS searches a short path and cannot import unrelated packages.
+    """
+
+    # linked files and directories by their name in the overlay,
+    # with multiple paths for namespace packages of multiple distributions
+    linked_paths: dict[str, list[Path]] = field(default_factory=dict)
+    # directories added to sys.path with a path configuration file
+    path_directories: list[Path] = field(default_factory=list)
+
+    def add_distribution(self, dist: Distribution) -> None:
+        metadata_path = get_distribution_metadata_path(dist)
+        top_level_names = {metadata_path.name}
+        if (file_paths := dist.files) is None:
+            LOGGER.warning("could not resolve %s contents to link", dist.name)
+            file_paths = []
+        # path configuration files of editable installs are linked as well
+        top_level_names.update(
+            Path(file_path).parts[0]
+            for file_path in file_paths
+            if Path(file_path).parts
+            and Path(file_path).parts[0] not in IGNORED_TOP_LEVEL_NAMES
+        )
+
+        for name in sorted(top_level_names):
+            self.add_linked_path(name, metadata_path.parent / name)
+
+    def add_linked_path(self, name: str, path: Path) -> None:
+        if not path.exists():
+            LOGGER.debug("skipping missing %s", path)
+            return
+        linked_paths = self.linked_paths.setdefault(name, [])
+        if path not in linked_paths:
+            linked_paths.append(path)
+
+    def add_path_directory(self, path: Path) -> None:
+        if path not in self.path_directories:
+            self.path_directories.append(path)
+
+    def get_digest(self) -> str:
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "version": RUNTIME_OVERLAY_FORMAT_VERSION,
+                    "linked_paths": {
+                        name: [str(path) for path in paths]
+                        for name, paths in sorted(self.linked_paths.items())
+                    },
+                    "path_directories": [str(path) for path in self.path_directories],
+                }
+            ).encode()
+        ).hexdigest()
+
+    def create(self, overlay_root_path: Path, name_prefix: str) -> Path:
+        """
+        Creates the overlay directory, unless one with the same contents exists
+        already, and removes the overlays with the same name prefix which have
+        not been used for a long time.
+        """
+        overlay_path = overlay_root_path / f"{name_prefix}-{self.get_digest()[:16]}"
+        if overlay_path.is_dir():
+            LOGGER.debug("reusing runtime overlay %s", overlay_path)
+            # the modification time tells when the overlay was last used
+            os.utime(overlay_path)
+            return overlay_path
+
+        LOGGER.debug("creating runtime overlay %s", overlay_path)
+        overlay_root_path.mkdir(parents=True, exist_ok=True)
+        # the whole directory is moved in place, so incomplete overlays are not used
+        temporary_path = Path(tempfile.mkdtemp(prefix=".tmp-", dir=overlay_root_path))
+        try:
+            self._populate(temporary_path)
+            try:
+                os.replace(temporary_path, overlay_path)
+            except OSError:
+                # created concurrently by another launch
+                if not overlay_path.is_dir():
+                    raise
+        finally:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+        _remove_unused_overlays(overlay_root_path, name_prefix)
+        return overlay_path
+
+    def _populate(self, directory_path: Path) -> None:
+        path_directories = list(self.path_directories)
+        try:
+            _link_paths(directory_path, self.linked_paths)
+        except OSError as e:
+            # creating symlinks needs extra privileges on windows
+            LOGGER.debug("could not link runtime files, adding directories: %s", e)
+            for child_path in directory_path.iterdir():
+                if child_path.is_symlink() or not child_path.is_dir():
+                    child_path.unlink()
+                else:
+                    shutil.rmtree(child_path)
+            path_directories.extend(
+                path.parent for paths in self.linked_paths.values() for path in paths
+            )
+
+        (directory_path / OVERLAY_PATH_FILE_NAME).write_text(
+            "".join(f"{path}\n" for path in dict.fromkeys(path_directories)),
+            encoding="utf-8",
+        )
+
+
+def _remove_unused_overlays(overlay_root_path: Path, name_prefix: str) -> None:
+    unused_since = time.time() - UNUSED_OVERLAY_RETENTION_SECONDS
+    for overlay_path in overlay_root_path.glob(f"{name_prefix}-*"):
+        try:
+            if overlay_path.stat().st_mtime >= unused_since:
+                continue
+        except OSError:
+            continue
+        LOGGER.debug("removing unused runtime overlay %s", overlay_path)
+        shutil.rmtree(overlay_path, ignore_errors=True)
+
+
+def _link_paths(directory_path: Path, linked_paths: dict[str, list[Path]]) -> None:
+    for name, paths in sorted(linked_paths.items()):
+        if len(paths) == 1 or not all(path.is_dir() for path in paths):
+            if len(paths) > 1:
+                LOGGER.warning(
+                    "%s is provided by multiple distributions, using %s",
+                    name,
+                    paths[0],
+                )
+            os.symlink(
+                paths[0], directory_path / name, target_is_directory=paths[0].is_dir()
+            )
+            continue
+
+        # namespace packages shared by distributions are merged
+        (directory_path / name).mkdir()
+        children: dict[str, list[Path]] = {}
+        for path in paths:
+            for child_path in sorted(path.iterdir()):
+                if child_path.name not in IGNORED_TOP_LEVEL_NAMES:
+                    children.setdefault(child_path.name, []).append(child_path)
+        _link_paths(directory_path / name, children)
+
+
+def get_runtime_overlay_root_path() -> Path:
+    return get_user_cache_directory_path() / "runtime-overlay"
+
+
+def create_runtime_overlay(
+    dev_tools_config: DevToolsConfig,
+    distribution_index: DistributionIndex,
+    extra_package_names: list[str],
+) -> Path:
+    """
+    Creates the runtime overlay of the plugin, linking the runtime requirements
+    and the distributions providing the extra packages, like extra plugins and
+    the debugger, with their recursive requirements.
+    """
+    with trace_span("create runtime overlay"):
+        root_distributions = list(dev_tools_config.runtime_distributions)
+        for package_name in extra_package_names:
+            if indexed_distributions := distribution_index.get_distributions_providing(
+                package_name
+            ):
+                root_distributions.append(indexed_distributions[0].get_distribution())
+            else:
+                LOGGER.warning("could not find the distribution of %s", package_name)
+
+        overlay = RuntimeOverlay()
+        for dist in resolve_distribution_dependency_graph(
+            root_distributions
+        ).distributions.values():
+            overlay.add_distribution(dist)
+
+        # the plugin is imported from its own location, so the
+        # reloaded and debugged files are the edited ones
+        overlay.add_path_directory(
+            dev_tools_config.plugin_package_path.parent.resolve()
+        )
+        for indexed_distribution in distribution_index.get_distributions_providing(
+            dev_tools_config.plugin_package_name
+        ):
+            metadata_path = Path(indexed_distribution.metadata_path)
+            overlay.add_linked_path(metadata_path.name, metadata_path)
+
+        return overlay.create(
+            get_runtime_overlay_root_path(), dev_tools_config.plugin_package_name
+        )
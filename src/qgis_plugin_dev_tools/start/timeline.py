@@ -0,0 +1,131 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from qgis_plugin_dev_tools.start.daemon_server import DaemonConnection
+
+LOGGER = logging.getLogger(__name__)
+
+STARTUP_TIMELINE_EVENT = "startup_timeline"
+# the command returns after this unless the timeline or the connection is needed
+DEFAULT_STARTUP_TIMELINE_TIMEOUT = 30
+# wait longer when the timeline, the profile or hot reload was requested
+REQUESTED_STARTUP_TIMELINE_TIMEOUT = 300
+WATERFALL_WIDTH = 40
+
+
+@dataclass
+class StartupPhase:
+    name: str
+    # seconds since qgis was launched
+    start_seconds: float
+    end_seconds: float
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.end_seconds - self.start_seconds
+
+
+@dataclass
+class StartupTimeline:
+    """
+    Phases of the development mode startup, from launching QGIS until
+    the plugin has started, timed by the bootstrap running in QGIS.
+    """
+
+    phases: list[StartupPhase] = field(default_factory=list)
+
+    @staticmethod
+    def from_message(message: dict[str, Any], launch_time: float) -> "StartupTimeline":
+        # the bootstrap sends wall clock times, which are comparable
+        # with the launch time since both run on the same machine
+        phases = sorted(
+            (
+                StartupPhase(name, start - launch_time, end - launch_time)
+                for name, start, end in message.get("phases", [])
+            ),
+            key=lambda phase: (phase.start_seconds, -phase.end_seconds),
+        )
+        if phases:
+            phases.insert(0, StartupPhase("launch qgis", 0.0, phases[0].start_seconds))
+        return StartupTimeline(phases)
+
+    @property
+    def total_seconds(self) -> float:
+        return max((phase.end_seconds for phase in self.phases), default=0.0)
+
+    def format_waterfall(self) -> str:
+        name_width = max([5, *(len(phase.name) for phase in self.phases)]) + 2
+        scale = WATERFALL_WIDTH / self.total_seconds if self.total_seconds else 0.0
+        lines = [f"{'phase':<{name_width}}{'start s':>9}{'duration s':>12}"]
+        for phase in self.phases:
+            bar_start = min(int(phase.start_seconds * scale), WATERFALL_WIDTH - 1)
+            bar_end = max(bar_start + 1, round(phase.end_seconds * scale))
+            lines.append(
+                f"{phase.name:<{name_width}}{phase.start_seconds:>9.3f}"
+                f"{phase.duration_seconds:>12.3f}  "
+                f"|{' ' * bar_start}{'#' * (bar_end - bar_start)}"
+                f"{' ' * (WATERFALL_WIDTH - bar_end)}|"
+            )
+        lines.append(f"{'total':<{name_width}}{'':>9}{self.total_seconds:>12.3f}")
+        return "\n".join(lines)
+
+    def write_json(self, file_path: Path) -> None:
+        file_path.write_text(
+            json.dumps(
+                {
+                    "phases": [asdict(phase) for phase in self.phases],
+                    "total_seconds": self.total_seconds,
+                },
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+
+
+def wait_for_startup_timeline(
+    connection: DaemonConnection,
+    launch_time: float,
+    timeout: float = DEFAULT_STARTUP_TIMELINE_TIMEOUT,
+) -> StartupTimeline | None:
+    """
+    Waits until the bootstrap reports the startup timeline after starting the
+    plugin, returns None if QGIS closes the connection, does not report it
+    within the timeout or the command is interrupted.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        while connection.is_open and (remaining := deadline - time.monotonic()) > 0:
+            messages = connection.receive_messages(timeout=remaining)
+            for index, message in enumerate(messages):
+                if message.get("event") == STARTUP_TIMELINE_EVENT:
+                    # later messages are for whoever reads the connection next
+                    connection.put_back_messages(messages[index + 1 :])
+                    return StartupTimeline.from_message(message, launch_time)
+                LOGGER.debug("received message %s", message)
+    except KeyboardInterrupt:
+        LOGGER.info("stopped waiting for the startup timeline")
+    return None
@@ -27,6 +27,7 @@ from qgis_plugin_dev_tools.translations.update_translations import (
     run_command,
     update_ts_file,
 )
+from qgis_plugin_dev_tools.utils.tracing import trace_span
 
 LOGGER = logging.getLogger(__name__)
 
@@ -57,7 +58,8 @@ def update_translation_files(
                 initial_unfinished_count = get_unfinished_translations_count(ts_file)
                 shutil.copy(ts_file, backup_ts_file)
 
-            update_ts_file(translatable_files, ts_file, pylupdate_command)
+            with trace_span("update ts file", language_code=language_code):
+                update_ts_file(translatable_files, ts_file, pylupdate_command)
 
             if backup_ts_file is None:
                 LOGGER.info("Updated translations in %s", ts_file)
@@ -25,6 +25,8 @@ import sys
 import tempfile
 from pathlib import Path
 
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -72,15 +74,16 @@ def update_ts_file(
 
 def run_command(args: list[str]) -> None:
     command: str | list[str] = args if os.name == "nt" else " ".join(args)
-    pros = subprocess.Popen(
-        command,
-        cwd=None,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        universal_newlines=True,
-        shell=True,
-    )
-    _, stderr = pros.communicate()
+    with trace_span("run command", command=Path(args[0]).name):
+        pros = subprocess.Popen(
+            command,
+            cwd=None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            shell=True,
+        )
+        _, stderr = pros.communicate()
     if (
         stderr
         and not stderr.startswith("warning")
@@ -0,0 +1,293 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from collections.abc import Generator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from importlib_metadata import Distribution, EntryPoint, PathDistribution
+from packaging.utils import canonicalize_name
+
+from qgis_plugin_dev_tools.utils.distributions import (
+    get_distribution_metadata_path,
+    get_distribution_top_level_names,
+    get_top_level_names_of_files,
+)
+from qgis_plugin_dev_tools.utils.files import get_user_cache_directory_path
+from qgis_plugin_dev_tools.utils.tracing import trace_span
+
+LOGGER = logging.getLogger(__name__)
+
+DISTRIBUTION_INDEX_FORMAT_VERSION = 1
+
+
+@dataclass
+class IndexedDistribution:
+    metadata_path: str
+    name: str
+    version: str
+    # top level names of the installed files, which are bundled
+    top_level_names: list[str]
+    # importable names like in packages_distributions, which also
+    # include the names declared for editable installs
+    package_names: list[str]
+    # as [group, name, value]
+    entry_points: list[list[str]]
+
+    def get_distribution(self) -> Distribution:
+        return PathDistribution(Path(self.metadata_path))
+
+    @staticmethod
+    def from_metadata_path(metadata_path: Path) -> "IndexedDistribution | None":
+        # the metadata path is a directory, or a single PKG-INFO
+        # file of the egg-info installs of older setuptools
+        dist = PathDistribution(metadata_path)
+        if not (name := dist.metadata["Name"]):
+            return None
+
+        if (file_paths := dist.files) is None:
+            # many distributions list no files, which is not worth a warning
+            # for each of those when indexing the whole environment
+            LOGGER.debug("could not resolve %s top level names", name)
+            top_level_names = []
+        else:
+            top_level_names = sorted(get_top_level_names_of_files(file_paths))
+        declared_names = (dist.read_text("top_level.txt") or "").split()
+        return IndexedDistribution(
+            metadata_path=str(metadata_path),
+            name=name,
+            version=dist.version,
+            top_level_names=top_level_names,
+            package_names=declared_names or top_level_names,
+            entry_points=[
+                [entry_point.group, entry_point.name, entry_point.value]
+                for entry_point in dist.entry_points
+            ],
+        )
+
+
+@dataclass
+class _SiteDirectoryState:
+    mtime_ns: int
+    # keyed by the metadata directory name, with the metadata directory mtime
+    distributions: dict[str, tuple[int, IndexedDistribution]] = field(
+        default_factory=dict
+    )
+
+
+@dataclass
+class DistributionIndex:
+    """
+    Metadata of the distributions installed in the sys.path directories. Each
+    directory is scanned again only if its mtime changed, and only the
+    distributions with changed metadata directories are read again.
+    """
+
+    site_directories: dict[str, _SiteDirectoryState] = field(default_factory=dict)
+
+    def iter_distributions(self) -> Generator[IndexedDistribution, None, None]:
+        """
+        Yields the distributions found first from sys.path for each name,
+        like importlib.metadata does.
+        """
+        found_names: set[str] = set()
+        for state in self.site_directories.values():
+            for _, indexed_distribution in state.distributions.values():
+                name = canonicalize_name(indexed_distribution.name)
+                if name not in found_names:
+                    found_names.add(name)
+                    yield indexed_distribution
+
+    def get_distributions_providing(
+        self, package_name: str
+    ) -> list[IndexedDistribution]:
+        return [
+            indexed_distribution
+            for indexed_distribution in self.iter_distributions()
+            if package_name in indexed_distribution.package_names
+        ]
+
+    def get_top_level_names(self, dist: Distribution) -> set[str]:
+        metadata_path = get_distribution_metadata_path(dist)
+        state = self.site_directories.get(str(metadata_path.parent.resolve()))
+        if state is not None and metadata_path.name in state.distributions:
+            _, indexed_distribution = state.distributions[metadata_path.name]
+            return set(indexed_distribution.top_level_names)
+        return get_distribution_top_level_names(dist)
+
+    def get_entry_points(self, group: str) -> list[EntryPoint]:
+        return [
+            EntryPoint(name=name, value=value, group=entry_point_group)
+            for indexed_distribution in self.iter_distributions()
+            for entry_point_group, name, value in indexed_distribution.entry_points
+            if entry_point_group == group
+        ]
+
+    def refresh(self, search_paths: list[str]) -> bool:
+        """
+        Updates the index to match the search paths. Returns whether it changed.
+        """
+        site_directories: dict[str, _SiteDirectoryState] = {}
+        changed = False
+
+        for search_path in search_paths:
+            path = Path(search_path or ".").resolve()
+            if str(path) in site_directories:
+                continue
+            try:
+                mtime_ns = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            if not path.is_dir():
+                continue
+
+            previous_state = self.site_directories.get(str(path))
+            if previous_state is not None and previous_state.mtime_ns == mtime_ns:
+                site_directories[str(path)] = previous_state
+                continue
+
+            LOGGER.debug("indexing distributions in %s", path)
+            changed = True
+            site_directories[str(path)] = _scan_site_directory(
+                path, mtime_ns, previous_state
+            )
+
+        changed = changed or site_directories.keys() != self.site_directories.keys()
+        self.site_directories = site_directories
+        return changed
+
+    @staticmethod
+    def read(index_file_path: Path) -> "DistributionIndex":
+        try:
+            contents = json.loads(index_file_path.read_text(encoding="utf-8"))
+            if contents["version"] != DISTRIBUTION_INDEX_FORMAT_VERSION:
+                return DistributionIndex()
+            return DistributionIndex(
+                site_directories={
+                    path: _SiteDirectoryState(
+                        mtime_ns=state["mtime_ns"],
+                        distributions={
+                            name: (mtime_ns, IndexedDistribution(**distribution))
+                            for name, (mtime_ns, distribution) in state[
+                                "distributions"
+                            ].items()
+                        },
+                    )
+                    for path, state in contents["site_directories"].items()
+                }
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            LOGGER.debug("could not read distribution index %s", index_file_path)
+            return DistributionIndex()
+
+    def write(self, index_file_path: Path) -> None:
+        index_file_path.parent.mkdir(parents=True, exist_ok=True)
+        # replace the whole file at once so concurrent runs never read partial files
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            prefix=".tmp-",
+            dir=index_file_path.parent,
+            delete=False,
+        ) as temporary_file:
+            json.dump(
+                {
+                    "version": DISTRIBUTION_INDEX_FORMAT_VERSION,
+                    "site_directories": {
+                        path: asdict(state)
+                        for path, state in self.site_directories.items()
+                    },
+                },
+                temporary_file,
+            )
+        try:
+            os.replace(temporary_file.name, index_file_path)
+        finally:
+            Path(temporary_file.name).unlink(missing_ok=True)
+
+
+_distribution_index: DistributionIndex | None = None
+
+
+def get_distribution_index() -> DistributionIndex:
+    """
+    Returns the index of the distributions in the current sys.path,
+    updating the index stored in the user cache directory if needed.
+    """
+    global _distribution_index  # noqa: PLW0603
+
+    index_file_path = _get_index_file_path()
+    with trace_span("refresh distribution index"):
+        if _distribution_index is None:
+            _distribution_index = DistributionIndex.read(index_file_path)
+        if _distribution_index.refresh(sys.path):
+            try:
+                _distribution_index.write(index_file_path)
+            except OSError as e:
+                LOGGER.debug("could not write distribution index: %s", e)
+
+    return _distribution_index
+
+
+def _get_index_file_path() -> Path:
+    # each environment has its own index
+    environment_key = hashlib.sha256(sys.prefix.encode()).hexdigest()[:16]
+    return (
+        get_user_cache_directory_path()
+        / "distribution-index"
+        / f"{environment_key}.json"
+    )
+
+
+def _scan_site_directory(
+    path: Path, mtime_ns: int, previous_state: _SiteDirectoryState | None
+) -> _SiteDirectoryState:
+    state = _SiteDirectoryState(mtime_ns=mtime_ns)
+
+    for metadata_path in sorted(path.iterdir()):
+        if not metadata_path.name.endswith((".dist-info", ".egg-info")):
+            continue
+        try:
+            metadata_mtime_ns = metadata_path.stat().st_mtime_ns
+        except OSError:
+            continue
+
+        previous = (
+            previous_state.distributions.get(metadata_path.name)
+            if previous_state is not None
+            else None
+        )
+        if previous is not None and previous[0] == metadata_mtime_ns:
+            state.distributions[metadata_path.name] = previous
+            continue
+
+        indexed_distribution = IndexedDistribution.from_metadata_path(metadata_path)
+        if indexed_distribution is not None:
+            state.distributions[metadata_path.name] = (
+                metadata_mtime_ns,
+                indexed_distribution,
+            )
+
+    return state
@@ -16,13 +16,18 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+import hashlib
 import importlib.util
 import logging
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
 from typing import TYPE_CHECKING, cast
 
 import importlib_metadata
-from importlib_metadata import Distribution, distribution
+from importlib_metadata import Distribution, PackagePath, distribution
 from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
 
 if TYPE_CHECKING:
     from importlib.machinery import SourceFileLoader
@@ -31,11 +36,51 @@ if TYPE_CHECKING:
 LOGGER = logging.getLogger(__name__)
 
 
+def get_distribution_metadata_path(dist: Distribution) -> Path:
+    # files are resolved relative to the metadata path, but only
+    # the path based distributions found from sys.path have it
+    return Path(dist._path)  # type: ignore[attr-defined]
+
+
+def get_distribution_record_hash(dist: Distribution) -> str:
+    """
+    Returns a hash of the package files and their hashes listed in the
+    distribution record, which changes whenever the distribution is reinstalled
+    with other files. Files which depend on the installer rather than the
+    distribution contents are left out, so the same wheel installed with pip,
+    uv or without compiling gives the same hash.
+    """
+    file_rows = sorted(
+        f"{file_path.as_posix()},"
+        + (f"{file_path.hash.mode}={file_path.hash.value}" if file_path.hash else "")
+        for file_path in dist.files or []
+        if not _is_installer_specific_file(file_path)
+    )
+    return hashlib.sha256("\n".join(file_rows).encode()).hexdigest()
+
+
+def _is_installer_specific_file(file_path: PackagePath) -> bool:
+    # the metadata directory lists the installer and the record itself, byte
+    # code depends on the interpreter and scripts outside the site directory
+    # are generated for the environment
+    return (
+        not file_path.parts
+        or file_path.parts[0] == ".."
+        or file_path.parts[0].endswith((".dist-info", ".egg-info"))
+        or "__pycache__" in file_path.parts
+        or file_path.suffix in (".pyc", ".pyo")
+    )
+
+
 def get_distribution_top_level_names(dist: Distribution) -> set[str]:
     if (file_paths := dist.files) is None:
         LOGGER.warning("could not resolve %s top level names", dist.name)
         return set()
 
+    return get_top_level_names_of_files(file_paths)
+
+
+def get_top_level_names_of_files(file_paths: list[PackagePath]) -> set[str]:
     return {
         top_level_directory_name
         for path in file_paths
@@ -53,35 +98,129 @@ def get_distribution_top_level_names(dist: Distribution) -> set[str]:
     }
 
 
-def get_distribution_requirements(dist: Distribution) -> dict[str, Distribution]:
-    requirement_distributions: dict[str, Distribution] = {}
-
-    requirements = [
-        Requirement(requirement.split(" ")[0])
-        for requirement in dist.requires or []
-        if "extra ==" not in requirement
-    ]
-    for requirement in requirements:
-        try:
-            requirement_distributions[requirement.name] = distribution(requirement.name)
-        except importlib_metadata.PackageNotFoundError:
-            LOGGER.warning(
-                "Getting distribution for %s failed. "
-                "This may be caused by including builtin "
-                "packages as requirements.",
-                requirement.name,
-            )
-            spec = importlib.util.find_spec(requirement.name)
-            loader = cast("SourceFileLoader | None", spec.loader) if spec else None
-            if spec and loader and loader.is_package(requirement.name):
-                LOGGER.error("Could not find package %s", requirement.name)
+@dataclass
+class DistributionDependencyGraph:
+    """
+    Recursive requirements of the root distributions keyed by the normalized
+    distribution names, each distribution resolved only once. Requirements
+    closing a dependency cycle are left out, so the graph is acyclic.
+    """
+
+    root_names: list[str]
+    distributions: dict[str, Distribution] = field(default_factory=dict)
+    requirements: dict[str, list[str]] = field(default_factory=dict)
+
+    def get_dependencies(self) -> list[Distribution]:
+        """
+        Returns the required distributions which are not roots themselves,
+        in the order those were first found.
+        """
+        return [
+            dist
+            for name, dist in self.distributions.items()
+            if name not in self.root_names
+        ]
+
+
+def resolve_distribution_dependency_graph(
+    root_distributions: list[Distribution],
+    find_distribution: Callable[[str], Distribution | None] | None = None,
+) -> DistributionDependencyGraph:
+    """
+    Resolves the recursive requirements of the root distributions, by default
+    finding the required distributions from the current environment.
+    """
+    find_distribution = find_distribution or _find_distribution
+    graph = DistributionDependencyGraph(
+        root_names=[canonicalize_name(dist.name) for dist in root_distributions]
+    )
+    graph.distributions.update(zip(graph.root_names, root_distributions, strict=True))
+    missing_names: set[str] = set()
+    resolved_names: set[str] = set()
+
+    for root_name in graph.root_names:
+        if root_name in resolved_names:
             continue
 
-    nested_requirement_distributions: dict[str, Distribution] = {}
-    for requirement_distribution in requirement_distributions.values():
-        nested_requirement_distributions.update(
-            get_distribution_requirements(requirement_distribution)
-        )
-    requirement_distributions.update(nested_requirement_distributions)
+        # depth first with an explicit stack, the names on the stack are
+        # the ones being resolved, so requiring those again closes a cycle
+        graph.requirements[root_name] = []
+        stack: list[tuple[str, Iterator[str]]] = [
+            (root_name, _iter_requirement_names(graph.distributions[root_name]))
+        ]
+        resolving_names = {root_name}
+
+        while stack:
+            name, requirement_names = stack[-1]
+            requirement_name = next(requirement_names, None)
 
-    return requirement_distributions
+            if requirement_name is None:
+                stack.pop()
+                resolving_names.discard(name)
+                resolved_names.add(name)
+                continue
+
+            if requirement_name in resolving_names:
+                LOGGER.debug(
+                    "ignoring cyclic requirement %s of %s", requirement_name, name
+                )
+                continue
+
+            if requirement_name in missing_names:
+                continue
+
+            if requirement_name not in graph.distributions:
+                if (
+                    requirement_distribution := find_distribution(requirement_name)
+                ) is None:
+                    missing_names.add(requirement_name)
+                    continue
+                graph.distributions[requirement_name] = requirement_distribution
+
+            graph.requirements[name].append(requirement_name)
+
+            if requirement_name not in resolved_names:
+                graph.requirements[requirement_name] = []
+                resolving_names.add(requirement_name)
+                stack.append(
+                    (
+                        requirement_name,
+                        _iter_requirement_names(graph.distributions[requirement_name]),
+                    )
+                )
+
+    return graph
+
+
+def get_distribution_requirements(dist: Distribution) -> dict[str, Distribution]:
+    graph = resolve_distribution_dependency_graph([dist])
+    return {
+        name: requirement_distribution
+        for name, requirement_distribution in graph.distributions.items()
+        if name not in graph.root_names
+    }
+
+
+def _iter_requirement_names(dist: Distribution) -> Iterator[str]:
+    for requirement in dist.requires or []:
+        if "extra ==" not in requirement:
+            yield canonicalize_name(Requirement(requirement).name)
+
+
+def _find_distribution(name: str) -> Distribution | None:
+    try:
+        return distribution(name)
+    except importlib_metadata.PackageNotFoundError:
+        LOGGER.warning(
+            "Getting distribution for %s failed. "
+            "This may be caused by including builtin "
+            "packages as requirements.",
+            name,
+        )
+        # canonical names use dashes, importable packages use underscores
+        package_name = name.replace("-", "_")
+        spec = importlib.util.find_spec(package_name)
+        loader = cast("SourceFileLoader | None", spec.loader) if spec else None
+        if spec and loader and loader.is_package(package_name):
+            LOGGER.error("Could not find package %s", name)
+        return None
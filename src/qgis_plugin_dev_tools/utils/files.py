@@ -0,0 +1,102 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import errno
+import logging
+import os
+import shutil
+import sys
+from pathlib import Path
+
+if sys.platform == "linux":
+    import fcntl
+
+LOGGER = logging.getLogger(__name__)
+
+# ioctl request for cloning a file on copy-on-write file systems (linux/fs.h)
+FICLONE = 0x40049409
+
+# file system pairs as (source device, target device) not supporting cloning,
+# so that the failing clone is not attempted again for each file
+_clone_unsupported_devices: set[tuple[int, int]] = set()
+
+
+def get_user_cache_directory_path() -> Path:
+    if cache_home := os.environ.get("XDG_CACHE_HOME"):
+        cache_root_path = Path(cache_home)
+    elif os.name == "nt" and (local_app_data := os.environ.get("LOCALAPPDATA")):
+        cache_root_path = Path(local_app_data)
+    else:
+        cache_root_path = Path.home() / ".cache"
+    return cache_root_path / "qgis-plugin-dev-tools"
+
+
+def link_or_copy_file(
+    source_file: Path | str, target_file: Path | str, allow_hard_link: bool = True
+) -> None:
+    """
+    Clones the file to the target as a copy-on-write reflink if the file system
+    supports it, and otherwise hard links the file if allowed, falling back to
+    copying the file if linking is not possible, for example across file systems.
+
+    Hard links share the contents with the source, so those should only be used
+    for files which are not modified in place. Reflinks are independent copies.
+    """
+    if _clone_file(Path(source_file), Path(target_file)):
+        return
+
+    if allow_hard_link:
+        try:
+            os.link(source_file, target_file)
+            return
+        except OSError:
+            pass
+
+    shutil.copy2(source_file, target_file)
+
+
+def write_text_replacing_links(file_path: Path, contents: str) -> None:
+    """
+    Writes the text to a new file in place of the existing one,
+    so that any other hard links to the same file are not modified.
+    """
+    file_path.unlink(missing_ok=True)
+    file_path.write_text(contents, encoding="utf-8")
+
+
+def _clone_file(source_file: Path, target_file: Path) -> bool:
+    if sys.platform != "linux":
+        return False
+
+    devices = (source_file.stat().st_dev, target_file.parent.stat().st_dev)
+    if devices in _clone_unsupported_devices:
+        return False
+
+    try:
+        with open(source_file, "rb") as source, open(target_file, "wb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+    except OSError as e:
+        target_file.unlink(missing_ok=True)
+        if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL):
+            LOGGER.debug("file cloning not supported for %s", target_file.parent)
+            _clone_unsupported_devices.add(devices)
+        return False
+
+    shutil.copystat(source_file, target_file)
+    return True
@@ -0,0 +1,141 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+# trace event format spec in
+# https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+LOGGER = logging.getLogger(__name__)
+
+TraceEvent = dict[str, Any]
+
+
+@dataclass
+class Tracer:
+    """
+    Records the spans as complete trace events, which can be opened
+    in Perfetto or chrome://tracing.
+    """
+
+    events: list[TraceEvent] = field(default_factory=list)
+    pid: int = field(default_factory=os.getpid)
+
+    def write(self, file_path: Path) -> None:
+        # timestamps are from a monotonic clock shared by all the processes,
+        # show those relative to the earliest recorded event
+        origin = min((event["ts"] for event in self.events), default=0)
+        events = [{**event, "ts": event["ts"] - origin} for event in self.events]
+        process_names = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": "qpdt" if pid == self.pid else "qpdt worker"},
+            }
+            for pid in sorted({event["pid"] for event in events})
+        ]
+        file_path.write_text(
+            json.dumps(
+                {"traceEvents": process_names + events, "displayTimeUnit": "ms"}
+            ),
+            encoding="utf-8",
+        )
+
+
+_tracer: Tracer | None = None
+
+
+def start_tracing() -> None:
+    global _tracer  # noqa: PLW0603
+    _tracer = Tracer()
+
+
+def stop_tracing(trace_file_path: Path) -> None:
+    global _tracer  # noqa: PLW0603
+    if _tracer is None:
+        return
+    _tracer.write(trace_file_path)
+    LOGGER.info("wrote trace to %s", trace_file_path.resolve())
+    _tracer = None
+
+
+def is_tracing() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def trace_span(name: str, **args: Any) -> Generator[None, None, None]:
+    """
+    Records the duration of the block as a span if tracing is started,
+    otherwise does nothing. Spans of the same thread nest by their times.
+    """
+    if _tracer is None:
+        yield
+        return
+
+    tracer = _tracer
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        tracer.events.append(
+            {
+                "name": name,
+                "cat": "qpdt",
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": (time.perf_counter_ns() - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {key: str(value) for key, value in args.items()},
+            }
+        )
+
+
+@contextmanager
+def collect_worker_trace_events(
+    enabled: bool,
+) -> Generator[list[TraceEvent], None, None]:
+    """
+    Records the spans of a worker process into the yielded list, so that
+    those can be returned to the main process and added with add_trace_events.
+    """
+    global _tracer  # noqa: PLW0603
+    # forked workers inherit the tracer of the main process
+    previous_tracer = _tracer
+    _tracer = Tracer() if enabled else None
+    try:
+        yield _tracer.events if _tracer is not None else []
+    finally:
+        _tracer = previous_tracer
+
+
+def add_trace_events(events: list[TraceEvent]) -> None:
+    if _tracer is not None:
+        _tracer.events.extend(events)
@@ -0,0 +1,144 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import os
+import zipfile
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING
+from zipfile import ZipFile
+
+from importlib_metadata import Distribution
+from packaging.utils import (
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_wheel_filename,
+)
+from packaging.version import Version
+
+if TYPE_CHECKING:
+    from importlib_metadata._meta import SimplePath
+
+LOGGER = logging.getLogger(__name__)
+
+
+class WheelDistribution(Distribution):
+    """
+    Distribution read directly from a wheel file without installing it. The
+    wheel members are the installed files, relative to the wheel root.
+    """
+
+    def __init__(self, wheel_path: Path) -> None:
+        # Distribution has no state of its own to initialize, all the
+        # metadata is read through read_text and locate_file
+        self.wheel_path = wheel_path
+
+    @cached_property
+    def member_names(self) -> set[str]:
+        with ZipFile(self.wheel_path) as wheel_file:
+            return set(wheel_file.namelist())
+
+    @cached_property
+    def metadata_directory_name(self) -> str:
+        for member_name in sorted(self.member_names):
+            parts = PurePosixPath(member_name).parts
+            if (
+                len(parts) == 2  # noqa: PLR2004
+                and parts[0].endswith(".dist-info")
+                and parts[1] == "METADATA"
+            ):
+                return parts[0]
+        raise ValueError(f"{self.wheel_path} has no .dist-info directory")
+
+    def read_member(self, member_name: str) -> bytes:
+        with ZipFile(self.wheel_path) as wheel_file:
+            return wheel_file.read(member_name)
+
+    def read_text(self, filename: str | os.PathLike[str]) -> str | None:
+        member_name = f"{self.metadata_directory_name}/{os.fspath(filename)}"
+        if member_name not in self.member_names:
+            return None
+        return self.read_member(member_name).decode("utf-8")
+
+    def locate_file(self, path: str | os.PathLike[str]) -> "SimplePath":
+        # zipfile.Path implements the path protocol of the distribution files,
+        # but the typeshed signatures of joinpath and __truediv__ return
+        # zipfile.Path instead of the protocol, which mypy does not accept
+        return self._wheel_root / os.fspath(path)  # type: ignore[return-value]
+
+    @cached_property
+    def _wheel_root(self) -> zipfile.Path:
+        # joined paths share the member lookup of the root
+        return zipfile.Path(self.wheel_path)
+
+
+@dataclass
+class Wheelhouse:
+    """
+    Directory of wheel files, from which the runtime requirements are bundled
+    instead of the installed distributions. Only pure Python wheels are used,
+    since those work on every platform the plugin is installed on.
+    """
+
+    wheelhouse_path: Path
+
+    @cached_property
+    def _wheel_paths(self) -> dict[str, tuple[Version, Path]]:
+        # the newest pure Python wheel of each distribution
+        wheel_paths: dict[str, tuple[Version, Path]] = {}
+        for wheel_path in sorted(self.wheelhouse_path.glob("*.whl")):
+            try:
+                name, version, _, tags = parse_wheel_filename(wheel_path.name)
+            except InvalidWheelFilename:
+                LOGGER.warning("skipping invalid wheel file name %s", wheel_path.name)
+                continue
+
+            if not any(tag.abi == "none" and tag.platform == "any" for tag in tags):
+                LOGGER.debug("skipping platform specific wheel %s", wheel_path.name)
+                continue
+
+            if name not in wheel_paths or wheel_paths[name][0] < version:
+                wheel_paths[name] = (version, wheel_path)
+
+        return wheel_paths
+
+    def get_distribution(self, name: str) -> WheelDistribution:
+        if (wheel := self._wheel_paths.get(canonicalize_name(name))) is None:
+            raise ValueError(
+                f"could not find a pure Python wheel for {name}"
+                f" in {self.wheelhouse_path}"
+            )
+
+        _, wheel_path = wheel
+        LOGGER.debug("using %s for %s", wheel_path.name, name)
+        return WheelDistribution(wheel_path)
+
+    def find_distribution(self, name: str) -> WheelDistribution | None:
+        try:
+            return self.get_distribution(name)
+        except ValueError:
+            LOGGER.warning(
+                "skipping recursively found runtime requirement %s"
+                " because it has no pure Python wheel in %s",
+                name,
+                self.wheelhouse_path,
+            )
+            return None
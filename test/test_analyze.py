@@ -0,0 +1,106 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from qgis_plugin_dev_tools.analyze import (
+    SIZE_BUDGET_NAME,
+    ZipSizeReport,
+    report_zip_size,
+)
+
+
+@pytest.fixture
+def plugin_zip(tmp_path: Path) -> Path:
+    zip_file_path = tmp_path / "Plugin-1.0.zip"
+    with zipfile.ZipFile(zip_file_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("Plugin/", b"")
+        zip_file.writestr("Plugin/__init__.py", b"")
+        zip_file.writestr("Plugin/metadata.txt", b"[general]\n")
+        zip_file.writestr("Plugin/_vendor/__init__.py", b"")
+        zip_file.writestr(
+            "Plugin/_vendor/lib/__init__.py",
+            "".join(f"x{i} = {i}\n" for i in range(1000)),
+        )
+        zip_file.writestr("Plugin/_vendor/lib/data.bin", bytes(range(256)) * 4)
+        zip_file.writestr("Plugin/_vendor/lib_helper.py", b"")
+        zip_file.writestr("Plugin/_vendor/unrecorded/__init__.py", b"")
+        zip_file.writestr(
+            "Plugin/_vendor/lib-1.0.dist-info/RECORD",
+            b"lib/__init__.py,,\nlib-1.0.dist-info/RECORD,,\nlib_helper.py,,\n",
+        )
+    return zip_file_path
+
+
+def _get_sizes(entries: list) -> dict[str, int]:
+    return {entry.name: entry.file_count for entry in entries}
+
+
+def test_zip_size_report_groups_members(plugin_zip: Path):
+    report = ZipSizeReport.from_zip_file(plugin_zip, largest_file_count=2)
+
+    assert report.zip_file_size == plugin_zip.stat().st_size
+    with zipfile.ZipFile(plugin_zip) as zip_file:
+        assert report.total.file_size == sum(
+            member_info.file_size for member_info in zip_file.infolist()
+        )
+    assert _get_sizes(report.distributions) == {
+        "lib": 4,
+        "(plugin)": 3,
+        "(unknown)": 1,
+    }
+    assert _get_sizes(report.top_level_packages) == {
+        "Plugin": 3,
+        "lib": 2,
+        "lib-1.0.dist-info": 1,
+        "lib_helper": 1,
+        "unrecorded": 1,
+    }
+    assert _get_sizes(report.file_types) == {
+        ".py": 5,
+        ".txt": 1,
+        ".bin": 1,
+        "(none)": 1,
+    }
+    assert [entry.name for entry in report.largest_files] == [
+        "Plugin/_vendor/lib/__init__.py",
+        "Plugin/_vendor/lib/data.bin",
+    ]
+    assert "lib" in report.format_table()
+
+
+def test_report_zip_size_fails_when_zip_grows_past_budget(
+    plugin_zip: Path, tmp_path: Path
+):
+    size_budget_path = tmp_path / SIZE_BUDGET_NAME
+
+    report_zip_size(plugin_zip, size_budget_path, 5.0, update_budget=True)
+    report_zip_size(plugin_zip, size_budget_path, 5.0)
+
+    with zipfile.ZipFile(plugin_zip, "a", zipfile.ZIP_STORED) as zip_file:
+        zip_file.writestr("Plugin/_vendor/lib/large.bin", bytes(range(256)) * 40)
+
+    with pytest.raises(ValueError, match="exceeds the size budget") as exc_info:
+        report_zip_size(plugin_zip, size_budget_path, 5.0)
+    assert "lib grew by" in str(exc_info.value)
+
+    report_zip_size(plugin_zip, size_budget_path, 1000.0)
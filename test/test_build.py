@@ -17,16 +17,32 @@
 #  You should have received a copy of the GNU General Public License
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
+import json
 import os
 import sys
 import textwrap
 import zipfile
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
 import pytest
+from importlib_metadata import PathDistribution
 
 from qgis_plugin_dev_tools.build import copy_license, make_plugin_zip
+from qgis_plugin_dev_tools.build.archive import (
+    PluginArchive,
+    ZipCompression,
+    get_source_date_epoch,
+)
+from qgis_plugin_dev_tools.build.config import BuildConfig
+from qgis_plugin_dev_tools.build.lockfile import LockedDistribution, Lockfile
+from qgis_plugin_dev_tools.build.packaging import copy_distribution_files
+from qgis_plugin_dev_tools.build.timings import BuildTimings
 from qgis_plugin_dev_tools.config import DevToolsConfig, VersionNumberSource
+from qgis_plugin_dev_tools.utils.distributions import (
+    get_distribution_metadata_path,
+    get_distribution_record_hash,
+)
+from qgis_plugin_dev_tools.utils.tracing import start_tracing, stop_tracing
 
 
 @pytest.fixture
@@ -353,6 +369,580 @@ def test_make_zip_does_not_create_license_if_configured_one_does_not_exist(
     assert "LICENSE" not in plugin_files
 
 
+def test_make_zip_incrementally_copies_only_changed_files(
+    dev_tools_config_minimal: "DevToolsConfig", tmp_path: Path, plugin_dir: Path
+):
+    target_path = tmp_path / "dist"
+    build_path = tmp_path / ".qpdt" / "build"
+    expected_zip = target_path / "Plugin-test-version.zip"
+    # other tests leave their plugin directories to sys.path
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    (plugin_dir / "module.py").write_text("import pytest\n")
+
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        target_path,
+        override_plugin_version="test-version",
+        build_config=BuildConfig(build_directory_path=build_path),
+    )
+
+    vendored_file = (
+        build_path / "tree" / "Plugin" / "_vendor" / "pytest" / "__init__.py"
+    )
+    vendored_file_mtime = vendored_file.stat().st_mtime_ns
+    assert "import Plugin._vendor.pytest as pytest" in _get_file_from_zip(
+        expected_zip, "Plugin/module.py"
+    )
+
+    (plugin_dir / "module.py").write_text("import pytest\nimport os\n")
+    (plugin_dir / "other.py").write_text("from pytest import fixture\n")
+
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        target_path,
+        override_plugin_version="test-version",
+        build_config=BuildConfig(build_directory_path=build_path),
+    )
+
+    assert vendored_file.stat().st_mtime_ns == vendored_file_mtime
+    assert "import os" in _get_file_from_zip(expected_zip, "Plugin/module.py")
+    assert "from Plugin._vendor.pytest import fixture" in _get_file_from_zip(
+        expected_zip, "Plugin/other.py"
+    )
+    assert "version=test-version" in _get_file_from_zip(
+        expected_zip, "Plugin/metadata.txt"
+    ).replace(" ", "")
+
+    (plugin_dir / "other.py").unlink()
+
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        target_path,
+        override_plugin_version="test-version",
+        build_config=BuildConfig(build_directory_path=build_path),
+    )
+
+    assert "other.py" not in _get_file_names(expected_zip, "Plugin/")
+
+
+@pytest.mark.parametrize(
+    "config_fixture_name", ["dev_tools_config", "dev_tools_config_minimal"]
+)
+def test_make_zip_streamed_matches_staged_build(
+    config_fixture_name: str,
+    request: pytest.FixtureRequest,
+    tmp_path: Path,
+    plugin_dir: Path,
+):
+    config: DevToolsConfig = request.getfixturevalue(config_fixture_name)
+    config.plugin_package_path = plugin_dir
+    (plugin_dir / "module.py").write_text("import pytest\nfrom pytest import mark\n")
+
+    make_plugin_zip(config, tmp_path / "staged", override_plugin_version="1.0")
+    make_plugin_zip(
+        config,
+        tmp_path / "streamed",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(stream=True),
+    )
+
+    assert _get_file_contents(tmp_path / "streamed" / "Plugin-1.0.zip") == (
+        _get_file_contents(tmp_path / "staged" / "Plugin-1.0.zip")
+    )
+
+
+def test_make_zip_with_parallel_rewriting_matches_serial_build(
+    dev_tools_config_minimal: "DevToolsConfig", tmp_path: Path, plugin_dir: Path
+):
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    (plugin_dir / "module.py").write_text("import pytest\n")
+
+    make_plugin_zip(
+        dev_tools_config_minimal, tmp_path / "serial", override_plugin_version="1.0"
+    )
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "parallel",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(jobs=2),
+    )
+
+    assert _get_file_contents(tmp_path / "parallel" / "Plugin-1.0.zip") == (
+        _get_file_contents(tmp_path / "serial" / "Plugin-1.0.zip")
+    )
+
+
+def test_make_zip_with_vendored_cache_matches_uncached_build(
+    dev_tools_config_minimal: "DevToolsConfig", tmp_path: Path, plugin_dir: Path
+):
+    cache_path = tmp_path / "cache"
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    (plugin_dir / "module.py").write_text("import pytest\n")
+
+    make_plugin_zip(
+        dev_tools_config_minimal, tmp_path / "uncached", override_plugin_version="1.0"
+    )
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "cached",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(vendored_cache_directory_path=cache_path),
+    )
+
+    cached_file = next(cache_path.glob("pytest-*/pytest/__init__.py"))
+    cached_file_mtime = cached_file.stat().st_mtime_ns
+
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "incremental",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(
+            build_directory_path=tmp_path / "build",
+            vendored_cache_directory_path=cache_path,
+        ),
+    )
+
+    assert cached_file.stat().st_mtime_ns == cached_file_mtime
+    assert cached_file.read_text().count("original source code changed") == 1
+    expected_contents = _get_file_contents(tmp_path / "uncached" / "Plugin-1.0.zip")
+    assert (
+        _get_file_contents(tmp_path / "cached" / "Plugin-1.0.zip") == expected_contents
+    )
+    assert (
+        _get_file_contents(tmp_path / "incremental" / "Plugin-1.0.zip")
+        == expected_contents
+    )
+
+
+def test_make_zip_collects_stage_timings(
+    dev_tools_config_minimal: "DevToolsConfig", tmp_path: Path
+):
+    timings = BuildTimings()
+
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "dist",
+        override_plugin_version="1.0",
+        timings=timings,
+    )
+    timings.write_json(tmp_path / "timings.json")
+
+    stages = {stage.name: stage for stage in timings.stages}
+    assert list(stages) == [
+        "read changelog",
+        "infer version",
+        "copy plugin code",
+        "copy runtime requirements",
+        "rewrite imports",
+        "update metadata",
+        "copy license",
+        "create zip",
+    ]
+    assert stages["copy runtime requirements"].file_count > 0
+    assert stages["create zip"].file_count == 1
+    assert stages["create zip"].byte_count == (
+        (tmp_path / "dist" / "Plugin-1.0.zip").stat().st_size
+    )
+    assert all(stage.wall_seconds >= 0 for stage in timings.stages)
+    assert "total" in timings.format_table()
+    timings_json = json.loads((tmp_path / "timings.json").read_text())
+    assert [stage["name"] for stage in timings_json["stages"]] == list(stages)
+
+
+def test_make_zip_with_tracing_records_worker_spans(
+    dev_tools_config_minimal: "DevToolsConfig", tmp_path: Path, plugin_dir: Path
+):
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    (plugin_dir / "module.py").write_text("import pytest\n")
+
+    start_tracing()
+    try:
+        make_plugin_zip(
+            dev_tools_config_minimal,
+            tmp_path / "dist",
+            override_plugin_version="1.0",
+            build_config=BuildConfig(jobs=2),
+        )
+    finally:
+        stop_tracing(tmp_path / "trace.json")
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    span_names = {span["name"] for span in spans}
+    assert {"copy distribution", "rewrite imports", "create zip"} <= span_names
+    rewrite_spans = [span for span in spans if span["name"] == "rewrite file"]
+    assert any(span["args"]["file"].endswith("module.py") for span in rewrite_spans)
+    assert {span["pid"] for span in rewrite_spans} != {os.getpid()}
+    assert min(span["ts"] for span in spans) == 0
+
+
+def test_make_zip_with_lockfile_matches_unlocked_build(
+    dev_tools_config_minimal: "DevToolsConfig", tmp_path: Path, plugin_dir: Path
+):
+    lockfile_path = tmp_path / "qpdt.lock"
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    (plugin_dir / "module.py").write_text("import pytest\n")
+    Lockfile.from_config(dev_tools_config_minimal).write(lockfile_path)
+
+    make_plugin_zip(
+        dev_tools_config_minimal, tmp_path / "unlocked", override_plugin_version="1.0"
+    )
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "locked",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(lockfile_path=lockfile_path),
+    )
+
+    assert _get_file_contents(tmp_path / "locked" / "Plugin-1.0.zip") == (
+        _get_file_contents(tmp_path / "unlocked" / "Plugin-1.0.zip")
+    )
+
+    lockfile = Lockfile.read(lockfile_path)
+    lockfile.distributions[0].version = "0.0.1"
+    lockfile.write(lockfile_path)
+
+    with pytest.raises(ValueError, match="differs from the installed version"):
+        make_plugin_zip(
+            dev_tools_config_minimal,
+            tmp_path / "locked",
+            override_plugin_version="1.0",
+            build_config=BuildConfig(lockfile_path=lockfile_path),
+        )
+
+
+def test_lockfile_ignores_installer_specific_record_rows(
+    dev_tools_config_minimal: "DevToolsConfig",
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    def _install(site_path: Path, record: str) -> Path:
+        (site_path / "lockeddist").mkdir(parents=True)
+        (site_path / "lockeddist" / "__init__.py").write_text("")
+        metadata_path = site_path / "lockeddist-1.0.dist-info"
+        metadata_path.mkdir()
+        (metadata_path / "METADATA").write_text("Name: lockeddist\nVersion: 1.0\n")
+        (metadata_path / "RECORD").write_text(record)
+        return metadata_path
+
+    init_row = "lockeddist/__init__.py,sha256=abc,0\n"
+    pip_metadata_path = _install(
+        tmp_path / "pip",
+        "lockeddist-1.0.dist-info/INSTALLER,sha256=pip,4\n"
+        "lockeddist-1.0.dist-info/RECORD,,\n"
+        "lockeddist/__pycache__/__init__.cpython-311.pyc,sha256=def,100\n"
+        + init_row
+        + "../../bin/lockeddist,sha256=ghi,200\n",
+    )
+    uv_metadata_path = _install(
+        tmp_path / "uv",
+        init_row + "lockeddist-1.0.dist-info/INSTALLER,sha256=uv,2\n",
+    )
+    lockfile = Lockfile(
+        runtime_requires=dev_tools_config_minimal.runtime_requires,
+        auto_add_recursive_runtime_dependencies=(
+            dev_tools_config_minimal.auto_add_recursive_runtime_dependencies
+        ),
+        distributions=[
+            LockedDistribution(
+                name="lockeddist",
+                version="1.0",
+                top_level_names=["lockeddist"],
+                record_sha256=get_distribution_record_hash(
+                    PathDistribution(pip_metadata_path)
+                ),
+            )
+        ],
+    )
+    monkeypatch.syspath_prepend(str(tmp_path / "uv"))
+
+    [(dist, top_level_names)] = lockfile.get_bundled_distributions(
+        dev_tools_config_minimal
+    )
+    assert get_distribution_metadata_path(dist) == uv_metadata_path
+    assert top_level_names == {"lockeddist"}
+
+    (uv_metadata_path / "RECORD").write_text("lockeddist/__init__.py,sha256=xyz,0\n")
+    with pytest.raises(ValueError, match="installed files of locked"):
+        lockfile.get_bundled_distributions(dev_tools_config_minimal)
+
+
+def test_make_zip_from_wheelhouse_bundles_wheel_files(
+    dev_tools_config_minimal: "DevToolsConfig", tmp_path: Path, plugin_dir: Path
+):
+    wheelhouse_path = tmp_path / "wheelhouse"
+    wheelhouse_path.mkdir()
+    _write_wheel(
+        wheelhouse_path / "wheellib-1.0-py3-none-any.whl",
+        {
+            "wheellib/__init__.py": "import wheeldep\n",
+            "wheellib-1.0.dist-info/METADATA": (
+                "Name: wheellib\nVersion: 1.0\nRequires-Dist: wheeldep\n"
+            ),
+        },
+    )
+    _write_wheel(
+        wheelhouse_path / "wheeldep-2.0-py2.py3-none-any.whl",
+        {
+            "wheeldep.py": "",
+            "wheeldep-2.0.dist-info/METADATA": "Name: wheeldep\nVersion: 2.0\n",
+        },
+    )
+    # older and platform specific wheels are not used
+    _write_wheel(
+        wheelhouse_path / "wheeldep-1.0-py3-none-any.whl",
+        {"wheeldep-1.0.dist-info/METADATA": "Name: wheeldep\nVersion: 1.0\n"},
+    )
+    _write_wheel(
+        wheelhouse_path / "wheeldep-3.0-cp312-cp312-win_amd64.whl",
+        {"wheeldep-3.0.dist-info/METADATA": "Name: wheeldep\nVersion: 3.0\n"},
+    )
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    dev_tools_config_minimal.runtime_requires = ["wheellib>=1.0"]
+    dev_tools_config_minimal.auto_add_recursive_runtime_dependencies = True
+    (plugin_dir / "module.py").write_text("import wheellib\n")
+
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "staged",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(wheelhouse_path=wheelhouse_path),
+    )
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "streamed",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(stream=True, wheelhouse_path=wheelhouse_path),
+    )
+
+    zip_file_path = tmp_path / "staged" / "Plugin-1.0.zip"
+    assert _get_file_contents(tmp_path / "streamed" / "Plugin-1.0.zip") == (
+        _get_file_contents(zip_file_path)
+    )
+    assert _get_file_names(zip_file_path, "Plugin/_vendor/") == {
+        "__init__.py",
+        "wheeldep-2.0.dist-info",
+        "wheeldep.py",
+        "wheellib",
+        "wheellib-1.0.dist-info",
+    }
+    assert "import Plugin._vendor.wheeldep as wheeldep" in _get_file_from_zip(
+        zip_file_path, "Plugin/_vendor/wheellib/__init__.py"
+    )
+    assert "import Plugin._vendor.wheellib as wheellib" in _get_file_from_zip(
+        zip_file_path, "Plugin/module.py"
+    )
+
+
+def test_make_zip_is_reproducible_and_skips_unchanged_zip(
+    dev_tools_config_minimal: "DevToolsConfig",
+    tmp_path: Path,
+    plugin_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    module_file = plugin_dir / "module.py"
+    module_file.write_text("import pytest\n")
+    zip_file_path = tmp_path / "dist" / "Plugin-1.0.zip"
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+
+    make_plugin_zip(
+        dev_tools_config_minimal, tmp_path / "dist", override_plugin_version="1.0"
+    )
+    first_zip_contents = zip_file_path.read_bytes()
+    first_zip_mtime_ns = zip_file_path.stat().st_mtime_ns
+
+    # same sources with other mtimes give the same zip, which is not written again
+    os.utime(module_file, (0, 0))
+    make_plugin_zip(
+        dev_tools_config_minimal, tmp_path / "dist", override_plugin_version="1.0"
+    )
+    assert zip_file_path.stat().st_mtime_ns == first_zip_mtime_ns
+
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "streamed",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(stream=True),
+    )
+    assert (tmp_path / "streamed" / "Plugin-1.0.zip").read_bytes() == (
+        first_zip_contents
+    )
+
+    with zipfile.ZipFile(zip_file_path) as z:
+        infos = z.infolist()
+    assert [info.filename for info in infos] == sorted(info.filename for info in infos)
+    assert {info.date_time for info in infos} == {(2023, 11, 14, 22, 13, 20)}
+    assert {info.external_attr >> 16 for info in infos if not info.is_dir()} == {
+        0o100644
+    }
+
+    module_file.write_text("import pytest\nimport pytest\n")
+    make_plugin_zip(
+        dev_tools_config_minimal, tmp_path / "dist", override_plugin_version="1.0"
+    )
+    assert zip_file_path.read_bytes() != first_zip_contents
+
+
+@pytest.mark.parametrize("compression", list(ZipCompression))
+def test_make_zip_with_compression_level_matches_serial_compression(
+    compression: ZipCompression,
+    dev_tools_config_minimal: "DevToolsConfig",
+    tmp_path: Path,
+    plugin_dir: Path,
+):
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    (plugin_dir / "data.txt").write_text("data " * 100000)
+
+    make_plugin_zip(
+        dev_tools_config_minimal,
+        tmp_path / "dist",
+        override_plugin_version="1.0",
+        build_config=BuildConfig(compression=compression),
+    )
+
+    zip_file_path = tmp_path / "dist" / "Plugin-1.0.zip"
+    serial_archive = PluginArchive(
+        get_source_date_epoch(dev_tools_config_minimal.changelog_file_path),
+        compression,
+        threads=1,
+    )
+    with zipfile.ZipFile(zip_file_path) as z:
+        assert z.testzip() is None
+        for info in z.infolist():
+            if not info.is_dir():
+                serial_archive.add_contents(PurePosixPath(info.filename), z.read(info))
+        data_info = z.getinfo("Plugin/data.txt")
+    serial_archive.write(tmp_path / "serial.zip")
+
+    assert (tmp_path / "serial.zip").read_bytes() == zip_file_path.read_bytes()
+    if compression == ZipCompression.STORE:
+        assert data_info.compress_size == data_info.file_size
+    else:
+        assert data_info.compress_size < data_info.file_size / 100
+
+
+def test_make_zip_with_tree_shaking_removes_unreachable_modules(
+    dev_tools_config_minimal: "DevToolsConfig", tmp_path: Path, plugin_dir: Path
+):
+    wheelhouse_path = tmp_path / "wheelhouse"
+    wheelhouse_path.mkdir()
+    _write_wheel(
+        wheelhouse_path / "wheellib-1.0-py3-none-any.whl",
+        {
+            "wheellib/__init__.py": "from . import core\n",
+            "wheellib/core.py": (
+                "import importlib\n"
+                "def load():\n"
+                "    from wheellib.util import helper\n"
+                "    return importlib.import_module('wheellib.formats.json')\n"
+            ),
+            "wheellib/util.py": "",
+            "wheellib/unused.py": "import wheellib.tests\n",
+            "wheellib/data.json": "{}",
+            "wheellib/formats/__init__.py": "",
+            "wheellib/formats/json.py": "",
+            "wheellib/formats/xml.py": "",
+            "wheellib/backends/__init__.py": "",
+            "wheellib/backends/dynamic.py": "",
+            "wheellib/tests/__init__.py": "",
+            "wheellib/tests/test_core.py": "import wheellib.core\n",
+            "wheellib/tests/data/input.json": "{}",
+            "wheellib-1.0.dist-info/METADATA": "Name: wheellib\nVersion: 1.0\n",
+        },
+    )
+    dev_tools_config_minimal.plugin_package_path = plugin_dir
+    dev_tools_config_minimal.runtime_requires = ["wheellib"]
+    dev_tools_config_minimal.tree_shake_runtime_dependencies = True
+    dev_tools_config_minimal.tree_shake_kept_modules = ["wheellib.backends.*"]
+    (plugin_dir / "module.py").write_text("import wheellib\n")
+
+    for build_config in [
+        BuildConfig(wheelhouse_path=wheelhouse_path),
+        BuildConfig(wheelhouse_path=wheelhouse_path, stream=True),
+    ]:
+        make_plugin_zip(
+            dev_tools_config_minimal,
+            tmp_path / "dist",
+            override_plugin_version="1.0",
+            build_config=build_config,
+        )
+
+        with zipfile.ZipFile(tmp_path / "dist" / "Plugin-1.0.zip") as z:
+            vendored_file_names = {
+                name.removeprefix("Plugin/_vendor/wheellib/")
+                for name in z.namelist()
+                if name.startswith("Plugin/_vendor/wheellib/")
+                and not name.endswith("/")
+            }
+        assert vendored_file_names == {
+            "__init__.py",
+            "backends/__init__.py",
+            "backends/dynamic.py",
+            "core.py",
+            "data.json",
+            "formats/__init__.py",
+            "formats/json.py",
+            "util.py",
+        }
+
+
+def test_copy_distribution_files_copies_only_recorded_files(tmp_path: Path):
+    site_path = tmp_path / "site"
+    (site_path / "mypkg").mkdir(parents=True)
+    (site_path / "mypkg" / "__init__.py").write_text("import mypkg.data\n")
+    (site_path / "mypkg" / "data.json").write_text("{}")
+    (site_path / "mypkg" / "stray.txt").write_text("not in record")
+    metadata_path = site_path / "mypkg-1.0.dist-info"
+    metadata_path.mkdir()
+    (metadata_path / "METADATA").write_text("Name: mypkg\nVersion: 1.0\n")
+    (metadata_path / "RECORD").write_text(
+        "mypkg/__init__.py,,\n"
+        "mypkg/data.json,,\n"
+        "mypkg/missing.py,,\n"
+        "mypkg-1.0.dist-info/METADATA,,\n"
+        "mypkg-1.0.dist-info/RECORD,,\n"
+    )
+
+    copied_paths = copy_distribution_files(
+        PathDistribution(metadata_path),
+        {"mypkg"},
+        tmp_path / "target",
+        materialized_suffixes=(".py",),
+    )
+
+    assert copied_paths == [
+        tmp_path / "target" / "mypkg-1.0.dist-info",
+        tmp_path / "target" / "mypkg",
+    ]
+    assert sorted((tmp_path / "target" / "mypkg").iterdir()) == [
+        tmp_path / "target" / "mypkg" / "__init__.py",
+        tmp_path / "target" / "mypkg" / "data.json",
+    ]
+    # materialized files are independent of the source
+    assert (tmp_path / "target" / "mypkg" / "__init__.py").stat().st_nlink == 1
+    assert (tmp_path / "target" / "mypkg" / "data.json").read_text() == "{}"
+
+
+def _write_wheel(wheel_file_path: Path, files: dict[str, str]) -> None:
+    metadata_directory_name = next(
+        name.split("/")[0] for name in files if name.endswith("/METADATA")
+    )
+    record = "".join(f"{name},,\n" for name in files)
+    with zipfile.ZipFile(wheel_file_path, "w") as z:
+        for name, contents in files.items():
+            z.writestr(name, contents)
+        z.writestr(
+            f"{metadata_directory_name}/RECORD",
+            record + f"{metadata_directory_name}/RECORD,,\n",
+        )
+
+
+def _get_file_contents(zip_file: Path) -> dict[str, bytes]:
+    with zipfile.ZipFile(zip_file) as z:
+        return {name: z.read(name) for name in z.namelist() if not name.endswith("/")}
+
+
 def _get_file_names(zip_file: Path, prefix: str) -> set[str]:
     with zipfile.ZipFile(zip_file) as z:
         namelist = z.namelist()
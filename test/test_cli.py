@@ -0,0 +1,65 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import subprocess
+import sys
+from pathlib import Path
+
+# slow to import dependencies only needed by some of the subcommands
+SUBCOMMAND_DEPENDENCIES = [
+    "importlib_metadata",
+    "lxml",
+    "packaging",
+    "qgis_plugin_dev_tools.build",
+    "qgis_plugin_dev_tools.publish",
+    "requests",
+]
+
+
+def _get_imported_modules(args: list[str]) -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "qgis_plugin_dev_tools", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.rsplit("|", 1)[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+def test_cli_help_does_not_import_subcommand_dependencies():
+    imported_modules = _get_imported_modules(["--help"])
+
+    assert "qgis_plugin_dev_tools.cli" in imported_modules
+    assert imported_modules.isdisjoint(SUBCOMMAND_DEPENDENCIES)
+
+
+def test_cli_transcompile_does_not_import_build_dependencies(tmp_path: Path):
+    pyproject_file = tmp_path / "pyproject.toml"
+    pyproject_file.write_text(
+        '[tool.qgis_plugin_dev_tools]\nplugin_package_name = "plugin"\n'
+    )
+
+    imported_modules = _get_imported_modules(["tc", "-p", str(pyproject_file)])
+
+    assert "qgis_plugin_dev_tools.translations" in imported_modules
+    assert imported_modules.isdisjoint(SUBCOMMAND_DEPENDENCIES)
@@ -0,0 +1,155 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from qgis_plugin_dev_tools.start.bootstrap.template import (
+    _get_plugin_module_names_to_reload,
+    _reload_modules,
+)
+from qgis_plugin_dev_tools.start.daemon_server import start_daemon_server
+from qgis_plugin_dev_tools.start.file_watcher import (
+    FileWatcher,
+    InotifyFileWatcher,
+    PollingFileWatcher,
+)
+from qgis_plugin_dev_tools.start.hot_reload import run_hot_reload
+
+
+@pytest.mark.parametrize(
+    "watcher_class",
+    [
+        pytest.param(
+            InotifyFileWatcher,
+            marks=pytest.mark.skipif(
+                sys.platform != "linux", reason="inotify is only available on linux"
+            ),
+        ),
+        PollingFileWatcher,
+    ],
+)
+def test_file_watcher_reports_changed_files_once(
+    watcher_class: type[FileWatcher], tmp_path: Path
+):
+    (tmp_path / "package").mkdir()
+    (tmp_path / "__pycache__").mkdir()
+
+    with watcher_class(tmp_path) as watcher:
+        assert watcher.wait_for_changes(timeout=0.1) == set()
+
+        (tmp_path / "__pycache__" / "module.cpython-311.pyc").write_bytes(b"")
+        (tmp_path / "module.py").write_text("a = 1\n")
+        (tmp_path / "package" / "other.py").write_text("b = 2\n")
+
+        assert watcher.wait_for_changes(timeout=2) == {
+            tmp_path / "module.py",
+            tmp_path / "package" / "other.py",
+        }
+        assert watcher.wait_for_changes(timeout=0.1) == set()
+
+
+def test_hot_reload_sends_reload_command_until_qgis_disconnects(tmp_path: Path):
+    with start_daemon_server() as daemon_server:
+        qgis_socket = socket.create_connection(("localhost", daemon_server.port))
+        connection = daemon_server.accept_connection(timeout=5)
+    assert connection is not None
+
+    hot_reload_thread = threading.Thread(
+        target=run_hot_reload, args=(connection, tmp_path)
+    )
+    hot_reload_thread.start()
+    try:
+        with qgis_socket, qgis_socket.makefile("rwb") as qgis_file:
+            # let the watcher start before changing the plugin
+            time.sleep(0.5)
+            (tmp_path / "plugin.py").write_text("a = 1\n")
+
+            message = json.loads(qgis_file.readline())
+            assert message["command"] == "reload"
+            assert message["changed_files"] == [str(tmp_path.resolve() / "plugin.py")]
+
+            qgis_file.write(b'{"event": "reloaded", "seconds": 0.1}\n')
+            qgis_file.flush()
+    finally:
+        hot_reload_thread.join(timeout=5)
+
+    assert not hot_reload_thread.is_alive()
+    assert not connection.is_open
+
+
+def test_reload_modules_reloads_changed_modules_and_importing_modules(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    package_path = tmp_path / "selectivereload"
+    package_path.mkdir()
+    (package_path / "__init__.py").write_text("from .b import B\n")
+    (package_path / "a.py").write_text("A = 1\n")
+    (package_path / "b.py").write_text("from selectivereload import a\nB = a.A\n")
+    (package_path / "c.py").write_text("def load():\n    import selectivereload.b\n")
+    (package_path / "d.py").write_text("D = 4\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # cached byte code of a module changed within a second would be stale
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    for module_name in list(sys.modules):
+        if module_name.startswith("selectivereload"):
+            monkeypatch.delitem(sys.modules, module_name)
+
+    import selectivereload
+    import selectivereload.c
+    import selectivereload.d
+
+    original_d = selectivereload.d
+    (package_path / "a.py").write_text("A = 2\n")
+
+    module_names = _get_plugin_module_names_to_reload(
+        "selectivereload", [package_path / "a.py"]
+    )
+    assert module_names is not None
+    assert module_names.index("selectivereload.a") < module_names.index(
+        "selectivereload.b"
+    )
+    assert module_names.index("selectivereload.b") < module_names.index(
+        "selectivereload"
+    )
+    assert set(module_names) == {
+        "selectivereload",
+        "selectivereload.a",
+        "selectivereload.b",
+        "selectivereload.c",
+    }
+    assert (
+        _get_plugin_module_names_to_reload("selectivereload", [package_path / "new.py"])
+        is None
+    )
+
+    _reload_modules(module_names)
+
+    reloaded_package = sys.modules["selectivereload"]
+    assert reloaded_package is not selectivereload
+    assert reloaded_package.B == 2
+    assert sys.modules["selectivereload.d"] is original_d
+    assert reloaded_package.d is original_d
+    assert reloaded_package.c is sys.modules["selectivereload.c"]
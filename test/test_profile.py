@@ -0,0 +1,51 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import cProfile
+import logging
+from pathlib import Path
+
+import pytest
+
+from qgis_plugin_dev_tools.start.profile import (
+    format_profile_summary,
+    log_profile_summary,
+)
+
+
+def _slow_init_gui() -> int:
+    return sum(i * i for i in range(10000))
+
+
+def test_profile_summary_shows_slowest_functions(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    profile_path = tmp_path / "load.pstats"
+    profiler = cProfile.Profile()
+    profiler.runcall(_slow_init_gui)
+    profiler.dump_stats(str(profile_path))
+
+    summary = format_profile_summary(profile_path, count=5)
+
+    assert "_slow_init_gui" in summary
+    assert "cumulative" in summary
+
+    with caplog.at_level(logging.INFO):
+        log_profile_summary(tmp_path / "missing.pstats")
+    assert "did not write the profile" in caplog.text
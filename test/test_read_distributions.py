@@ -17,13 +17,19 @@
 #  You should have received a copy of the GNU General Public License
 #  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
 
+import logging
+from pathlib import Path
 from typing import Any
 
 import pytest
-from importlib_metadata import distribution
+from importlib_metadata import PathDistribution, distribution
 from packaging.requirements import Requirement
 
-from qgis_plugin_dev_tools.utils.distributions import get_distribution_requirements
+from qgis_plugin_dev_tools.utils.distribution_index import DistributionIndex
+from qgis_plugin_dev_tools.utils.distributions import (
+    get_distribution_requirements,
+    resolve_distribution_dependency_graph,
+)
 
 
 @pytest.fixture
@@ -43,3 +49,166 @@ def test_get_distribution_requirements(sample_dist: Any):
         "toml",
         "zipp",
     ]
+
+
+def test_resolve_distribution_dependency_graph_with_diamond_and_cycle(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    requirements = {
+        "top": ["Left_Dep", "right-dep (>=1.0)", "optional; extra == 'test'"],
+        "left-dep": ["bottom"],
+        "right-dep": ["bottom"],
+        "bottom": ["top", "missing-dep"],
+    }
+    for name, requires in requirements.items():
+        metadata_path = tmp_path / f"{name.replace('-', '_')}-1.0.dist-info"
+        metadata_path.mkdir()
+        (metadata_path / "METADATA").write_text(
+            "".join(
+                [f"Name: {name}\nVersion: 1.0\n"]
+                + [f"Requires-Dist: {requirement}\n" for requirement in requires]
+            )
+        )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    graph = resolve_distribution_dependency_graph([distribution("top")])
+
+    assert list(graph.distributions) == ["top", "left-dep", "bottom", "right-dep"]
+    assert graph.requirements == {
+        "top": ["left-dep", "right-dep"],
+        "left-dep": ["bottom"],
+        "right-dep": ["bottom"],
+        "bottom": [],
+    }
+    assert [dist.name for dist in graph.get_dependencies()] == [
+        "left-dep",
+        "bottom",
+        "right-dep",
+    ]
+
+
+def test_resolve_distribution_dependency_graph_canonicalizes_requirement_names(
+    tmp_path: Path,
+):
+    def _write_distribution(name: str, requires: list[str]) -> PathDistribution:
+        metadata_path = tmp_path / f"{name}-1.0.dist-info"
+        metadata_path.mkdir()
+        (metadata_path / "METADATA").write_text(
+            "".join(
+                [f"Name: {name}\nVersion: 1.0\n"]
+                + [f"Requires-Dist: {requirement}\n" for requirement in requires]
+            )
+        )
+        return PathDistribution(metadata_path)
+
+    root_distribution = _write_distribution(
+        "Root_Dist",
+        [
+            'Foo_Bar>=1; extra == "x"',
+            "Dotted.Name[extra]>=2;python_version>='3'",
+        ],
+    )
+    dotted_distribution = _write_distribution("Dotted.Name", [])
+    found_names: list[str] = []
+
+    def _find_distribution(name: str) -> PathDistribution | None:
+        found_names.append(name)
+        return dotted_distribution if name == "dotted-name" else None
+
+    graph = resolve_distribution_dependency_graph(
+        [root_distribution], find_distribution=_find_distribution
+    )
+
+    # requirements of extras are not resolved
+    assert found_names == ["dotted-name"]
+    assert graph.root_names == ["root-dist"]
+    assert graph.requirements == {"root-dist": ["dotted-name"], "dotted-name": []}
+    assert graph.distributions["dotted-name"] is dotted_distribution
+
+
+def test_resolve_distribution_dependency_graph_reports_package_without_metadata(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    metadata_path = tmp_path / "root_dist-1.0.dist-info"
+    metadata_path.mkdir()
+    (metadata_path / "METADATA").write_text(
+        "Name: root_dist\nVersion: 1.0\nRequires-Dist: Foo.Bar>=1\n"
+    )
+    # importable package without distribution metadata
+    (tmp_path / "foo_bar").mkdir()
+    (tmp_path / "foo_bar" / "__init__.py").touch()
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    with caplog.at_level(logging.ERROR):
+        graph = resolve_distribution_dependency_graph([PathDistribution(metadata_path)])
+
+    assert graph.requirements == {"root-dist": []}
+    assert [record.getMessage() for record in caplog.records] == [
+        "Could not find package foo-bar"
+    ]
+
+
+def test_distribution_index_reads_only_changed_distributions(tmp_path: Path):
+    site_path = tmp_path / "site"
+    for name, top_level_txt in (("first", None), ("second", "second_pkg\n")):
+        metadata_path = site_path / f"{name}-1.0.dist-info"
+        metadata_path.mkdir(parents=True)
+        (metadata_path / "METADATA").write_text(f"Name: {name}\nVersion: 1.0\n")
+        (metadata_path / "RECORD").write_text(f"{name}/__init__.py,,\n")
+        (site_path / name).mkdir()
+        (site_path / name / "__init__.py").touch()
+        (metadata_path / "entry_points.txt").write_text(
+            f"[qgis_plugin_dev_tools]\n{name} = {name}\n"
+        )
+        if top_level_txt is not None:
+            (metadata_path / "top_level.txt").write_text(top_level_txt)
+
+    index = DistributionIndex()
+    assert index.refresh([str(site_path)])
+    index.write(tmp_path / "index.json")
+    index = DistributionIndex.read(tmp_path / "index.json")
+
+    assert not index.refresh([str(site_path)])
+    assert [dist.name for dist in index.get_distributions_providing("first")] == [
+        "first"
+    ]
+    assert [dist.name for dist in index.get_distributions_providing("second_pkg")] == [
+        "second"
+    ]
+    assert [
+        entry_point.name
+        for entry_point in index.get_entry_points("qgis_plugin_dev_tools")
+    ] == ["first", "second"]
+
+    unchanged_distribution = index.site_directories[
+        str(site_path.resolve())
+    ].distributions["first-1.0.dist-info"]
+    metadata_path = site_path / "third-2.0.dist-info"
+    metadata_path.mkdir()
+    (metadata_path / "METADATA").write_text("Name: third\nVersion: 2.0\n")
+
+    assert index.refresh([str(site_path)])
+    state = index.site_directories[str(site_path.resolve())]
+    assert state.distributions["first-1.0.dist-info"] is unchanged_distribution
+    assert [dist.name for dist in index.iter_distributions()] == [
+        "first",
+        "second",
+        "third",
+    ]
+
+
+def test_distribution_index_reads_egg_info_files_without_warnings(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    # older setuptools develop installs write the metadata as a single file
+    (tmp_path / "legacy.egg-info").write_text("Name: legacy\nVersion: 0.1\n")
+
+    index = DistributionIndex()
+    with caplog.at_level(logging.WARNING):
+        assert index.refresh([str(tmp_path)])
+
+    assert [
+        (dist.name, dist.version, dist.top_level_names)
+        for dist in index.iter_distributions()
+    ] == [("legacy", "0.1", [])]
+    assert caplog.records == []
@@ -21,7 +21,9 @@ from collections.abc import Callable
 from pathlib import Path
 
 import pytest
+from importlib_metadata import PackageNotFoundError
 
+from qgis_plugin_dev_tools.config import DevToolsConfig
 from qgis_plugin_dev_tools.config.pyproject import read_pyproject_config
 
 
@@ -115,3 +117,24 @@ def test_section_read_to_dataclass(
     assert result.use_dangerous_vendor_sys_path_append
     assert result.auto_add_recursive_runtime_dependencies
     assert result.changelog_file_path == "../../CHANGELOG.md"
+
+
+def test_dev_tools_config_resolves_environment_lazily(
+    create_pyproject_toml_with_contents: Callable[[list[str]], Path],
+):
+    test_file = create_pyproject_toml_with_contents(
+        [
+            "[tool.qgis_plugin_dev_tools]",
+            'plugin_package_name = "not_installed_plugin"',
+            'runtime_requires = ["not-installed-distribution"]',
+            "auto_add_recursive_runtime_dependencies = true",
+        ]
+    )
+
+    config = DevToolsConfig.from_pyproject_config(test_file)
+
+    assert config.plugin_package_name == "not_installed_plugin"
+    with pytest.raises(ValueError, match="not_installed_plugin"):
+        _ = config.plugin_package_path
+    with pytest.raises(PackageNotFoundError):
+        _ = config.extra_runtime_distributions
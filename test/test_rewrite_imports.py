@@ -20,7 +20,10 @@
 from pathlib import Path
 from xml.etree import ElementTree as ET
 
-from qgis_plugin_dev_tools.build.rewrite_imports import rewrite_imports_in_source_file
+from qgis_plugin_dev_tools.build.rewrite_imports import (
+    VendoredImportRewriter,
+    rewrite_imports_in_source_file,
+)
 
 
 def _trim_first_line_comment(lines: list[str]) -> list[str]:
@@ -158,3 +161,116 @@ def test_ui_file_custom_widget_imports_are_replaced(tmp_path: Path):
             assert header_section.text == "container.package.xyz.something.xyz"
         else:
             assert header_section.text == "xyz_something"
+
+
+def test_multiple_package_imports_rewritten_in_single_pass(tmp_path: Path):
+    file = tmp_path / "mock.py"
+
+    file.write_text(
+        """
+    import os
+    import xyz_long as alias
+    from xyz import something
+    from abc.sub import other
+    import xyz
+    import abc
+    import abcd
+    """
+    )
+
+    VendoredImportRewriter(
+        rewritten_package_names=["xyz", "xyz_long", "abc"],
+        container_package_name="container.package",
+    ).rewrite_source_file(file)
+
+    assert (
+        _trim_first_line_comment(file.read_text().splitlines())
+        == """
+    import os
+    import container.package.xyz_long as alias
+    from container.package.xyz import something
+    from container.package.abc.sub import other
+    import container.package.xyz as xyz
+    import container.package.abc as abc
+    import abcd
+    """.splitlines()
+    )
+
+
+def test_submodule_imports_rewritten_keeping_comments(tmp_path: Path):
+    file = tmp_path / "mock.py"
+
+    file.write_text(
+        """import sys
+import xyz.sub  # keep this comment
+import xyz.sub.deeper, os
+
+
+def function():
+    # uses the submodules
+    return xyz.sub.deeper.value + xyz.sub.value + other.xyz.sub
+
+
+sys.modules['xyz.sub'] = None
+"""
+    )
+
+    VendoredImportRewriter(
+        rewritten_package_names=["xyz"],
+        container_package_name="container.package",
+    ).rewrite_source_file(file)
+
+    assert (
+        _trim_first_line_comment(file.read_text().splitlines())
+        == """import sys
+import container.package.xyz.sub as vendored_xyz_sub  # keep this comment
+import container.package.xyz.sub.deeper as vendored_xyz_sub_deeper, os
+
+
+def function():
+    # uses the submodules
+    return vendored_xyz_sub_deeper.value + vendored_xyz_sub.value + other.xyz.sub
+
+
+sys.modules['container.package.xyz.sub'] = None
+""".splitlines()
+    )
+    assert [path.name for path in tmp_path.iterdir()] == ["mock.py"]
+
+
+def test_files_not_mentioning_vendored_packages_are_skipped(tmp_path: Path):
+    skipped_file = tmp_path / "skipped.py"
+    skipped_file.write_text("from .xyz_other import something\nimport os\n")
+    empty_file = tmp_path / "__init__.py"
+    empty_file.write_text("")
+    rewritten_file = tmp_path / "rewritten.py"
+    rewritten_file.write_text("import xyz\n")
+
+    rewriter = VendoredImportRewriter(
+        rewritten_package_names=["xyz"],
+        container_package_name="container.package",
+    )
+
+    assert not rewriter.rewrite_source_file(skipped_file)
+    assert not rewriter.rewrite_source_file(empty_file)
+    assert rewriter.rewrite_source_file(rewritten_file)
+
+    assert skipped_file.read_text() == "from .xyz_other import something\nimport os\n"
+    assert empty_file.read_text() == ""
+    assert _trim_first_line_comment(rewritten_file.read_text().splitlines()) == [
+        "import container.package.xyz as xyz"
+    ]
+
+
+def test_nothing_is_rewritten_without_vendored_package_names(tmp_path: Path):
+    file = tmp_path / "mock.py"
+    file.write_text("import os\nimport xyz\nfrom abc import something\n")
+
+    rewriter = VendoredImportRewriter(
+        rewritten_package_names=[],
+        container_package_name="container.package",
+    )
+
+    assert rewriter.rewrite_source("mock.py", file.read_text()) == file.read_text()
+    assert not rewriter.rewrite_source_file(file)
+    assert file.read_text() == "import os\nimport xyz\nfrom abc import something\n"
@@ -0,0 +1,127 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from importlib_metadata import PathDistribution
+
+from qgis_plugin_dev_tools.start.runtime_overlay import (
+    OVERLAY_PATH_FILE_NAME,
+    UNUSED_OVERLAY_RETENTION_SECONDS,
+    RuntimeOverlay,
+)
+
+
+def _install_distribution(
+    site_path: Path, name: str, files: dict[str, str]
+) -> PathDistribution:
+    metadata_path = site_path / f"{name}-1.0.dist-info"
+    metadata_path.mkdir(parents=True)
+    (metadata_path / "METADATA").write_text(f"Name: {name}\nVersion: 1.0\n")
+    (metadata_path / "RECORD").write_text(
+        "".join(f"{file_name},,\n" for file_name in files)
+        + f"{metadata_path.name}/METADATA,,\n"
+    )
+    for file_name, contents in files.items():
+        (site_path / file_name).parent.mkdir(parents=True, exist_ok=True)
+        (site_path / file_name).write_text(contents)
+    return PathDistribution(metadata_path)
+
+
+def test_runtime_overlay_links_only_given_distributions(tmp_path: Path):
+    first_site_path = tmp_path / "first-site"
+    second_site_path = tmp_path / "second-site"
+    editable_path = tmp_path / "editable"
+    (editable_path / "editable_lib").mkdir(parents=True)
+    (editable_path / "editable_lib" / "__init__.py").write_text("")
+    first_distribution = _install_distribution(
+        first_site_path,
+        "first",
+        {
+            "ns/first/__init__.py": "",
+            "first_module.py": "",
+            "__editable__.first.pth": f"{editable_path}\n",
+            "../../bin/first": "",
+        },
+    )
+    second_distribution = _install_distribution(
+        second_site_path, "second", {"ns/second/__init__.py": ""}
+    )
+    _install_distribution(first_site_path, "unrelated", {"unrelated.py": ""})
+    plugin_root_path = tmp_path / "plugin-root"
+    (plugin_root_path / "plugin").mkdir(parents=True)
+    (plugin_root_path / "plugin" / "__init__.py").write_text("")
+
+    overlay = RuntimeOverlay()
+    overlay.add_distribution(first_distribution)
+    overlay.add_distribution(second_distribution)
+    overlay.add_path_directory(plugin_root_path)
+    overlay_path = overlay.create(tmp_path / "overlays", "plugin")
+
+    assert sorted(path.name for path in overlay_path.iterdir()) == [
+        "__editable__.first.pth",
+        "first-1.0.dist-info",
+        "first_module.py",
+        "ns",
+        OVERLAY_PATH_FILE_NAME,
+        "second-1.0.dist-info",
+    ]
+    assert (overlay_path / "first_module.py").is_symlink()
+    assert not (overlay_path / "ns").is_symlink()
+    second_package_path = second_site_path / "ns" / "second"
+    assert (overlay_path / "ns" / "second").resolve() == second_package_path
+    subprocess.run(
+        [
+            sys.executable,
+            "-S",
+            "-c",
+            "import site, sys\n"
+            f"site.addsitedir({str(overlay_path)!r})\n"
+            "import editable_lib, first_module, ns.first, ns.second, plugin\n"
+            "from importlib.metadata import version\n"
+            "assert version('second') == '1.0'\n"
+            "try:\n"
+            "    import unrelated\n"
+            "except ImportError:\n"
+            "    pass\n"
+            "else:\n"
+            "    sys.exit('unrelated was importable')\n",
+        ],
+        check=True,
+    )
+
+    assert overlay.create(tmp_path / "overlays", "plugin") == overlay_path
+    overlay.add_path_directory(tmp_path)
+    changed_overlay_path = overlay.create(tmp_path / "overlays", "plugin")
+    assert changed_overlay_path != overlay_path
+    # a running qgis may still use the earlier overlay
+    assert overlay_path.exists()
+
+    unused_time = time.time() - UNUSED_OVERLAY_RETENTION_SECONDS - 60
+    os.utime(overlay_path, (unused_time, unused_time))
+    os.utime(changed_overlay_path, (unused_time, unused_time))
+    assert overlay.create(tmp_path / "overlays", "plugin") == changed_overlay_path
+    overlay.add_path_directory(first_site_path)
+    overlay.create(tmp_path / "overlays", "plugin")
+    assert not overlay_path.exists()
+    assert changed_overlay_path.exists()
@@ -0,0 +1,111 @@
+#  Copyright (C) 2026 National Land Survey of Finland
+#  (https://www.maanmittauslaitos.fi/en).
+#
+#
+#  This file is part of qgis-plugin-dev-tools.
+#
+#  qgis-plugin-dev-tools is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  qgis-plugin-dev-tools is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with qgis-plugin-dev-tools. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import socket
+import time
+from pathlib import Path
+
+from qgis_plugin_dev_tools.start.daemon_server import start_daemon_server
+from qgis_plugin_dev_tools.start.timeline import wait_for_startup_timeline
+
+
+def test_startup_timeline_is_received_from_qgis(tmp_path: Path):
+    launch_time = 1000.0
+    with start_daemon_server() as daemon_server:
+        qgis_socket = socket.create_connection(("localhost", daemon_server.port))
+        connection = daemon_server.accept_connection(timeout=5)
+    assert connection is not None
+
+    with connection, qgis_socket:
+        qgis_socket.sendall(
+            b'{"event": "reloaded"}\n'
+            + json.dumps(
+                {
+                    "event": "startup_timeline",
+                    "phases": [
+                        ["enable plugin", 1004.0, 1007.0],
+                        ["qgis initialization", 1001.0, 1003.0],
+                        ["load plugin", 1004.5, 1005.0],
+                    ],
+                }
+            ).encode("utf-8")
+            + b"\n"
+        )
+        startup_timeline = wait_for_startup_timeline(connection, launch_time, 5)
+
+    assert startup_timeline is not None
+    assert [
+        (phase.name, phase.start_seconds, phase.duration_seconds)
+        for phase in startup_timeline.phases
+    ] == [
+        ("launch qgis", 0.0, 1.0),
+        ("qgis initialization", 1.0, 2.0),
+        ("enable plugin", 4.0, 3.0),
+        ("load plugin", 4.5, 0.5),
+    ]
+    assert startup_timeline.total_seconds == 7.0
+    assert "load plugin" in startup_timeline.format_waterfall()
+
+    json_path = tmp_path / "timeline.json"
+    startup_timeline.write_json(json_path)
+    assert json.loads(json_path.read_text())["total_seconds"] == 7.0
+
+
+def test_messages_after_startup_timeline_are_kept_on_connection():
+    with start_daemon_server() as daemon_server:
+        qgis_socket = socket.create_connection(("localhost", daemon_server.port))
+        connection = daemon_server.accept_connection(timeout=5)
+    assert connection is not None
+
+    with connection, qgis_socket:
+        qgis_socket.sendall(
+            b'{"event": "startup_timeline", "phases": []}\n'
+            b'{"event": "reloaded", "seconds": 1.0}\n'
+            b'{"event": "reloaded", "seconds": 2.0}\n'
+        )
+        assert wait_for_startup_timeline(connection, 0.0, 5) is not None
+        assert connection.receive_messages(timeout=5) == [
+            {"event": "reloaded", "seconds": 1.0},
+            {"event": "reloaded", "seconds": 2.0},
+        ]
+        assert connection.receive_messages() == []
+
+
+def test_startup_timeline_is_not_received_if_qgis_disconnects():
+    with start_daemon_server() as daemon_server:
+        qgis_socket = socket.create_connection(("localhost", daemon_server.port))
+        connection = daemon_server.accept_connection(timeout=5)
+    assert connection is not None
+
+    qgis_socket.close()
+    with connection:
+        assert wait_for_startup_timeline(connection, 0.0, 5) is None
+
+
+def test_startup_timeline_is_not_waited_for_longer_than_timeout():
+    with start_daemon_server() as daemon_server:
+        qgis_socket = socket.create_connection(("localhost", daemon_server.port))
+        connection = daemon_server.accept_connection(timeout=5)
+    assert connection is not None
+
+    with connection, qgis_socket:
+        start_time = time.monotonic()
+        assert wait_for_startup_timeline(connection, 0.0, 0.2) is None
+        assert time.monotonic() - start_time < 2